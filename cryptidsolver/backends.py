@@ -0,0 +1,495 @@
+"""
+Computation backends for clue evaluation and tile distributions.
+
+Player.possible_clues and Game.possible_tiles delegate to the active
+backend:
+
+- reference: the set-based evaluation, walking the tiles around every tile
+  and intersecting frozensets of tiles. Slow, but simple enough to trust.
+- bitset: integer bitboards, with the strategies of
+  cryptidsolver.distribution. The default.
+- numpy: a clues x tiles boolean matrix per map, reduced with NumPy in
+  chunks, merging equal intersections of the players. Available with the
+  numpy extra, pip install cryptidsolver[numpy].
+
+Backends must give identical results, which tests/test_backends.py checks
+on random games. Select one with use(NAME) or the CRYPTIDSOLVER_BACKEND
+environment variable. A backend selected by the environment variable
+falls back to bitset when its dependencies are missing.
+"""
+
+import functools
+import itertools
+import math
+import os
+import warnings
+from collections.abc import Iterable
+from typing import TYPE_CHECKING, Protocol
+
+from cryptidsolver import distribution
+from cryptidsolver.bitboard import BOARD_SIZE, MASK_BYTES
+from cryptidsolver.clue import Clue
+from cryptidsolver.constant.clues import (
+    CLUE_COLLECTION,
+    ORDERED_CLUES,
+    THREE_FROM_BLACK,
+)
+from cryptidsolver.gamemap import Map
+from cryptidsolver.tile import MapTile
+
+if TYPE_CHECKING:
+    import numpy as np
+
+REFERENCE = "reference"
+BITSET = "bitset"
+NUMPY = "numpy"
+DEFAULT_BACKEND = BITSET
+
+_BACKEND_ENV = "CRYPTIDSOLVER_BACKEND"
+
+# Rows of the intersection chunks of the numpy backend, 108 bytes each
+CHUNK_ROWS = 1 << 14
+
+# Clues players may hold, as in the base game without black structures
+_BASE_CLUES = CLUE_COLLECTION.difference({THREE_FROM_BLACK})
+
+
+class _Placements(Protocol):
+    mask: int
+
+    def __iter__(self): ...
+
+
+class _Player(Protocol):
+    cubes: _Placements
+    disks: _Placements
+
+
+class Backend:
+    """
+    Interface of the backends.
+    """
+
+    name = ""
+    # Whether PossibleTiles may answer its predicates with an early exit
+    # distribution.PruningSearch, which evaluates the clues as bitboards.
+    # Otherwise they are answered from tile_counts.
+    searches = False
+
+    def possible_clues(self, player: _Player, gamemap: Map) -> frozenset[Clue]:
+        """
+        Args:
+            player: Player with cubes and disks placed
+            gamemap: Current gamemap
+
+        Returns:
+            Clues accepting every disk and no cube of the player
+        """
+        raise NotImplementedError
+
+    def strategy(
+        self, candidates: list[frozenset[Clue]], algorithm: str | None = None
+    ) -> str | None:
+        """
+        Args:
+            candidates: Possible clues of each player
+            algorithm: Strategy of cryptidsolver.distribution to force
+
+        Returns:
+            Strategy tile_counts uses on the candidates, None for the
+            backends having a single one
+
+        Raises:
+            ValueError: An unknown strategy, or a strategy forced on a
+                backend having a single one
+        """
+
+        if algorithm is not None:
+            raise ValueError(f"The {self.name} backend has a single strategy")
+        return None
+
+    def tile_counts(
+        self,
+        gamemap: Map,
+        candidates: list[frozenset[Clue]],
+        algorithm: str | None = None,
+    ) -> tuple[dict[MapTile, int], int]:
+        """
+        Args:
+            gamemap: Current gamemap
+            candidates: Possible clues of each player
+            algorithm: Strategy of cryptidsolver.distribution to force, see
+                strategy()
+
+        Returns:
+            Number of combinations of the candidates singling out each tile,
+            and the amount of work done, e.g. the combinations enumerated
+        """
+        raise NotImplementedError
+
+
+class ReferenceBackend(Backend):
+    """
+    Evaluates the clues tile by tile and intersects sets of tiles.
+    """
+
+    name = REFERENCE
+
+    @staticmethod
+    def _has_feature(tile: MapTile, clue: Clue) -> bool:
+        if clue.clue_type == "biome":
+            return tile.biome in clue.distance_from
+        if clue.clue_type == "animal":
+            return tile.animal in clue.distance_from
+        return tile.structure is not None and bool(
+            {tile.structure.color, tile.structure.shape} & clue.distance_from
+        )
+
+    @functools.lru_cache(maxsize=1024)
+    def accepted_tiles(self, clue: Clue, gamemap: Map) -> frozenset[MapTile]:
+        """
+        Returns:
+            Tiles the clue accepts, walked from the tiles near each tile
+        """
+
+        accepted = frozenset(
+            tile
+            for tile in gamemap
+            if any(
+                self._has_feature(near, clue)
+                for near in gamemap.tiles_on_distance(
+                    tile.x, tile.y, clue.distance
+                )
+            )
+        )
+        if clue.inverted:
+            return frozenset(gamemap) - accepted
+        return accepted
+
+    def possible_clues(self, player: _Player, gamemap: Map) -> frozenset[Clue]:
+        cubes = {gamemap[x, y] for x, y in player.cubes}
+        disks = {gamemap[x, y] for x, y in player.disks}
+
+        return frozenset(
+            clue
+            for clue in _BASE_CLUES
+            if disks <= self.accepted_tiles(clue, gamemap)
+            and not cubes & self.accepted_tiles(clue, gamemap)
+        )
+
+    def tile_counts(
+        self,
+        gamemap: Map,
+        candidates: list[frozenset[Clue]],
+        algorithm: str | None = None,
+    ) -> tuple[dict[MapTile, int], int]:
+        self.strategy(candidates, algorithm)
+        counts: dict[MapTile, int] = {}
+        enumerated = 0
+
+        for combination in itertools.product(*candidates):
+            enumerated += 1
+            possible_tiles = functools.reduce(
+                lambda x, y: x & self.accepted_tiles(y, gamemap),
+                combination,
+                frozenset(gamemap),
+            )
+            if len(possible_tiles) == 1:
+                (tile,) = possible_tiles
+                counts[tile] = counts.get(tile, 0) + 1
+
+        return counts, enumerated
+
+
+class BitsetBackend(Backend):
+    """
+    Evaluates the clues as integer bitboards.
+    """
+
+    name = BITSET
+    searches = True
+
+    def possible_clues(self, player: _Player, gamemap: Map) -> frozenset[Clue]:
+        disk_mask = player.disks.mask
+        cube_mask = player.cubes.mask
+        possible_clues = set()
+
+        for clue in _BASE_CLUES:
+            # Clue is possible only if it accepts all disk locations and
+            # refuses all cube locations
+            accepted = clue.accepted_mask(gamemap)
+            if accepted & disk_mask == disk_mask and not accepted & cube_mask:
+                possible_clues.add(clue)
+
+        return frozenset(possible_clues)
+
+    def tile_counts(
+        self,
+        gamemap: Map,
+        candidates: list[frozenset[Clue]],
+        algorithm: str | None = None,
+    ) -> tuple[dict[MapTile, int], int]:
+        strategy = self.strategy(candidates, algorithm)
+        return distribution.STRATEGIES[strategy](gamemap, candidates)
+
+    def strategy(
+        self, candidates: list[frozenset[Clue]], algorithm: str | None = None
+    ) -> str:
+        if algorithm is not None:
+            if algorithm not in distribution.STRATEGIES:
+                raise ValueError(
+                    f"Algorithm has to be one of {distribution.ALGORITHMS}"
+                )
+            return algorithm
+        return distribution.select(
+            math.prod(len(clues) for clues in candidates)
+        )
+
+
+class NumpyBackend(Backend):
+    """
+    Evaluates the clues as rows of a clues x tiles boolean matrix.
+    """
+
+    name = NUMPY
+
+    def __init__(self) -> None:
+        import numpy  # noqa: PLC0415
+
+        self._np = numpy
+        self._rows = {clue: row for row, clue in enumerate(ORDERED_CLUES)}
+
+    def _vector(self, mask: int) -> "np.ndarray":
+        np = self._np
+        bits = np.frombuffer(
+            mask.to_bytes(MASK_BYTES, "little"), dtype=np.uint8
+        )
+        return np.asarray(
+            np.unpackbits(bits, count=BOARD_SIZE, bitorder="little"),
+            dtype=bool,
+        )
+
+    @functools.lru_cache(maxsize=32)
+    def matrix(self, gamemap: Map) -> "np.ndarray":
+        """
+        Returns:
+            Accepted tiles of ORDERED_CLUES, a row per clue
+        """
+
+        return self._np.stack(
+            [
+                self._vector(clue.accepted_mask(gamemap))
+                for clue in ORDERED_CLUES
+            ]
+        )
+
+    def _clue_rows(self, gamemap: Map, clues: Iterable[Clue]) -> "np.ndarray":
+        np = self._np
+        matrix = self.matrix(gamemap)
+        return np.stack(
+            [
+                matrix[self._rows[clue]]
+                if clue in self._rows
+                else self._vector(clue.accepted_mask(gamemap))
+                for clue in clues
+            ]
+        ).reshape(-1, BOARD_SIZE)
+
+    def possible_clues(self, player: _Player, gamemap: Map) -> frozenset[Clue]:
+        clues = sorted(_BASE_CLUES, key=lambda clue: self._rows[clue])
+        rows = self.matrix(gamemap)[[self._rows[clue] for clue in clues]]
+
+        disks = self._vector(player.disks.mask)
+        cubes = self._vector(player.cubes.mask)
+        possible = rows[:, disks].all(axis=1) & ~rows[:, cubes].any(axis=1)
+
+        return frozenset(clues[row] for row in self._np.flatnonzero(possible))
+
+    def tile_counts(
+        self,
+        gamemap: Map,
+        candidates: list[frozenset[Clue]],
+        algorithm: str | None = None,
+    ) -> tuple[dict[MapTile, int], int]:
+        np = self._np
+
+        self.strategy(candidates, algorithm)
+        if not all(candidates):
+            return {}, 0
+
+        # Distinct rows of each player with the number of clues having them,
+        # the smallest candidate sets first as in count_by_pruning
+        levels = []
+        for clues in candidates:
+            rows, weights = np.unique(
+                self._clue_rows(gamemap, clues), axis=0, return_counts=True
+            )
+            levels.append((rows, weights.astype(np.int64)))
+        levels.sort(key=lambda level: len(level[0]))
+
+        # Combinations of the players from each depth on keeping each tile,
+        # to count the completions of a singled out tile at once
+        completions = [np.ones(BOARD_SIZE, dtype=np.int64)]
+        for rows, weights in reversed(levels):
+            completions.insert(0, completions[0] * (weights @ rows))
+
+        tile_counts = np.zeros(BOARD_SIZE, dtype=np.int64)
+        intersections = 0
+
+        # Distinct intersections of the players so far, with the number of
+        # combinations giving them
+        remaining = np.ones((1, BOARD_SIZE), dtype=bool)
+        remaining_weight = np.ones(1, dtype=np.int64)
+
+        for depth, (rows, weights) in enumerate(levels):
+            wider_rows = []
+            wider_weights = []
+
+            # Chunks of the intersections keep the memory bounded
+            step = max(1, CHUNK_ROWS // len(rows))
+            for start in range(0, len(remaining), step):
+                narrowed = (
+                    remaining[start : start + step, None, :] & rows[None]
+                ).reshape(-1, BOARD_SIZE)
+                narrowed_weight = (
+                    remaining_weight[start : start + step, None]
+                    * weights[None]
+                ).reshape(-1)
+                intersections += len(narrowed)
+
+                sizes = narrowed.sum(axis=1)
+                singled_out = sizes == 1
+                tiles = narrowed[singled_out].argmax(axis=1)
+                np.add.at(
+                    tile_counts,
+                    tiles,
+                    narrowed_weight[singled_out]
+                    * completions[depth + 1][tiles],
+                )
+
+                # Intersections only shrink, empty ones have no solutions
+                wider = sizes > 1
+                wider_rows.append(np.packbits(narrowed[wider], axis=1))
+                wider_weights.append(narrowed_weight[wider])
+
+            if depth + 1 == len(levels):
+                break
+
+            # Merge the equal intersections of different combinations
+            packed, inverse = np.unique(
+                np.concatenate(wider_rows), axis=0, return_inverse=True
+            )
+            remaining = np.asarray(
+                np.unpackbits(packed, axis=1, count=BOARD_SIZE), dtype=bool
+            )
+            remaining_weight = np.zeros(len(packed), dtype=np.int64)
+            np.add.at(
+                remaining_weight,
+                inverse.reshape(-1),
+                np.concatenate(wider_weights),
+            )
+            if not len(remaining):
+                break
+
+        counts = {
+            gamemap._tile(int(index)): int(tile_counts[index])
+            for index in np.flatnonzero(tile_counts)
+        }
+        return counts, intersections
+
+
+BACKENDS: dict[str, type[Backend]] = {
+    ReferenceBackend.name: ReferenceBackend,
+    BitsetBackend.name: BitsetBackend,
+    NumpyBackend.name: NumpyBackend,
+}
+
+_instances: dict[str, Backend] = {}
+_active: Backend | None = None
+
+
+def get(name: str) -> Backend:
+    """
+    Args:
+        name: Name of the backend
+
+    Returns:
+        Shared instance of the backend
+    """
+
+    if name not in BACKENDS:
+        raise ValueError(f"Backend has to be one of {tuple(BACKENDS)}")
+    if name not in _instances:
+        _instances[name] = BACKENDS[name]()
+    return _instances[name]
+
+
+def available() -> list[str]:
+    """
+    Returns:
+        Names of the backends whose dependencies are installed
+    """
+
+    names = []
+    for name in BACKENDS:
+        try:
+            get(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def use(name: str) -> Backend:
+    """
+    Take a backend into use.
+
+    Args:
+        name: Name of the backend
+
+    Returns:
+        The active backend
+    """
+
+    global _active  # noqa: PLW0603
+
+    _active = get(name)
+    return _active
+
+
+def active() -> Backend:
+    """
+    Returns:
+        The backend of Player.possible_clues and Game.possible_tiles
+    """
+
+    if _active is None:
+        name = os.environ.get(_BACKEND_ENV) or DEFAULT_BACKEND
+        try:
+            return use(name)
+        except ImportError:
+            # Optional dependencies fall back to the pure Python default
+            warnings.warn(
+                f"Backend {name} is not installed, using {DEFAULT_BACKEND}",
+                RuntimeWarning,
+                stacklevel=2,
+            )
+            return use(DEFAULT_BACKEND)
+    return _active
+
+
+__all__ = [
+    "BACKENDS",
+    "BITSET",
+    "DEFAULT_BACKEND",
+    "NUMPY",
+    "REFERENCE",
+    "Backend",
+    "BitsetBackend",
+    "NumpyBackend",
+    "ReferenceBackend",
+    "active",
+    "available",
+    "get",
+    "use",
+]
@@ -0,0 +1,359 @@
+"""
+Benchmarks of the core inference paths on canonical scenarios.
+
+Scenarios are 3, 4 and 5 player games at the opening, mid-game and
+near-solved positions, on the map of the test suite and on random maps.
+Placements come from simulated games, and the first seat is the acting
+player with a known clue.
+
+    python -m cryptidsolver.benchmark --output results.json
+    python -m cryptidsolver.benchmark --compare baseline.json
+
+With --compare the results are checked against a stored run, and the
+command fails if a benchmark got slower than the threshold allows.
+"""
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from collections.abc import Callable
+from typing import NamedTuple
+
+from cryptidsolver import infer, simulate
+from cryptidsolver.bitboard import index_coordinates, iter_indices
+from cryptidsolver.clue import Clue
+from cryptidsolver.constant.clues import ORDERED_CLUES, THREE_FROM_BLACK
+from cryptidsolver.engine import plan_question
+from cryptidsolver.game import Game
+from cryptidsolver.gamemap import Map
+from cryptidsolver.solutions import is_irredundant
+from cryptidsolver.structure import Structure
+
+TEST_MAP = ["3N", "1S", "5S", "4S", "2N", "6S"]
+TEST_STRUCTURES = (
+    ("green", "stone", 12, 2),
+    ("green", "shack", 7, 3),
+    ("white", "stone", 8, 6),
+    ("white", "shack", 10, 8),
+    ("blue", "stone", 9, 1),
+    ("blue", "shack", 7, 4),
+)
+
+STAGES = ("opening", "mid", "near-solved")
+_N_RANDOM_MAPS = 2
+# The question planner evaluates every question of every player, so it is
+# only timed on the smallest games
+_QUESTION_PLAYERS = 3
+# Clue samples tried for an irredundant set on the test-suite map
+_CLUE_ATTEMPTS = 2000
+
+_TARGET_SECONDS = 0.2
+_REPEAT = 5
+_THRESHOLD = 0.25
+
+
+class Scenario(NamedTuple):
+    name: str
+    n_players: int
+    stage: str
+    setup: simulate.Setup
+    moves: tuple[simulate.Move, ...]
+
+    def game(self) -> Game:
+        """
+        Returns:
+            Fresh game at the position of the scenario
+        """
+
+        return simulate.position(self.setup, self.moves)
+
+
+class Benchmark(NamedTuple):
+    name: str
+    prepare: Callable[[Scenario], Callable[[], object]]
+    # Skipped on scenarios where a single call takes tens of seconds
+    applies: Callable[[Scenario], bool] = lambda scenario: True
+
+
+def _test_map_setup(rng: random.Random, n_players: int) -> simulate.Setup:
+    structures = tuple(Structure(*structure) for structure in TEST_STRUCTURES)
+    gamemap = Map(TEST_MAP, list(structures))
+    base_clues = [
+        clue for clue in ORDERED_CLUES if clue.accepted_mask(gamemap)
+    ]
+
+    for _ in range(_CLUE_ATTEMPTS):
+        clues = rng.sample(base_clues, n_players)
+        if is_irredundant([clue.accepted_mask(gamemap) for clue in clues]):
+            return simulate.Setup(tuple(TEST_MAP), structures, tuple(clues))
+
+    raise RuntimeError(
+        f"No clues for {n_players} players on the test-suite map found in "
+        f"{_CLUE_ATTEMPTS} samples"
+    )
+
+
+def scenarios(seed: int = 0) -> list[Scenario]:
+    """
+    Build the canonical scenarios.
+
+    Args:
+        seed: Seed of the random maps and the simulated games
+
+    Returns:
+        Scenarios for every map, number of players and stage
+    """
+
+    rng = random.Random(seed)
+    found = []
+
+    for n_players in (3, 4, 5):
+        setups = [("test-map", _test_map_setup(rng, n_players))]
+        setups += [
+            (f"random-{num}", simulate.deal(rng, n_players))
+            for num in range(_N_RANDOM_MAPS)
+        ]
+
+        for map_name, setup in setups:
+            moves = simulate.play(
+                setup,
+                [simulate.NarrowingStrategy() for _ in range(n_players)],
+                rng,
+            ).moves
+            prefixes = {
+                "opening": (),
+                "mid": moves[: len(moves) // 2],
+                # Before the winning search
+                "near-solved": moves[: max(len(moves) - n_players, 0)],
+            }
+
+            for stage in STAGES:
+                found.append(
+                    Scenario(
+                        f"{map_name}/{n_players}p/{stage}",
+                        n_players,
+                        stage,
+                        setup,
+                        prefixes[stage],
+                    )
+                )
+
+    return found
+
+
+def _accepted_tiles(scenario: Scenario) -> Callable[[], object]:
+    gamemap = scenario.game().map
+    # Scenarios are played without black structures
+    clues = [clue for clue in ORDERED_CLUES if clue != THREE_FROM_BLACK]
+
+    def run() -> None:
+        # Cold caches, as on a fresh map
+        Clue.accepted_tiles.cache_clear()
+        gamemap._clue_masks.clear()
+        for clue in clues:
+            clue.accepted_tiles(gamemap)
+
+    return run
+
+
+def _possible_clues(scenario: Scenario) -> Callable[[], object]:
+    game = scenario.game()
+    unknown = [player for player in game.players if player.clue is None]
+
+    def run() -> None:
+        for player in unknown:
+            player.possible_clues(game.map)
+
+    return run
+
+
+def _possible_tiles(scenario: Scenario) -> Callable[[], object]:
+    game = scenario.game()
+    return lambda: game.possible_tiles().counts()
+
+
+def _infer(scenario: Scenario) -> Callable[[], object]:
+    game = scenario.game()
+    player = game.players[1]
+    tiles = [
+        index_coordinates(index) for index in iter_indices(game.free_tiles())
+    ]
+
+    def run() -> None:
+        for tile in tiles:
+            infer.possible_clues_after_cube_placement(game.map, player, tile)
+            infer.possible_clues_after_disk_placement(game.map, player, tile)
+
+    return run
+
+
+def _question(scenario: Scenario) -> Callable[[], object]:
+    game = scenario.game()
+    return lambda: plan_question(game)
+
+
+BENCHMARKS = (
+    Benchmark("Clue.accepted_tiles", _accepted_tiles),
+    Benchmark("Player.possible_clues", _possible_clues),
+    Benchmark("Game.possible_tiles", _possible_tiles),
+    Benchmark("infer.what_if", _infer),
+    Benchmark(
+        "question planner",
+        _question,
+        lambda scenario: scenario.n_players == _QUESTION_PLAYERS,
+    ),
+)
+
+
+def measure(
+    function: Callable[[], object], repeat: int = _REPEAT
+) -> dict[str, float | int]:
+    """
+    Time a function, calling it enough times per round to last about
+    _TARGET_SECONDS.
+
+    Args:
+        function: Function to time
+        repeat: Number of rounds
+
+    Returns:
+        Median and minimum seconds per call, and calls per round
+    """
+
+    started = time.perf_counter()
+    function()
+    single = time.perf_counter() - started
+    number = max(1, int(_TARGET_SECONDS / single)) if single else 1000
+
+    rounds = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            function()
+        rounds.append((time.perf_counter() - started) / number)
+
+    return {
+        "median": statistics.median(rounds),
+        "min": min(rounds),
+        "number": number,
+    }
+
+
+def run(seed: int = 0, pattern: str = "", repeat: int = _REPEAT) -> dict:
+    """
+    Run the benchmarks.
+
+    Args:
+        seed: Seed of the scenarios
+        pattern: Run only the benchmarks whose 'benchmark/scenario' name
+            contains the pattern
+        repeat: Number of timing rounds
+
+    Returns:
+        Metadata of the run, and timings by 'benchmark/scenario' name
+    """
+
+    results = {}
+
+    for scenario in scenarios(seed):
+        for benchmark in BENCHMARKS:
+            name = f"{benchmark.name}/{scenario.name}"
+            if pattern not in name or not benchmark.applies(scenario):
+                continue
+
+            results[name] = measure(benchmark.prepare(scenario), repeat)
+
+    return {
+        "meta": {
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "time": time.time(),
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def compare(
+    current: dict, baseline: dict, threshold: float = _THRESHOLD
+) -> list[dict]:
+    """
+    Compare the median timings of two runs.
+
+    Args:
+        current: Results of run()
+        baseline: Stored results of an earlier run()
+        threshold: Allowed relative slowdown, e.g. 0.25 for 25 %
+
+    Returns:
+        Ratio of the medians of each benchmark in both runs, and whether it
+        is a regression
+    """
+
+    comparison = []
+
+    for name, timing in current["results"].items():
+        if name not in baseline["results"]:
+            continue
+
+        ratio = timing["median"] / baseline["results"][name]["median"]
+        comparison.append(
+            {
+                "benchmark": name,
+                "baseline": baseline["results"][name]["median"],
+                "current": timing["median"],
+                "ratio": ratio,
+                "regression": ratio > 1 + threshold,
+            }
+        )
+
+    return comparison
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the core inference paths"
+    )
+    parser.add_argument("--output", type=str, help="File for the results")
+    parser.add_argument(
+        "--compare", type=str, help="Results of a baseline run"
+    )
+    parser.add_argument("--threshold", type=float, default=_THRESHOLD)
+    parser.add_argument(
+        "--filter",
+        type=str,
+        default="",
+        help="Run only benchmarks whose name contains this",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=_REPEAT)
+    args = parser.parse_args()
+
+    results = run(args.seed, args.filter, args.repeat)
+
+    if args.output is not None:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(results, handle, indent=2)
+
+    if args.compare is None:
+        for name, timing in results["results"].items():
+            print(f"{timing['median'] * 1e3:12.3f} ms  {name}")
+        sys.exit()
+
+    with open(args.compare, encoding="utf-8") as handle:
+        baseline = json.load(handle)
+
+    regressions = 0
+    for row in compare(results, baseline, args.threshold):
+        flag = "REGRESSION" if row["regression"] else ""
+        regressions += row["regression"]
+        print(
+            f"{row['baseline'] * 1e3:12.3f} ms {row['current'] * 1e3:12.3f} ms"
+            f" {row['ratio']:6.2f}x  {row['benchmark']} {flag}"
+        )
+
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,127 @@
+from collections.abc import Generator
+
+from cryptidsolver.constant.limits import _MAP_MAX_X, _MAP_MAX_Y
+
+# Tiles are numbered column by column, starting from the top-left corner.
+# Tile x,y maps to bit (x - 1) * _MAP_MAX_Y + (y - 1).
+BOARD_SIZE = _MAP_MAX_X * _MAP_MAX_Y
+FULL_BOARD = (1 << BOARD_SIZE) - 1
+MASK_BYTES = (BOARD_SIZE + 7) // 8
+
+
+def tile_index(x: int, y: int) -> int:
+    """
+    Returns the bit index of tile x,y.
+
+    Args:
+        x: x coordinate - left-most column being 1
+        y: y coordinate - top-most row being 1
+
+    Returns:
+        Index of the tile on the board
+    """
+    return (x - 1) * _MAP_MAX_Y + (y - 1)
+
+
+def index_coordinates(index: int) -> tuple[int, int]:
+    """
+    Returns the x,y coordinates of a bit index.
+
+    Args:
+        index: Index of the tile on the board
+
+    Returns:
+        Coordinates of the tile, strictly positive
+    """
+    return (index // _MAP_MAX_Y + 1, index % _MAP_MAX_Y + 1)
+
+
+def coordinates_mask(coordinates) -> int:
+    """
+    Returns the bitboard with the given coordinates set.
+
+    Args:
+        coordinates: Iterable of x,y pairs
+
+    Returns:
+        Bitboard with a bit set for each coordinate pair
+    """
+    mask = 0
+    for x, y in coordinates:
+        mask |= 1 << ((x - 1) * _MAP_MAX_Y + (y - 1))
+    return mask
+
+
+def iter_indices(mask: int) -> Generator[int, None, None]:
+    """
+    Yields the indices of the set bits, lowest first.
+
+    Args:
+        mask: Bitboard
+
+    Returns:
+        Indices of the set bits
+    """
+    while mask:
+        lowest = mask & -mask
+        yield lowest.bit_length() - 1
+        mask ^= lowest
+
+
+def _rows_mask(row: int) -> int:
+    mask = 0
+    for x in range(1, _MAP_MAX_X + 1):
+        mask |= 1 << tile_index(x, row)
+    return mask
+
+
+def _columns_mask(parity: int) -> int:
+    mask = 0
+    for x in range(1, _MAP_MAX_X + 1):
+        if x % 2 == parity:
+            for y in range(1, _MAP_MAX_Y + 1):
+                mask |= 1 << tile_index(x, y)
+    return mask
+
+
+# Edge masks stop shifts from wrapping over to the neighbouring column
+_NOT_TOP_ROW = FULL_BOARD ^ _rows_mask(1)
+_NOT_BOTTOM_ROW = FULL_BOARD ^ _rows_mask(_MAP_MAX_Y)
+_ODD_COLUMNS = _columns_mask(1)
+_EVEN_COLUMNS = _columns_mask(0)
+
+
+def dilate(mask: int, distance: int = 1) -> int:
+    """
+    Grow the mask by distance steps, i.e. set every tile within distance
+    of a set tile. Follows the neighbourhood of Map.neighbouring_coordinates:
+    tiles on odd columns neighbour rows y-1 and y on the adjacent columns,
+    tiles on even columns rows y and y+1.
+
+    Args:
+        mask: Bitboard
+        distance: Number of steps to grow
+
+    Returns:
+        Dilated bitboard
+    """
+
+    for _ in range(distance):
+        # Previous and next row on the same column
+        vertical = ((mask & _NOT_TOP_ROW) >> 1) | (
+            (mask & _NOT_BOTTOM_ROW) << 1
+        )
+        # Rows reached on the adjacent columns, before the column shift
+        sideways = (
+            mask
+            | ((mask & _ODD_COLUMNS & _NOT_TOP_ROW) >> 1)
+            | ((mask & _EVEN_COLUMNS & _NOT_BOTTOM_ROW) << 1)
+        )
+        mask = (
+            mask
+            | vertical
+            | (sideways << _MAP_MAX_Y)
+            | (sideways >> _MAP_MAX_Y)
+        ) & FULL_BOARD
+
+    return mask
@@ -0,0 +1,292 @@
+"""
+Opt-in persistent cache of data derived from a gamemap.
+
+Entries are keyed by the map fingerprint, the kind of the data and the
+format version, and kept in a single SQLite file. Writes are transactional,
+so readers never see partial entries, and the database runs in WAL mode to
+let several worker processes read while one of them writes. The total size
+of the payloads is capped by evicting the least recently used entries.
+
+Enable with enable(PATH) or by pointing the CRYPTIDSOLVER_CACHE environment
+variable to the database file.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+from cryptidsolver import counters
+from cryptidsolver.constant.clues import ORDERED_CLUES
+from cryptidsolver.gamemap import Map
+
+# Bump when the layout of any payload changes. Older entries are ignored.
+FORMAT_VERSION = 1
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+_CACHE_ENV = "CRYPTIDSOLVER_CACHE"
+_BUSY_TIMEOUT_MS = 5000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    fingerprint TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    payload BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    last_access REAL NOT NULL,
+    PRIMARY KEY (fingerprint, kind, version)
+)
+"""
+
+
+class PersistentCache:
+    """
+    SQLite backed store of derived per-map data.
+    """
+
+    def __init__(
+        self, path: str | os.PathLike, max_bytes: int = DEFAULT_MAX_BYTES
+    ) -> None:
+        """
+        Open or create a cache.
+
+        Args:
+            path: Location of the database file.
+            max_bytes: Cap for the total payload size.
+        """
+
+        self.path = os.fspath(path)
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._connection: sqlite3.Connection | None = None
+        self._pid = -1
+
+    def _connect(self) -> sqlite3.Connection:
+        # Connections must not cross a fork, so every process opens its own.
+        if self._connection is None or self._pid != os.getpid():
+            connection = sqlite3.connect(
+                self.path,
+                timeout=_BUSY_TIMEOUT_MS / 1000,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            connection.execute(f"PRAGMA busy_timeout = {_BUSY_TIMEOUT_MS}")
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute(_SCHEMA)
+
+            self._connection = connection
+            self._pid = os.getpid()
+
+        return self._connection
+
+    def get(self, fingerprint: str, kind: str) -> bytes | None:
+        """
+        Fetch an entry and mark it recently used.
+
+        Args:
+            fingerprint: Map fingerprint
+            kind: Kind of the derived data
+
+        Returns:
+            Stored payload, or None when missing
+        """
+
+        with self._lock:
+            connection = self._connect()
+            row = connection.execute(
+                "SELECT payload FROM entries "
+                "WHERE fingerprint = ? AND kind = ? AND version = ?",
+                (fingerprint, kind, FORMAT_VERSION),
+            ).fetchone()
+
+            if row is None:
+                counters.increment(counters.PERSISTENT_MISSES)
+                return None
+
+            counters.increment(counters.PERSISTENT_HITS)
+
+            try:
+                connection.execute(
+                    "UPDATE entries SET last_access = ? "
+                    "WHERE fingerprint = ? AND kind = ? AND version = ?",
+                    (time.time(), fingerprint, kind, FORMAT_VERSION),
+                )
+            except sqlite3.OperationalError:
+                # Recency is best effort, a busy database must not fail reads
+                pass
+
+            return bytes(row[0])
+
+    def put(self, fingerprint: str, kind: str, payload: bytes) -> None:
+        """
+        Store an entry, evicting least recently used entries over the cap.
+
+        Args:
+            fingerprint: Map fingerprint
+            kind: Kind of the derived data
+            payload: Data to store
+        """
+
+        with self._lock:
+            connection = self._connect()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.execute(
+                    "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        fingerprint,
+                        kind,
+                        FORMAT_VERSION,
+                        payload,
+                        len(payload),
+                        time.time(),
+                    ),
+                )
+                self._evict(connection)
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+
+    def _evict(self, connection: sqlite3.Connection) -> None:
+        (total,) = connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+
+        if total <= self.max_bytes:
+            return
+
+        rows = connection.execute(
+            "SELECT rowid, size FROM entries ORDER BY last_access"
+        ).fetchall()
+
+        evicted = []
+        for rowid, size in rows:
+            if total <= self.max_bytes:
+                break
+            evicted.append((rowid,))
+            total -= size
+
+        connection.executemany("DELETE FROM entries WHERE rowid = ?", evicted)
+
+    def size(self) -> int:
+        """
+        Returns:
+            Total size of the stored payloads
+        """
+
+        with self._lock:
+            (total,) = (
+                self._connect()
+                .execute("SELECT COALESCE(SUM(size), 0) FROM entries")
+                .fetchone()
+            )
+            return total
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None and self._pid == os.getpid():
+                self._connection.close()
+            self._connection = None
+
+
+_cache: PersistentCache | None = None
+_cache_configured = False
+
+
+def enable(
+    path: str | os.PathLike, max_bytes: int = DEFAULT_MAX_BYTES
+) -> PersistentCache:
+    """
+    Take the persistent cache into use.
+
+    Args:
+        path: Location of the database file.
+        max_bytes: Cap for the total payload size.
+
+    Returns:
+        The enabled cache
+    """
+
+    global _cache, _cache_configured  # noqa: PLW0603
+
+    disable()
+    _cache = PersistentCache(path, max_bytes)
+    _cache_configured = True
+
+    return _cache
+
+
+def disable() -> None:
+    global _cache, _cache_configured  # noqa: PLW0603
+
+    if _cache is not None:
+        _cache.close()
+
+    _cache = None
+    _cache_configured = True
+
+
+def active() -> PersistentCache | None:
+    """
+    Returns:
+        The enabled cache, or None when caching is disabled
+    """
+
+    if not _cache_configured:
+        path = os.environ.get(_CACHE_ENV)
+        if path:
+            enable(path)
+        else:
+            disable()
+
+    return _cache
+
+
+def _encode_masks(masks: dict[tuple[str, int, frozenset[str]], int]) -> bytes:
+    lines = [
+        f"{clue_type} {distance} {','.join(sorted(distance_from))} {mask:x}"
+        for (clue_type, distance, distance_from), mask in masks.items()
+    ]
+    return "\n".join(lines).encode()
+
+
+def _decode_masks(
+    payload: bytes,
+) -> dict[tuple[str, int, frozenset[str]], int]:
+    masks = {}
+    for line in payload.decode().splitlines():
+        clue_type, distance, distance_from, mask = line.split(" ")
+        key = (clue_type, int(distance), frozenset(distance_from.split(",")))
+        masks[key] = int(mask, 16)
+    return masks
+
+
+def warm_clue_masks(gamemap: Map) -> None:
+    """
+    Load the clue masks of the gamemap from the persistent cache. On a miss
+    the masks of every clue are computed and stored. No-op when the cache
+    is disabled.
+
+    Args:
+        gamemap: Gamemap to warm
+    """
+
+    store = active()
+    if store is None:
+        return
+
+    payload = store.get(gamemap.fingerprint, "clue_masks")
+    if payload is not None:
+        gamemap._clue_masks.update(_decode_masks(payload))
+        return
+
+    for clue in ORDERED_CLUES:
+        clue.accepted_mask(gamemap)
+
+    store.put(
+        gamemap.fingerprint, "clue_masks", _encode_masks(gamemap._clue_masks)
+    )
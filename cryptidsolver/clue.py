@@ -1,6 +1,9 @@
 from functools import lru_cache
 
+from cryptidsolver import counters
+from cryptidsolver.bitboard import FULL_BOARD, dilate
 from cryptidsolver.gamemap import Map
+from cryptidsolver.layout import terrain_mask
 from cryptidsolver.tile import MapTile
 
 
@@ -80,41 +83,47 @@ class Clue:
             Tiles that are possible according to the clue
         """
 
-        accepted_tiles = set()
-
-        for tile in gamemap:
-            x, y = (tile.x, tile.y)
-            distanced_tiles = gamemap.tiles_on_distance(x, y, self.distance)
-
-            if self.inverted:
-                if all(
-                    self.__tile_confers_to_clue(clue_distance_from_tile)
-                    for clue_distance_from_tile in distanced_tiles
-                ):
-                    accepted_tiles.add(tile)
-            elif any(
-                self.__tile_confers_to_clue(clue_distance_from_tile)
-                for clue_distance_from_tile in distanced_tiles
-            ):
-                accepted_tiles.add(tile)
+        counters.increment(counters.TILE_SETS)
+        accepted_tiles = gamemap.tiles_from_mask(self.accepted_mask(gamemap))
 
         assert len(accepted_tiles) != 0, (
             "Clue should always accept at least a single tile"
         )
 
-        return frozenset(accepted_tiles)
-
-    def __tile_confers_to_clue(self, tile: MapTile) -> bool:
-        if self.clue_type == "biome":
-            if tile.biome in self.distance_from:
-                return not self.inverted
-        elif self.clue_type == "animal":
-            if tile.animal in self.distance_from:
-                return not self.inverted
-        elif tile.structure is not None:
-            if tile.structure.color in self.distance_from:
-                return not self.inverted
-            if tile.structure.shape in self.distance_from:
-                return not self.inverted
-
-        return self.inverted
+        return accepted_tiles
+
+    def accepted_mask(self, gamemap: Map) -> int:
+        """
+        Infer which tiles are possible for given clue, as a bitboard.
+        Masks are stored on the gamemap, so they are shared by every
+        instance of the same clue.
+
+        Args:
+            gamemap: Current gamemap
+
+        Returns:
+            Bitboard of the tiles possible according to the clue
+        """
+
+        counters.increment(counters.CLUE_EVALUATIONS)
+        key = (self.clue_type, self.distance, self.distance_from)
+        mask = gamemap._clue_masks.get(key)
+
+        if mask is None:
+            counters.increment(counters.CLUE_MASK_MISSES)
+            mask = terrain_mask(
+                gamemap, self.clue_type, self.distance, self.distance_from
+            )
+            if mask is None:
+                mask = dilate(
+                    gamemap.feature_mask(self.clue_type, self.distance_from),
+                    self.distance,
+                )
+            gamemap._clue_masks[key] = mask
+        else:
+            counters.increment(counters.CLUE_MASK_HITS)
+
+        if self.inverted:
+            return mask ^ FULL_BOARD
+
+        return mask
@@ -35,7 +35,8 @@ THREE_FROM_BLACK = Clue(3, {"black"}, clue_type="structure")
 # TODO Refactor to contain normal clues and inverted clues differently
 # This will remove the need to remove THREE_FROM_BLACK in multiple locations
 
-CLUE_COLLECTION = {
+# Fixed order of the clues, e.g. for serialization. Do not reorder.
+ORDERED_CLUES = (
     FOREST_OR_DESERT,
     FOREST_OR_WATER,
     FOREST_OR_SWAMP,
@@ -60,7 +61,9 @@ CLUE_COLLECTION = {
     THREE_FROM_WHITE,
     THREE_FROM_GREEN,
     THREE_FROM_BLACK,
-}
+)
+
+CLUE_COLLECTION = set(ORDERED_CLUES)
 
 __CLUE_LOOKUP = {
     "alpha": {
@@ -0,0 +1,89 @@
+"""
+Deterministic counters of the work done by the solver.
+
+Unlike timings, the counts do not depend on the host, so tests can bound
+them to catch algorithmic regressions:
+
+    with counters.delta() as counts:
+        game.possible_tiles().counts()
+    counts[counters.COMBINATIONS]
+
+The counters are always on, and kept cheap by incrementing them outside of
+the innermost loops. They are shared by the threads of a process, e.g. those
+of the solver server. Increments take no lock, as they sit on the hot paths:
+a thread switch within one may lose a count, which is acceptable for
+diagnostics. Snapshots and resets are locked against each other.
+"""
+
+import threading
+from collections import Counter
+from collections.abc import Generator
+from contextlib import contextmanager
+
+# Calls to Clue.accepted_mask
+CLUE_EVALUATIONS = "clue.evaluations"
+# Clue masks found on, or computed and stored to, the gamemap
+CLUE_MASK_HITS = "clue_masks.hits"
+CLUE_MASK_MISSES = "clue_masks.misses"
+# Tile sets built by Clue.accepted_tiles, i.e. misses of its lru_cache
+TILE_SETS = "clue.tile_sets"
+# Tiles returned by Map.tiles_on_distance
+TILES_VISITED = "tiles_on_distance.visited"
+# Clue combinations enumerated by Game.possible_tiles
+COMBINATIONS = "possible_tiles.combinations"
+# Clue combinations drawn by the Monte Carlo estimates
+SAMPLES = "possible_tiles.samples"
+# Lookups of the persistent cache
+PERSISTENT_HITS = "persistent_cache.hits"
+PERSISTENT_MISSES = "persistent_cache.misses"
+
+_lock = threading.Lock()
+_counts: Counter[str] = Counter()
+
+
+def increment(name: str, amount: int = 1) -> None:
+    """
+    Args:
+        name: Name of the counter
+        amount: Amount of work done
+    """
+    _counts[name] += amount
+
+
+def snapshot() -> dict[str, int]:
+    """
+    Returns:
+        Counts since the start of the process or the latest reset
+    """
+    with _lock:
+        return dict(_counts)
+
+
+def value(name: str) -> int:
+    """
+    Returns:
+        Count of a single counter
+    """
+    return _counts[name]
+
+
+def reset() -> None:
+    with _lock:
+        _counts.clear()
+
+
+@contextmanager
+def delta() -> Generator[dict[str, int], None, None]:
+    """
+    Count the work done within the block, without resetting the counters.
+
+    Returns:
+        Dictionary filled with the counts of the block when it exits
+    """
+
+    before = Counter(snapshot())
+    counts: dict[str, int] = {}
+    try:
+        yield counts
+    finally:
+        counts.update(Counter(snapshot()) - before)
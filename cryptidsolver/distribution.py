@@ -0,0 +1,366 @@
+"""
+Strategies for counting the clue combinations that single out each tile.
+
+Game.possible_tiles estimates the size of the combination space from the
+number of candidate clues of each player, and dispatches to the cheaper
+strategy:
+
+- product: enumerates every combination with itertools.product and
+  intersects the accepted-tile bitboards of its clues. Has no setup cost,
+  so it is the fastest on small spaces.
+- pruning: intersects the accepted-tile bitboards player by player,
+  merging clues with equal masks and pruning empty intersections. Once a
+  single tile remains, its completions are counted without enumerating
+  them.
+
+The crossover between the strategies is measured on the host with
+calibrate(), and force() overrides the selection:
+
+    python -m cryptidsolver.distribution
+"""
+
+import argparse
+import functools
+import itertools
+import operator
+import random
+import time
+from collections.abc import Callable, Iterator
+
+from cryptidsolver.bitboard import FULL_BOARD
+from cryptidsolver.clue import Clue
+from cryptidsolver.constant.clues import CLUE_COLLECTION, THREE_FROM_BLACK
+from cryptidsolver.gamemap import Map
+from cryptidsolver.structure import Structure
+from cryptidsolver.tile import MapTile
+
+PRODUCT = "product"
+PRUNING = "pruning"
+ALGORITHMS = (PRODUCT, PRUNING)
+
+# Combination space above which pruning is faster. Timing both strategies
+# on 400 random candidate sets of four player games, one clue known, the
+# median product time was 0.84-0.99 of the pruning time below 16
+# combinations, 1.00 at 16 and 1.03-1.69 above. calibrate() remeasures it
+# on the host, more coarsely.
+DEFAULT_CROSSOVER = 16
+
+_crossover = DEFAULT_CROSSOVER
+_forced: str | None = None
+
+_CALIBRATION_MAP = ["3N", "1S", "5S", "4S", "2N", "6S"]
+_CALIBRATION_STRUCTURES = [
+    Structure("green", "stone", 12, 2),
+    Structure("green", "shack", 7, 3),
+    Structure("white", "stone", 8, 6),
+    Structure("white", "shack", 10, 8),
+    Structure("blue", "stone", 9, 1),
+    Structure("blue", "shack", 7, 4),
+]
+_CALIBRATION_MAX_CANDIDATES = 8
+_CALIBRATION_SECONDS = 0.05
+
+
+def select(n_combinations: int) -> str:
+    """
+    Pick the strategy for a combination space.
+
+    Args:
+        n_combinations: Product of the candidate clue counts of the players
+
+    Returns:
+        Name of the strategy
+    """
+
+    if _forced is not None:
+        return _forced
+    return PRODUCT if n_combinations <= _crossover else PRUNING
+
+
+def force(algorithm: str | None) -> None:
+    """
+    Use one strategy regardless of the combination space.
+
+    Args:
+        algorithm: Name of the strategy, or None to select automatically
+    """
+
+    global _forced  # noqa: PLW0603
+
+    if algorithm is not None and algorithm not in ALGORITHMS:
+        raise ValueError(f"Algorithm has to be one of {ALGORITHMS}")
+    _forced = algorithm
+
+
+def crossover() -> int:
+    """
+    Returns:
+        Combination space above which pruning is selected
+    """
+    return _crossover
+
+
+def count_by_product(
+    gamemap: Map, candidates: list[frozenset[Clue]]
+) -> tuple[dict[MapTile, int], int]:
+    """
+    Count the combinations singling out each tile by enumerating them.
+
+    Args:
+        gamemap: Current gamemap
+        candidates: Possible clues of each player
+
+    Returns:
+        Number of combinations by the tile they single out, and the number
+        of combinations enumerated
+    """
+
+    masks = [
+        [clue.accepted_mask(gamemap) for clue in clues] for clues in candidates
+    ]
+    counts_by_index: dict[int, int] = {}
+    enumerated = 0
+
+    for combination in itertools.product(*masks):
+        enumerated += 1
+        remaining = functools.reduce(operator.and_, combination, FULL_BOARD)
+        # Exactly one bit left
+        if remaining and remaining & (remaining - 1) == 0:
+            index = remaining.bit_length() - 1
+            counts_by_index[index] = counts_by_index.get(index, 0) + 1
+
+    counts = {
+        gamemap._tile(index): counts_by_index[index]
+        for index in sorted(counts_by_index)
+    }
+    return counts, enumerated
+
+
+class PruningSearch:
+    """
+    Search of the tiles singled out by the clue combinations, intersecting
+    bitboards player by player and pruning the intersections that cannot
+    single out a tile. Iterating yields the tiles as they are found, so a
+    caller may stop as soon as it knows enough.
+    """
+
+    __slots__ = ("intersections", "levels")
+
+    def __init__(
+        self,
+        gamemap: Map,
+        candidates: list[frozenset[Clue]],
+        containing: int = 0,
+    ) -> None:
+        """
+        Args:
+            gamemap: Current gamemap
+            candidates: Possible clues of each player
+            containing: Bitboard of tiles every combination has to accept,
+                e.g. a single tile to search the combinations singling it
+                out
+        """
+
+        # Distinct masks of each player with the number of clues having
+        # them. The order of the players does not change the counts, and
+        # the smallest candidate sets narrow the intersections the most.
+        self.levels: list[list[tuple[int, int]]] = []
+        for clues in candidates:
+            weights: dict[int, int] = {}
+            for clue in clues:
+                mask = clue.accepted_mask(gamemap)
+                if mask & containing == containing:
+                    weights[mask] = weights.get(mask, 0) + 1
+            self.levels.append(list(weights.items()))
+        self.levels.sort(key=len)
+
+        # Intersections made so far, counted a level at a time
+        self.intersections = 0
+
+    def _completions(self, tile: int, depth: int) -> int:
+        # Combinations of the remaining players keeping the tile
+        total = 1
+        for level in self.levels[depth:]:
+            total *= sum(weight for mask, weight in level if mask & tile)
+            if not total:
+                break
+        return total
+
+    def _extend(
+        self, depth: int, remaining: int, weight: int
+    ) -> Iterator[tuple[int, int]]:
+        level = self.levels[depth]
+        self.intersections += len(level)
+        for mask, mask_weight in level:
+            narrowed = remaining & mask
+            # Intersections only shrink, an empty one has no solutions
+            if not narrowed:
+                continue
+
+            if narrowed & (narrowed - 1) == 0:
+                n = (
+                    weight
+                    * mask_weight
+                    * self._completions(narrowed, depth + 1)
+                )
+                if n:
+                    yield narrowed.bit_length() - 1, n
+            elif depth + 1 < len(self.levels):
+                yield from self._extend(
+                    depth + 1, narrowed, weight * mask_weight
+                )
+
+    def __iter__(self) -> Iterator[tuple[int, int]]:
+        """
+        Yields:
+            Index of a singled out tile and the number of combinations
+            found singling it out. A tile may be yielded several times.
+        """
+
+        if self.levels:
+            yield from self._extend(0, FULL_BOARD, 1)
+
+
+def count_by_pruning(
+    gamemap: Map, candidates: list[frozenset[Clue]]
+) -> tuple[dict[MapTile, int], int]:
+    """
+    Count the combinations singling out each tile by intersecting bitboards,
+    pruning the intersections that cannot single out a tile.
+
+    Args:
+        gamemap: Current gamemap
+        candidates: Possible clues of each player
+
+    Returns:
+        Number of combinations by the tile they single out, and the number
+        of intersections made
+    """
+
+    search = PruningSearch(gamemap, candidates)
+    counts_by_index: dict[int, int] = {}
+    for index, n in search:
+        counts_by_index[index] = counts_by_index.get(index, 0) + n
+
+    counts = {
+        gamemap._tile(index): counts_by_index[index]
+        for index in sorted(counts_by_index)
+    }
+    return counts, search.intersections
+
+
+def iter_solutions(
+    gamemap: Map, candidates: list[frozenset[Clue]]
+) -> Iterator[tuple[tuple[Clue, ...], int]]:
+    """
+    Generate the clue combinations singling out a tile, as they are found.
+    The bitboards are intersected player by player as in PruningSearch, but
+    every combination is yielded, so the combinations of each tile add up
+    to its count. Memory does not grow with the combination space.
+
+    Args:
+        gamemap: Current gamemap
+        candidates: Possible clues of each player
+
+    Yields:
+        Clue of each player, in the order of the candidates, and the index
+        of the tile they single out
+    """
+
+    # Clues of each player grouped by their mask, the smallest candidate
+    # sets first. Clues are sorted to yield in the same order every run.
+    levels = []
+    for seat, clues in enumerate(candidates):
+        groups: dict[int, list[Clue]] = {}
+        for clue in sorted(clues, key=repr):
+            groups.setdefault(clue.accepted_mask(gamemap), []).append(clue)
+        levels.append((seat, list(groups.items())))
+    levels.sort(key=lambda level: len(level[1]))
+
+    # Depth of the clue of each player
+    by_seat = sorted(range(len(levels)), key=lambda depth: levels[depth][0])
+    chosen: list[list[Clue]] = [[] for _ in levels]
+
+    def extend(
+        depth: int, remaining: int
+    ) -> Iterator[tuple[tuple[Clue, ...], int]]:
+        if depth == len(levels):
+            # Exactly one bit left
+            if remaining & (remaining - 1) == 0:
+                index = remaining.bit_length() - 1
+                for combination in itertools.product(*chosen):
+                    yield tuple(combination[d] for d in by_seat), index
+            return
+
+        for mask, clues in levels[depth][1]:
+            narrowed = remaining & mask
+            # Intersections only shrink, an empty one has no solutions
+            if narrowed:
+                chosen[depth] = clues
+                yield from extend(depth + 1, narrowed)
+
+    if levels:
+        yield from extend(0, FULL_BOARD)
+
+
+STRATEGIES = {PRODUCT: count_by_product, PRUNING: count_by_pruning}
+
+
+def _time(
+    strategy: Callable, gamemap: Map, candidates: list[frozenset[Clue]]
+) -> float:
+    calls = 0
+    started = time.perf_counter()
+    while True:
+        strategy(gamemap, candidates)
+        calls += 1
+        elapsed = time.perf_counter() - started
+        if elapsed > _CALIBRATION_SECONDS:
+            return elapsed / calls
+
+
+def calibrate(seed: int = 0, apply: bool = True) -> int:
+    """
+    Measure the combination space at which pruning gets faster than
+    enumerating the product on this host. Spaces are sampled as in a game
+    of four players, one of them with a known clue.
+
+    Args:
+        seed: Seed of the sampled candidate clues
+        apply: Use the measured crossover from now on
+
+    Returns:
+        Largest measured space where the product was faster
+    """
+
+    global _crossover  # noqa: PLW0603
+
+    gamemap = Map(_CALIBRATION_MAP, _CALIBRATION_STRUCTURES)
+    clues = sorted(CLUE_COLLECTION - {THREE_FROM_BLACK}, key=repr)
+    rng = random.Random(seed)
+
+    measured = 0
+    for per_player in range(1, _CALIBRATION_MAX_CANDIDATES + 1):
+        candidates = [frozenset(rng.sample(clues, 1))] + [
+            frozenset(rng.sample(clues, per_player)) for _ in range(3)
+        ]
+
+        product = _time(count_by_product, gamemap, candidates)
+        pruning = _time(count_by_pruning, gamemap, candidates)
+        if pruning < product:
+            break
+        measured = per_player**3
+
+    if apply:
+        _crossover = measured
+    return measured
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure the crossover of the possible tiles strategies"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"Crossover at {calibrate(args.seed)} combinations")
@@ -0,0 +1,798 @@
+"""
+Command engine behind interactive_solver.py.
+
+Engine executes the solver commands on a game and answers with both a
+human readable text and JSON serializable data. run() drives an engine from
+any stream of commands, e.g. a file or stdin, and replay_directory()
+replays recorded sessions in parallel.
+
+A session file holds the setup arguments of interactive_solver.py on its
+first line, followed by a command per line. Empty lines and lines starting
+with '#' are skipped, e.g. with the setup line wrapped here:
+
+    --map 3N 1S 5S 4S 2N 6S --players @orange_a2 cyan_b79 purple_e28
+        --structures green_ss_12,2 green_as_7,3 white_ss_8,6 white_as_10,8
+        blue_ss_9,1 blue_as_7,4
+    place c 1 1
+    question
+"""
+
+import argparse
+import cProfile
+import json
+import os
+import shlex
+import time
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import IO, NamedTuple, TypedDict
+
+from cryptidsolver import infer, trace
+from cryptidsolver.bitboard import iter_indices
+from cryptidsolver.constant.clues import by_booklet_entry
+from cryptidsolver.constant.limits import _MIN_PLAYERS
+from cryptidsolver.game import Game
+from cryptidsolver.player import Player
+from cryptidsolver.profiling import CommandProfiler
+from cryptidsolver.structure import Structure
+from cryptidsolver.tile import MapTile
+
+_N_ARGUMENTS_ANSWER = 5
+_N_ARGUMENTS_PLACEMENT = 4
+# Top candidates written to the trace
+_N_TRACED_CANDIDATES = 5
+
+_MINIMAL_STRUCTURES = [
+    ("white", "stone"),
+    ("white", "shack"),
+    ("green", "stone"),
+    ("green", "shack"),
+    ("blue", "stone"),
+    ("blue", "shack"),
+]
+
+HELP = """Did not quite catch that. Try one of the following commands:
+            - place [c/d] x y : to place Cube or Disk
+            - answer color [c/d] x y : to answer a 'question'. Cube placement with this does not advance the turn.
+            - undo : to take back the latest placement
+            - possible clues : to list out possible clues
+            - infer cube placement : to have a placement for a cube
+            - location prob : to list monster location probabilities
+            - question : to return an effective question
+            """
+
+
+class PotentialQuestion(TypedDict):
+    tile: MapTile | None
+    fitness: float
+    results: dict[str, tuple[int, int]]
+
+
+class Response(NamedTuple):
+    ok: bool
+    text: str
+    data: dict
+
+
+def parse_player(stringified: str) -> Player:
+    alphabet_lookup = {
+        "a": "alpha",
+        "b": "beta",
+        "g": "gamma",
+        "d": "delta",
+        "e": "epsilon",
+    }
+
+    if stringified.startswith("@"):
+        acting_player = True
+        stringified = stringified[1:]
+    else:
+        acting_player = False
+
+    color, booklet = stringified.split("_")
+    (booklet_alpha, booklet_num) = (
+        alphabet_lookup[booklet[0].lower()],
+        int(booklet[1:]),
+    )
+
+    if acting_player:
+        return Player(color, by_booklet_entry(booklet_alpha, booklet_num))
+
+    return Player(color, clue=None)
+
+
+def parse_structure(stringified: str) -> Structure:
+    stringified = stringified.lower()
+
+    if not stringified.startswith(("green", "white", "black", "blue")):
+        raise ValueError(
+            "Structure parameter has to start by color definition"
+        )
+
+    if stringified.startswith(("green", "white", "black")):
+        color_str = stringified[:5]
+    else:
+        # Blue
+        color_str = stringified[:4]
+
+    shape_lookup = {"ss": "stone", "as": "shack"}
+
+    offset = len(color_str)
+
+    (struct, loc) = (
+        shape_lookup[stringified[offset + 1 : offset + 3]],
+        stringified[offset + 4 :],
+    )
+    (x_str, y_str) = loc.split(",")
+    (x_coord, y_coord) = (int(x_str), int(y_str))
+
+    return Structure(color_str, struct, x_coord, y_coord)
+
+
+def question_fitness(n_locations: int, n_combinations: int) -> float:
+    if n_locations == 1:
+        return 0
+
+    if n_combinations == 1 and n_locations != 1:
+        return -9999
+
+    if n_locations == 0:
+        return -9999
+
+    if n_combinations == 0:
+        return -9999
+
+    return (-n_locations + 1) * (n_combinations**0.5)
+
+
+def add_setup_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Add the map, players and structures arguments of a game to parser.
+    """
+
+    parser.add_argument(
+        "--map",
+        type=str,
+        nargs=6,
+        help="Map description. Columnar from top-left as '(Mappiece number)(S/N)'",
+    )
+    parser.add_argument(
+        "--players",
+        type=str,
+        nargs="+",
+        help=(
+            "Ordered players as '[@](color)_(clue alphabet)(clue number)'"
+            " with @ for acting player"
+        ),
+    )
+    parser.add_argument(
+        "--structures",
+        type=str,
+        nargs="+",
+        help="Structures as '(color)_([SS/AS])_(x),(y)'",
+    )
+
+
+def parse_setup(
+    players: list[str], structures: list[str]
+) -> tuple[list[Player], list[Structure]]:
+    """
+    Parse and check the players and structures of a game.
+
+    Args:
+        players: Players as '[@](color)_(clue alphabet)(clue number)'
+        structures: Structures as '(color)_([SS/AS])_(x),(y)'
+
+    Returns:
+        Players and structures
+    """
+
+    parsed_players = [parse_player(player) for player in players]
+    parsed_structures = [
+        parse_structure(structure) for structure in structures
+    ]
+
+    assert len(parsed_players) >= _MIN_PLAYERS, (
+        "Game should have at least three players"
+    )
+    assert all(
+        ms in [(s.color.lower(), s.shape.lower()) for s in parsed_structures]
+        for ms in _MINIMAL_STRUCTURES
+    ), "All the basic structures should be present"
+
+    return parsed_players, parsed_structures
+
+
+def new_game(
+    map_description: list[str], players: list[str], structures: list[str]
+) -> Game:
+    """
+    Set up a game from the command line descriptions.
+
+    Args:
+        map_description: Map pieces as '(Mappiece number)(S/N)'
+        players: Players as '[@](color)_(clue alphabet)(clue number)'
+        structures: Structures as '(color)_([SS/AS])_(x),(y)'
+
+    Returns:
+        Game at its first tick
+    """
+
+    parsed_players, parsed_structures = parse_setup(players, structures)
+    return Game(map_description, parsed_players, parsed_structures)
+
+
+class Engine:
+    """
+    Executes solver commands on a game.
+    """
+
+    __slots__ = ("game",)
+
+    def __init__(self, game: Game) -> None:
+        self.game = game
+
+    def execute(self, cmd: str) -> Response:
+        """
+        Execute a single command.
+
+        Args:
+            cmd: Command as typed in the interactive mode
+
+        Returns:
+            Success, text for the interactive mode and data of the result
+        """
+
+        cmd = cmd.lower().strip()
+        arguments = cmd.split(" ")
+
+        if (
+            cmd.startswith("place")
+            and len(arguments) == _N_ARGUMENTS_PLACEMENT
+        ):
+            return self._place(*arguments[1:])
+        if cmd.startswith("answer") and len(arguments) == _N_ARGUMENTS_ANSWER:
+            return self._answer(*arguments[1:])
+
+        commands = {
+            "undo": self._undo,
+            "possible clues": self._possible_clues,
+            "infer cube placement": self._infer_cube_placement,
+            "location prob": self._location_prob,
+            "question": self._question,
+        }
+        if cmd in commands:
+            return commands[cmd]()
+
+        return Response(False, HELP, {"error": "Unknown command"})
+
+    def _place(self, map_object: str, x_str: str, y_str: str) -> Response:
+        try:
+            (x, y) = (int(x_str), (int(y_str)))
+
+            if map_object == "c":
+                action = self.game.place_cube(x, y)
+                kind = "cube"
+            elif map_object == "d":
+                action = self.game.place_disk(x, y)
+                kind = "disk"
+            else:
+                raise ValueError(f"Unknown object '{map_object}'")
+
+        except ValueError as error:
+            return Response(False, "", {"error": str(error)})
+
+        return Response(
+            True,
+            f"{action[0]} placed {kind} on {action[1]}",
+            {"player": action[0].color, "object": kind, "tile": [x, y]},
+        )
+
+    def _answer(
+        self, color: str, map_object: str, x_str: str, y_str: str
+    ) -> Response:
+        (x, y) = (int(x_str), (int(y_str)))
+
+        try:
+            player_colors = [
+                player.color.lower() for player in self.game.players
+            ]
+            seat = player_colors.index(color.lower())
+
+        except ValueError:
+            return Response(
+                False,
+                f"Player with color '{color}' was not found. Please check your command",
+                {"error": f"Unknown player '{color}'"},
+            )
+
+        if map_object == "c":
+            matched_player, _ = self.game.place(seat, x, y, cube=True)
+            kind = "cube"
+        elif map_object == "d":
+            matched_player, _ = self.game.place(
+                seat, x, y, cube=False, advance_tick=True
+            )
+            kind = "disk"
+        else:
+            return Response(
+                False,
+                f"Placed object '{map_object}' was not "
+                "cube (c) or disk (d). Pease check your command",
+                {"error": f"Unknown object '{map_object}'"},
+            )
+
+        return Response(
+            True,
+            f"{matched_player.color} placed {kind} on {(x, y)}",
+            {"player": matched_player.color, "object": kind, "tile": [x, y]},
+        )
+
+    def _undo(self) -> Response:
+        if self.game.position == 0:
+            return Response(False, "Nothing to undo", {"error": "No history"})
+
+        (seat, x, y, cube, _) = self.game.history[-1]
+        self.game.undo()
+        color = self.game.players[seat].color
+        kind = "cube" if cube else "disk"
+
+        return Response(
+            True,
+            f"Took back {color}'s {kind} on {(x, y)}",
+            {"player": color, "object": kind, "tile": [x, y]},
+        )
+
+    def _possible_clues(self) -> Response:
+        lines = []
+        by_player = {}
+
+        for player in self.game.players:
+            lines.append(f"{player}'s possible clues")
+            lines.append("----------")
+
+            if player.clue is not None:
+                clues = [player.clue]
+            else:
+                clues = list(player.possible_clues(self.game.map))
+
+            by_player[player.color] = [str(clue) for clue in clues]
+            lines.extend(by_player[player.color])
+            lines.append("")
+
+        return Response(True, "\n".join(lines), {"clues": by_player})
+
+    def _infer_cube_placement(self) -> Response:
+        game = self.game
+        player = game.current_player()
+        if player.clue is None:
+            return Response(
+                False,
+                "'Infer cube placement' not supported for non-controlled player.",
+                {"error": "Current player is not controlled"},
+            )
+
+        with trace.analysis("infer_cube_placement", game) as record:
+            before_placement = player.possible_clues(game.map)
+
+            placement_alternatives = {}
+            clue_accepts = player.clue.accepted_mask(game.map)
+
+            # If players clue would accept monster on the tile, then we
+            # cannot place a cube on it.
+            placeable = game.free_tiles() & ~clue_accepts
+
+            with record.phase("placements"):
+                for index in iter_indices(placeable):
+                    tile = game.map._tile(index)
+                    # Does not account for impossible clues - that is cannot
+                    # produce clue-combination that singles out a tile.
+
+                    clues_after_placement = (
+                        infer.possible_clues_after_cube_placement(
+                            game.map, player, (tile.x, tile.y)
+                        )
+                    )
+
+                    placement_reduces_clues = len(
+                        before_placement.difference(clues_after_placement)
+                    )
+                    placement_alternatives[tile] = placement_reduces_clues
+
+            ranked = sorted(placement_alternatives.items(), key=lambda x: x[1])
+            minimum_reveal = ranked[0]
+
+            if record.active:
+                record.set(
+                    player=player.color,
+                    candidates=len(before_placement),
+                    top_placements=[
+                        {"tile": [tile.x, tile.y], "reduced_clues": reduced}
+                        for tile, reduced in ranked[:_N_TRACED_CANDIDATES]
+                    ],
+                )
+
+        return Response(
+            True,
+            f"Place cube on x:{minimum_reveal[0].x} y:{minimum_reveal[0].y} "
+            f"to reduce {minimum_reveal[1]} clues",
+            {
+                "tile": [minimum_reveal[0].x, minimum_reveal[0].y],
+                "reduced_clues": minimum_reveal[1],
+            },
+        )
+
+    def _location_prob(self) -> Response:
+        possible_locations_unsorted = self.game.possible_tiles()
+        possible_locations = sorted(
+            possible_locations_unsorted.items(), key=lambda x: x[1]
+        )
+
+        lines = ["Location probabilities", "---------"]
+        for location, probability in possible_locations:
+            lines.append(
+                f"Tile x:{location.x} y:{location.y} has probability of {probability}"
+            )
+
+        return Response(
+            True,
+            "\n".join(lines),
+            {
+                "locations": [
+                    {"tile": [location.x, location.y], "probability": p}
+                    for location, p in possible_locations
+                ]
+            },
+        )
+
+    def _question(self) -> Response:
+        player, question = plan_question(self.game)
+
+        if question["tile"] is None:
+            raise AttributeError(
+                "Encountered a question which does "
+                f"not point to tile. Question: {(player, question)}"
+            )
+
+        return Response(
+            True,
+            "\nQuestion found.\n"
+            f"Ask player: {player} about x: {question['tile'].x} "
+            f"y: {question['tile'].y}",
+            {
+                "player": player.color,
+                "tile": [question["tile"].x, question["tile"].y],
+                "fitness": question["fitness"],
+            },
+        )
+
+
+def plan_question(game: Game) -> tuple[Player, PotentialQuestion]:
+    """
+    Find the question that narrows down the cryptid location the most.
+
+    Args:
+        game: Current game
+
+    Returns:
+        Player to ask, and the tile to ask about
+    """
+
+    with trace.analysis("question", game) as record:
+        with record.phase("baseline"):
+            possible_tiles = game.possible_tiles()
+        n_possible_locations = len(possible_tiles.keys())
+        # BUG: possible_tiles.values have been normalized earlier (to probability),
+        # so the sum equals n_possible_locations always
+        n_possible_combinations = round(sum(possible_tiles.values()))
+
+        imagined_game = game.branch()
+
+        except_current_player = [
+            player
+            for player in imagined_game.players
+            if player != imagined_game.current_player()
+        ]
+
+        potential_questions: dict[Player, PotentialQuestion] = {
+            player: {
+                "tile": None,
+                "fitness": question_fitness(
+                    n_possible_locations, n_possible_combinations
+                ),
+                "results": {
+                    "locations": (
+                        n_possible_locations,
+                        n_possible_locations,
+                    ),
+                    "combinations": (
+                        n_possible_locations,
+                        n_possible_locations,
+                    ),
+                },
+            }
+            for player in except_current_player
+        }
+        # Fitness, player and tile of every evaluated question when traced
+        evaluated: list[tuple[float, str, int, int]] = []
+
+        with record.phase("candidates"):
+            for player in except_current_player:
+                # No point asking questions from players with known clues, i.e. acting players
+                if player.clue is not None:
+                    continue
+
+                seat = imagined_game.players.index(player)
+
+                for tile in imagined_game.map:
+                    # imagine cube placement
+                    imagined_game.place(seat, tile.x, tile.y, cube=True)
+
+                    after_locations = imagined_game.possible_tiles()
+                    n_negative_locations_after = len(after_locations.keys())
+                    n_negative_combinations_after = round(
+                        sum(after_locations.values())
+                    )
+
+                    imagined_game.undo()
+
+                    # imagine disk placement
+
+                    imagined_game.place(seat, tile.x, tile.y, cube=False)
+
+                    after_locations = imagined_game.possible_tiles()
+                    n_positive_locations_after = len(after_locations.keys())
+                    n_positive_combinations_after = round(
+                        sum(after_locations.values())
+                    )
+
+                    imagined_game.undo()
+
+                    fitness = (
+                        question_fitness(
+                            n_negative_locations_after,
+                            n_negative_combinations_after,
+                        )
+                        + question_fitness(
+                            n_positive_locations_after,
+                            n_positive_combinations_after,
+                        )
+                    ) / 2
+
+                    if fitness >= potential_questions[player]["fitness"]:
+                        results = {
+                            "locations": (
+                                n_positive_locations_after,
+                                n_negative_locations_after,
+                            ),
+                            "combinations": (
+                                n_positive_combinations_after,
+                                n_negative_combinations_after,
+                            ),
+                        }
+                        potential_questions[player] = {
+                            "tile": tile,
+                            "fitness": fitness,
+                            "results": results,
+                        }
+
+                    if record.active:
+                        evaluated.append(
+                            (fitness, player.color, tile.x, tile.y)
+                        )
+
+        best = max(potential_questions.items(), key=lambda x: x[1]["fitness"])
+
+        if record.active:
+            evaluated.sort(reverse=True)
+            record.set(
+                algorithm="exhaustive",
+                candidates=trace.candidate_counts(game),
+                locations=n_possible_locations,
+                evaluated=len(evaluated),
+                top_questions=[
+                    {"player": color, "tile": [x, y], "fitness": fitness}
+                    for fitness, color, x, y in evaluated[
+                        :_N_TRACED_CANDIDATES
+                    ]
+                ],
+            )
+
+    return best
+
+
+def _commands(lines: Iterable[str]) -> Iterable[str]:
+    for line in lines:
+        command = line.strip()
+        if command and not command.startswith("#"):
+            yield command
+
+
+def respond(
+    engine: Engine, cmd: str, profiler: CommandProfiler | None = None
+) -> tuple[Response, dict]:
+    """
+    Execute a command, turning a failure into an unsuccessful response.
+
+    Args:
+        engine: Engine to execute the command on
+        cmd: Command as typed in the interactive mode
+        profiler: Profile the command into a file
+
+    Returns:
+        Response, and its JSON serializable record with the time taken
+    """
+
+    profile = None if profiler is None else cProfile.Profile()
+    started = time.perf_counter()
+    try:
+        if profile is None:
+            response = engine.execute(cmd)
+        else:
+            response = profile.runcall(engine.execute, cmd)
+    except Exception as error:  # pylint: disable=broad-except
+        response = Response(
+            False, f"Command failed: {error!r}", {"error": repr(error)}
+        )
+    elapsed = time.perf_counter() - started
+
+    record = {
+        "command": cmd,
+        "ok": response.ok,
+        "elapsed": elapsed,
+        **response.data,
+    }
+    if profiler is not None and profile is not None:
+        record["profile"] = str(profiler.write(cmd, profile))
+
+    return response, record
+
+
+def run(
+    engine: Engine,
+    lines: Iterable[str],
+    output: IO[str],
+    json_lines: bool = False,
+    profiler: CommandProfiler | None = None,
+) -> list[dict]:
+    """
+    Execute commands until the lines run out. Failing commands are reported
+    and skipped.
+
+    Args:
+        engine: Engine to execute the commands on
+        lines: Commands, one per line
+        output: Stream for the responses
+        json_lines: Write a JSON object per command instead of text
+        profiler: Profile every command, and report its latency
+
+    Returns:
+        Result record of each command
+    """
+
+    results = []
+
+    for cmd in _commands(lines):
+        response, record = respond(engine, cmd, profiler)
+        results.append(record)
+
+        if json_lines:
+            output.write(json.dumps(record) + "\n")
+        else:
+            if response.text:
+                output.write(response.text + "\n")
+            if profiler is not None:
+                output.write(
+                    f"[{cmd} took {record['elapsed']:.3f} s,"
+                    f" profile in {record['profile']}]\n"
+                )
+        output.flush()
+
+    return results
+
+
+def read_session(
+    path: str | os.PathLike,
+) -> tuple[argparse.Namespace, list[str]]:
+    """
+    Read a recorded session without setting up its game.
+
+    Args:
+        path: Session file
+
+    Returns:
+        Setup arguments 'map', 'players' and 'structures' of the first line,
+        and the commands that follow it
+    """
+
+    with open(path, encoding="utf-8") as handle:
+        lines = list(_commands(handle))
+
+    if not lines:
+        raise ValueError(f"{path} has no setup line")
+
+    parser = argparse.ArgumentParser(prog=str(path), exit_on_error=False)
+    add_setup_arguments(parser)
+    args, unknown = parser.parse_known_args(shlex.split(lines[0]))
+
+    if unknown:
+        raise ValueError(f"{path} setup line has unknown arguments {unknown}")
+    if args.map is None or args.players is None or args.structures is None:
+        raise ValueError(f"{path} setup line misses game arguments")
+
+    return args, lines[1:]
+
+
+def load_session(path: str | os.PathLike) -> tuple[Game, list[str]]:
+    """
+    Read a recorded session.
+
+    Args:
+        path: Session file
+
+    Returns:
+        Game set up from the first line, and the commands that follow it
+    """
+
+    args, commands = read_session(path)
+    return new_game(args.map, args.players, args.structures), commands
+
+
+def replay_session(path: str | os.PathLike, output: str | os.PathLike) -> dict:
+    """
+    Replay a recorded session, writing a JSON line per command to output.
+
+    Returns:
+        Session name, number of commands and failed commands, and the time
+        taken
+    """
+
+    started = time.perf_counter()
+    with open(output, "w", encoding="utf-8") as results:
+        try:
+            game, commands = load_session(path)
+        except Exception as error:  # pylint: disable=broad-except
+            results.write(json.dumps({"error": repr(error)}) + "\n")
+            records = [{"ok": False}]
+        else:
+            records = run(Engine(game), commands, results, json_lines=True)
+
+    return {
+        "session": Path(path).name,
+        "commands": len(records),
+        "errors": sum(not record["ok"] for record in records),
+        "elapsed": time.perf_counter() - started,
+    }
+
+
+def replay_directory(
+    directory: str | os.PathLike,
+    output: str | os.PathLike,
+    workers: int | None = None,
+    pattern: str = "*",
+) -> list[dict]:
+    """
+    Replay every session file of a directory in parallel. The responses of
+    a session are written to a JSON-lines file of the same name in output.
+
+    Args:
+        directory: Directory of the session files
+        output: Directory for the responses, created if needed
+        workers: Worker processes, defaults to the number of cores
+        pattern: Glob pattern of the session files
+
+    Returns:
+        Summary of each session, in name order
+    """
+
+    sessions = sorted(
+        path
+        for path in Path(directory).glob(pattern)
+        if path.is_file() and not path.name.startswith(".")
+    )
+    os.makedirs(output, exist_ok=True)
+    destinations = [Path(output, f"{path.stem}.jsonl") for path in sessions]
+
+    with ProcessPoolExecutor(workers) as executor:
+        return list(executor.map(replay_session, sessions, destinations))
@@ -1,18 +1,309 @@
-import functools
-import itertools
-
+import math
+from collections.abc import Generator, Iterable, Iterator, Mapping
+from typing import NamedTuple
+
+from cryptidsolver import (
+    backends,
+    cache,
+    counters,
+    distribution,
+    sampling,
+    trace,
+)
+from cryptidsolver.bitboard import FULL_BOARD, tile_index
 from cryptidsolver.clue import Clue
 from cryptidsolver.gamemap import Map
 from cryptidsolver.player import Player
 from cryptidsolver.structure import Structure
 from cryptidsolver.tile import MapTile
 
+# Placements between the snapshots of the player placements
+_SNAPSHOT_INTERVAL = 32
+
+
+class PlacementEvent(NamedTuple):
+    seat: int
+    x: int
+    y: int
+    cube: bool
+    advance_tick: bool
+
+
+class Solution(NamedTuple):
+    # Clue of each player, in the turn order
+    clues: tuple[Clue, ...]
+    tile: MapTile
+
+
+class PossibleTiles(Mapping[MapTile, float]):
+    """
+    Possible tiles of a game position, computed on demand. As a mapping,
+    each possible tile has the share of the clue combinations pointing on
+    it.
+
+    With the bitset backend, the predicates search the combinations with
+    pruning and stop as soon as they know the answer, e.g. is_determined()
+    after finding two tiles. Reading the mapping or counts() counts every
+    combination with the backend selected when the position was taken. Every
+    answer is kept for the later calls.
+    """
+
+    __slots__ = (
+        "_algorithm",
+        "_backend",
+        "_candidates",
+        "_colors",
+        "_contained",
+        "_counts",
+        "_determined",
+        "_gamemap",
+        "_probabilities",
+        "_state",
+        "_support",
+    )
+
+    def __init__(
+        self,
+        gamemap: Map,
+        candidates: list[frozenset[Clue]],
+        colors: list[str],
+        algorithm: str | None = None,
+        state: str | None = None,
+    ) -> None:
+        """
+        Args:
+            gamemap: Current gamemap
+            candidates: Possible clues of each player
+            colors: Colors of the players, for the trace
+            algorithm: Force a strategy of cryptidsolver.distribution
+            state: State hash of the position, for the trace
+        """
+
+        self._gamemap = gamemap
+        self._candidates = candidates
+        self._colors = colors
+        self._algorithm = algorithm
+        self._backend = backends.active()
+        self._state = state
+        self._counts: dict[MapTile, int] | None = None
+        self._probabilities: dict[MapTile, float] | None = None
+        self._support: frozenset[MapTile] | None = None
+        self._determined: bool | None = None
+        self._contained: dict[MapTile, bool] = {}
+
+    def _known_support(self) -> frozenset[MapTile] | None:
+        # Known once counted or fully searched
+        if self._support is None and (
+            self._counts is not None or not self._backend.searches
+        ):
+            self._support = frozenset(self.counts())
+        return self._support
+
+    def _search(self, containing: int = 0) -> distribution.PruningSearch:
+        return distribution.PruningSearch(
+            self._gamemap, self._candidates, containing
+        )
+
+    def counts(self) -> dict[MapTile, int]:
+        """
+        Returns:
+            Number of clue combinations singling out each possible tile
+        """
+
+        if self._counts is not None:
+            return self._counts
+
+        with trace.analysis("possible_tiles") as record:
+            n_combinations = math.prod(
+                len(clues) for clues in self._candidates
+            )
+            algorithm = self._backend.strategy(
+                self._candidates, self._algorithm
+            )
+
+            with record.phase("enumerate"):
+                counts, enumerated = self._backend.tile_counts(
+                    self._gamemap, self._candidates, algorithm
+                )
+            counters.increment(counters.COMBINATIONS, enumerated)
+
+            if record.active:
+                record.set(
+                    state=self._state,
+                    backend=self._backend.name,
+                    algorithm=algorithm,
+                    candidates={
+                        color: len(clues)
+                        for color, clues in zip(self._colors, self._candidates)
+                    },
+                    combinations_before=n_combinations,
+                    combinations_enumerated=enumerated,
+                    combinations_after=sum(counts.values()),
+                    tiles=len(counts),
+                )
+
+        self._counts = counts
+        return counts
+
+    def is_determined(self) -> bool:
+        """
+        Returns:
+            Whether the clue combinations single out a single tile
+        """
+
+        support = self._known_support()
+        if support is not None:
+            return len(support) == 1
+        if self._determined is not None:
+            return self._determined
+
+        search = self._search()
+        found = None
+        determined = True
+        for index, _ in search:
+            if found is not None and index != found:
+                determined = False
+                break
+            found = index
+        counters.increment(counters.COMBINATIONS, search.intersections)
+
+        self._determined = determined and found is not None
+        return self._determined
+
+    def contains(self, tile: MapTile) -> bool:
+        """
+        Args:
+            tile: Tile of the gamemap
+
+        Returns:
+            Whether a clue combination singles out the tile
+        """
+
+        support = self._known_support()
+        if support is not None:
+            return tile in support
+        if tile in self._contained:
+            return self._contained[tile]
+
+        # Only the clues accepting the tile can single it out
+        search = self._search(1 << tile_index(tile.x, tile.y))
+        contained = any(True for _ in search)
+        counters.increment(counters.COMBINATIONS, search.intersections)
+
+        self._contained[tile] = contained
+        return contained
+
+    def support(self) -> frozenset[MapTile]:
+        """
+        Returns:
+            Tiles singled out by some clue combination
+        """
+
+        support = self._known_support()
+        if support is not None:
+            return support
+
+        # Tiles accepted by a candidate clue of every player. The search
+        # stops once all of them are found.
+        bound = FULL_BOARD
+        for clues in self._candidates:
+            accepted = 0
+            for clue in clues:
+                accepted |= clue.accepted_mask(self._gamemap)
+            bound &= accepted
+
+        search = self._search()
+        found = 0
+        for index, _ in search:
+            found |= 1 << index
+            if found == bound:
+                break
+        counters.increment(counters.COMBINATIONS, search.intersections)
+
+        self._support = self._gamemap.tiles_from_mask(found)
+        return self._support
+
+    def estimate(
+        self,
+        tolerance: float = sampling.DEFAULT_TOLERANCE,
+        confidence: float = sampling.DEFAULT_CONFIDENCE,
+        seconds: float | None = None,
+        max_samples: int = sampling.DEFAULT_MAX_SAMPLES,
+        seed: int | None = None,
+    ) -> sampling.Estimate:
+        """
+        Estimate the probabilities by sampling clue combinations, for
+        combination spaces too large to count, see cryptidsolver.sampling.
+
+        Args:
+            tolerance: Largest accepted half-width of the intervals
+            confidence: Confidence level of the intervals
+            seconds: Time budget, unlimited if None
+            max_samples: Largest number of combinations drawn
+            seed: Seed of the sampled combinations
+
+        Returns:
+            Estimated probabilities with their confidence intervals
+        """
+
+        with trace.analysis("tile_estimate") as record:
+            estimate = sampling.estimate_tiles(
+                self._gamemap,
+                self._candidates,
+                sampling.Settings(
+                    tolerance, confidence, seconds, max_samples, seed
+                ),
+            )
+
+            if record.active:
+                record.set(
+                    state=self._state,
+                    tolerance=tolerance,
+                    confidence=confidence,
+                    samples=estimate.samples,
+                    accepted=estimate.accepted,
+                    converged=estimate.converged,
+                    tiles=len(estimate.probabilities),
+                )
+
+        return estimate
+
+    def _shares(self) -> dict[MapTile, float]:
+        if self._probabilities is None:
+            counts = self.counts()
+            total = sum(counts.values())
+            self._probabilities = {
+                tile: count / total for tile, count in counts.items()
+            }
+        return self._probabilities
+
+    def __getitem__(self, tile: MapTile) -> float:
+        return self._shares()[tile]
+
+    def __iter__(self) -> Iterator[MapTile]:
+        return iter(self._shares())
+
+    def __len__(self) -> int:
+        return len(self.counts())
+
+    def __contains__(self, tile: object) -> bool:
+        return isinstance(tile, MapTile) and self.contains(tile)
+
+    def __repr__(self) -> str:
+        return f"PossibleTiles({self._shares()!r})"
+
 
 class Game:
     """
     Maintainer for gamestate as a whole.
     Delegates the player turns and map changes, and maintains
     track of the player turns.
+
+    Placements made through the game are recorded in an append-only event
+    log, with a snapshot of the placements every _SNAPSHOT_INTERVAL events.
+    Any earlier position can be restored by replaying the events from the
+    closest snapshot. Placements appended directly to the players are not
+    recorded.
     """
 
     def __init__(
@@ -20,11 +311,213 @@ class Game:
         map_descriptor: list[str],
         ordered_players: list[Player],
         structures: list[Structure],
+    ) -> None:
+        self._setup(Map(map_descriptor, structures), ordered_players)
+        cache.warm_clue_masks(self.map)
+
+    @classmethod
+    def from_map(cls, gamemap: Map, ordered_players: list[Player]) -> "Game":
+        """
+        Construct a game on an existing gamemap. Games on the same gamemap
+        share the clue masks stored on it.
+
+        Args:
+            gamemap: Gamemap of the game
+            ordered_players: Players in their turn order
+
+        Returns:
+            Game at its first tick
+        """
+
+        game = cls.__new__(cls)
+        game._setup(gamemap, ordered_players)
+        return game
+
+    def _setup(
+        self,
+        gamemap: Map,
+        ordered_players: list[Player],
+        branched_from: "Game | None" = None,
     ) -> None:
         self.players = ordered_players
-        self.map = Map(map_descriptor, structures)
+        self.map = gamemap
+
+        if branched_from is None:
+            self.gametick = 0
+            self._events: list[PlacementEvent] = []
+            self._snapshots = [self._snapshot()]
+        else:
+            # The events and snapshots are immutable, the lists are not
+            self.gametick = branched_from.gametick
+            self._events = list(branched_from.history)
+            self._snapshots = list(branched_from._snapshots)
+
+    def _snapshot(self) -> tuple:
+        return (
+            self.gametick,
+            tuple(
+                (tuple(player.cubes), tuple(player.disks))
+                for player in self.players
+            ),
+        )
+
+    def _restore(self, snapshot: tuple) -> None:
+        # Restored in place, as views to the players share the placements
+        self.gametick, placements = snapshot
+        for player, (cubes, disks) in zip(self.players, placements):
+            player.cubes[:] = cubes
+            player.disks[:] = disks
+
+    def _apply(self, event: PlacementEvent) -> None:
+        player = self.players[event.seat]
+        if event.cube:
+            player.cubes.append((event.x, event.y))
+        else:
+            player.disks.append((event.x, event.y))
+
+        if event.advance_tick:
+            self.gametick += 1
+
+    def _unapply(self, event: PlacementEvent) -> bool:
+        # Only the latest placement of the player can be taken back here
+        player = self.players[event.seat]
+        placements = player.cubes if event.cube else player.disks
+        if not placements or placements[-1] != (event.x, event.y):
+            return False
+
+        placements.pop()
+        if event.advance_tick:
+            self.gametick -= 1
+        return True
+
+    def _check_position(self, position: int) -> None:
+        if not 0 <= position <= len(self._events):
+            raise ValueError(
+                f"Position has to be in range 0 ... {len(self._events)}"
+            )
 
-        self.gametick = 0
+    @property
+    def history(self) -> tuple[PlacementEvent, ...]:
+        """
+        Returns:
+            Recorded placements in the order they were made
+        """
+        return tuple(self._events)
+
+    @property
+    def position(self) -> int:
+        """
+        Returns:
+            Number of recorded placements
+        """
+        return len(self._events)
+
+    def place(
+        self,
+        seat: int,
+        x: int,
+        y: int,
+        cube: bool,
+        advance_tick: bool = False,
+    ) -> tuple[Player, MapTile]:
+        """
+        Record a cube or disk of any player, e.g. when answering a question.
+        Unlike place_cube, does not check for existing cubes.
+
+        Args:
+            seat: Index of the player in the turn order
+            x: x coordinate - left-most column being 1
+            y: y coordinate - top-most row being 1
+            cube: Whether a cube or a disk is placed
+            advance_tick: Advance gametick
+
+        Returns:
+            Placing player with the MapTile at location [x, y]
+        """
+
+        tile = self.map[x, y]
+        event = PlacementEvent(seat, x, y, cube, advance_tick)
+
+        self._apply(event)
+        self._events.append(event)
+
+        if len(self._events) % _SNAPSHOT_INTERVAL == 0:
+            self._snapshots.append(self._snapshot())
+
+        return (self.players[seat], tile)
+
+    def replay(self, events: Iterable[PlacementEvent]) -> None:
+        """
+        Record placements, e.g. from the history of another game.
+
+        Args:
+            events: Placements in the order they were made
+        """
+
+        for event in events:
+            self.place(*event)
+
+    def rewind(self, position: int) -> None:
+        """
+        Restore the game to an earlier position. Later placements are
+        dropped from the history.
+
+        Args:
+            position: Number of recorded placements to keep
+        """
+
+        self._check_position(position)
+
+        num = position // _SNAPSHOT_INTERVAL
+        self._restore(self._snapshots[num])
+        del self._snapshots[num + 1 :]
+
+        for event in self._events[num * _SNAPSHOT_INTERVAL : position]:
+            self._apply(event)
+        del self._events[position:]
+
+    def undo(self, steps: int = 1) -> None:
+        """
+        Take back the latest recorded placements. Each placement is taken
+        back on its own, without replaying from a snapshot.
+
+        Args:
+            steps: Number of placements to take back
+        """
+
+        position = len(self._events) - steps
+        self._check_position(position)
+
+        while len(self._events) > position:
+            if not self._unapply(self._events[-1]):
+                # Placements appended to the players since, restore instead
+                self.rewind(position)
+                return
+            self._events.pop()
+
+        # Snapshots beyond the position would restore undone placements
+        del self._snapshots[position // _SNAPSHOT_INTERVAL + 1 :]
+
+    def branch(self) -> "Game":
+        """
+        Copy the game for exploring placements, without deepcopying. The
+        copy shares the gamemap and history up to now, but not the
+        placements.
+
+        Returns:
+            Independent game at the same position
+        """
+
+        players = []
+        for player in self.players:
+            copied = Player(player.color, player.clue, player.teamname)
+            copied.cubes = player.cubes
+            copied.disks = player.disks
+            players.append(copied)
+
+        game = Game.__new__(Game)
+        game._setup(self.map, players, branched_from=self)
+        return game
 
     def current_player(self) -> Player:
         """
@@ -35,6 +528,38 @@ class Game:
         """
         return self.players[self.gametick % len(self.players)]
 
+    def cube_mask(self) -> int:
+        """
+        Returns:
+            Bitboard of the tiles with a cube of any player
+        """
+
+        # Combined from the masks kept by the players, as placements may be
+        # appended to the players without going through the game
+        mask = 0
+        for player in self.players:
+            mask |= player.cubes.mask
+        return mask
+
+    def disk_mask(self) -> int:
+        """
+        Returns:
+            Bitboard of the tiles with a disk of any player
+        """
+
+        mask = 0
+        for player in self.players:
+            mask |= player.disks.mask
+        return mask
+
+    def free_tiles(self) -> int:
+        """
+        Returns:
+            Bitboard of the tiles that still accept a cube
+        """
+
+        return FULL_BOARD ^ self.cube_mask()
+
     def accepts_cube(self, x: int, y: int) -> bool:
         """
         Check whether coordinates accept a cube.
@@ -49,11 +574,7 @@ class Game:
         """
 
         # Cubes cannot be placed on tiles which already have a cube
-        for player in self.players:
-            if (x, y) in player.cubes:
-                return False
-
-        return True
+        return not self.cube_mask() & (1 << tile_index(x, y))
 
     def place_cube(
         self, x: int, y: int, advance_tick: bool = True
@@ -75,13 +596,13 @@ class Game:
                 "Cubes cannot be placed on tiles with existing cubes"
             )
 
-        acting_player = self.current_player()
-        acting_player.cubes.append((x, y))
-
-        if advance_tick:
-            self.gametick += 1
-
-        return (acting_player, self.map[x, y])
+        return self.place(
+            self.gametick % len(self.players),
+            x,
+            y,
+            cube=True,
+            advance_tick=advance_tick,
+        )
 
     def place_disk(
         self, x: int, y: int, advance_tick: bool = True
@@ -98,57 +619,73 @@ class Game:
             Acting player with the MapTile at location [x, y]
         """
 
-        acting_player = self.current_player()
-        acting_player.disks.append((x, y))
-
-        if advance_tick:
-            self.gametick += 1
+        return self.place(
+            self.gametick % len(self.players),
+            x,
+            y,
+            cube=False,
+            advance_tick=advance_tick,
+        )
 
-        return (acting_player, self.map[x, y])
+    def _potential_clues(self) -> list[frozenset[Clue]]:
+        potential_clues: list[frozenset[Clue]] = []
+        for player in self.players:
+            if player.clue is not None:
+                # Add known clues
+                potential_clues.append(frozenset((player.clue,)))
+            else:
+                potential_clues.append(player.possible_clues(self.map))
+        return potential_clues
 
     def possible_tiles(
-        self, inverted_clues: bool = False
-    ) -> dict[MapTile, float]:
+        self, inverted_clues: bool = False, algorithm: str | None = None
+    ) -> PossibleTiles:
         """
         Infer possible tiles from the clue possible clue combinations.
+        The candidate clues of the players are taken from the current
+        position, and the combinations are searched only when the result
+        is read, see PossibleTiles.
+
+        The tiles are counted by the active backend of
+        cryptidsolver.backends. With the bitset backend, the counting
+        strategy is selected from the size of the combination space, see
+        cryptidsolver.distribution.
 
         Args:
             inverted_clues: Whether the game is played with inverted clues.
+            algorithm: Force a strategy of cryptidsolver.distribution
 
         Returns:
-            MapTile with number of clue combinations pointing on them
+            MapTile with the share of clue combinations pointing on them
         """
 
         if inverted_clues:
             raise NotImplementedError("Inverse clues not implemented")
 
-        potential_clues: list[frozenset[Clue]] = []
-
-        for player in self.players:
-            if player.clue is not None:
-                # Add known clues
-                potential_clues.append(frozenset((player.clue,)))
-            else:
-                potential_clues.append(player.possible_clues(self.map))
+        return PossibleTiles(
+            self.map,
+            self._potential_clues(),
+            [player.color for player in self.players],
+            algorithm,
+            trace.state_hash(self) if trace.active() else None,
+        )
 
-        potential_tiles: dict[MapTile, float] = {}
-        total = 0
+    def iter_solutions(self) -> Generator[Solution, None, None]:
+        """
+        Generate the clue combinations of the players singling out a tile,
+        searched with pruning as the generator is consumed. The candidate
+        clues are taken from the current position. Close the generator to
+        stop the search early.
+
+        Yields:
+            Clue of each player with the tile they single out. The
+            solutions of each tile add up to its count in possible_tiles.
+        """
 
-        for combination in itertools.product(*potential_clues):
-            possible_tiles = functools.reduce(
-                lambda x, y: x & y.accepted_tiles(self.map),
-                combination,
-                set(self.map),
+        gamemap = self.map
+        return (
+            Solution(clues, gamemap._tile(index))
+            for clues, index in distribution.iter_solutions(
+                gamemap, self._potential_clues()
             )
-            if len(possible_tiles) == 1:
-                tile = possible_tiles.pop()
-                total += 1
-
-                if tile in potential_tiles:
-                    potential_tiles[tile] += 1
-                else:
-                    potential_tiles[tile] = 1
-
-        potential_tiles = {k: v / total for k, v in potential_tiles.items()}
-
-        return potential_tiles
+        )
@@ -1,7 +1,12 @@
+import hashlib
+from array import array
 from collections.abc import Generator
 from enum import Enum
 
+from cryptidsolver import counters
+from cryptidsolver.bitboard import iter_indices
 from cryptidsolver.constant.limits import _MAP_MAX_X, _MAP_MAX_Y
+from cryptidsolver.hexgrid import within
 from cryptidsolver.structure import Structure
 from cryptidsolver.tile import MapTile, _BiomeTile
 
@@ -9,6 +14,20 @@ _NON_INVERTED_GAME_STRUCTURE_COUNT = 6
 _INVERTED_GAME_STRUCTURE_COUNT = 8
 _MAP_DESCRIPTION_LENGTH = 6
 
+# Codes of the flat tile arrays. Zero marks a missing animal or structure.
+ANIMAL_CODES: dict[str | None, int] = {None: 0, "bear": 1, "cougar": 2}
+STRUCTURE_CODES: dict[tuple[str, str] | None, int] = {
+    None: 0,
+    **{
+        (color, shape): 1 + num
+        for num, (color, shape) in enumerate(
+            (color, shape)
+            for color in ("blue", "green", "white", "black")
+            for shape in ("stone", "shack")
+        )
+    },
+}
+
 
 class MapPiece(Enum):
     """
@@ -97,7 +116,16 @@ class Map:
     Describes the gamemap
     """
 
-    __slots__ = ("map",)
+    __slots__ = (
+        "_animals",
+        "_biomes",
+        "_clue_masks",
+        "_feature_masks",
+        "_structures",
+        "_tiles",
+        "description",
+        "fingerprint",
+    )
 
     def __init__(
         self, map_description: list[str], structures: list[Structure]
@@ -122,7 +150,64 @@ class Map:
             f"Map description has to be {_MAP_DESCRIPTION_LENGTH} pieces"
         )
 
-        self.map = self._generate_terrain_map(map_description, structures)
+        self.description = tuple(map_description)
+        self.fingerprint = self._fingerprint(map_description, structures)
+
+        # Tiles and their features are stored flat, indexed column by column
+        # as in cryptidsolver.bitboard: (x - 1) * _MAP_MAX_Y + (y - 1)
+        self._tiles: tuple[MapTile, ...] = tuple(
+            tile
+            for col in self._generate_terrain_map(map_description, structures)
+            for tile in col
+        )
+        self._biomes = bytes(ord(tile.biome) for tile in self._tiles)
+        self._animals = array(
+            "B", (ANIMAL_CODES[tile.animal] for tile in self._tiles)
+        )
+        self._structures = array(
+            "B",
+            (
+                STRUCTURE_CODES[
+                    None
+                    if tile.structure is None
+                    else (tile.structure.color, tile.structure.shape)
+                ]
+                for tile in self._tiles
+            ),
+        )
+        self._feature_masks = self._generate_feature_masks(
+            self._biomes, self._animals, self._structures
+        )
+
+        # Non-inverted clue masks keyed by (clue_type, distance, distance_from)
+        self._clue_masks: dict[tuple[str, int, frozenset[str]], int] = {}
+
+    @staticmethod
+    def _fingerprint(
+        description: list[str], structures: list[Structure]
+    ) -> str:
+        """
+        Identify the map by its pieces and structures.
+
+        Args:
+            description: Map pieces (num, heading) in an ordered list.
+            structures: Map structures added to the map.
+
+        Returns:
+            Hex digest, equal for maps with equal setup
+        """
+
+        placements = sorted(
+            f"{structure.color}:{structure.shape}:{structure.x}:{structure.y}"
+            for structure in structures
+        )
+        setup = (
+            ",".join(d.upper() for d in description)
+            + "|"
+            + ",".join(placements)
+        )
+
+        return hashlib.sha256(setup.encode()).hexdigest()
 
     @staticmethod
     def neighbouring_coordinates(x: int, y: int) -> frozenset[tuple[int, int]]:
@@ -134,22 +219,9 @@ class Map:
             y: y coordinate - top-most row being 1
 
         Returns:
-            Tiles surrounding x,y
+            Tiles surrounding x,y, including x,y itself
         """
-        neighbours = set()
-
-        for row in (x - 1, x, x + 1):
-            for col in (y - 1, y, y + 1):
-                # Odd rows have left & right neighbours in y-1 and y.
-                if x % 2 == 1 and col == y + 1 and row != x:
-                    continue
-                if x % 2 == 0 and col == y - 1 and row != x:
-                    continue
-
-                if 1 <= row <= _MAP_MAX_X and 1 <= col <= _MAP_MAX_Y:
-                    neighbours.add((row, col))
-
-        return frozenset(neighbours)
+        return frozenset(within(x, y, 1))
 
     def tiles_on_distance(self, x: int, y: int, d: int) -> frozenset[MapTile]:
         """
@@ -164,23 +236,17 @@ class Map:
             Tiles within distance d from tile x,y
         """
 
-        neighbours = set()
-        neighbours.add(self.__getitem__([x, y]))
-
-        for _ in range(d):
-            new_neighbours = set()
-
-            for point in neighbours:
-                for neig_x, neig_y in self.neighbouring_coordinates(
-                    point.x, point.y
-                ):
-                    new_neighbours.add(self[neig_x, neig_y])
-            neighbours = neighbours.union(new_neighbours)
-
-        return frozenset(neighbours)
+        tiles = self._tiles
+        found = frozenset(
+            tiles[(col - 1) * _MAP_MAX_Y + (row - 1)]
+            for col, row in within(x, y, d)
+        )
+        counters.increment(counters.TILES_VISITED, len(found))
+        return found
 
+    @staticmethod
     def _reverse_map_piece(
-        self, map_piece: list[list[_BiomeTile]]
+        map_piece: list[list[_BiomeTile]],
     ) -> list[list[_BiomeTile]]:
         """
         Generate a new MapPiece that is reversed (rotated 180*) from given map piece.
@@ -203,8 +269,9 @@ class Map:
 
         return reversed_piece
 
+    @staticmethod
     def _generate_terrain_map(
-        self, description: list[str], structures: list[Structure]
+        description: list[str], structures: list[Structure]
     ) -> list[list[MapTile]]:
         """
         Form a map from map pieces.
@@ -250,7 +317,7 @@ class Map:
 
             map_piece = lookup_mapPiece[piece_num].value
             if piece_heading.lower() == "s":
-                map_piece = self._reverse_map_piece(map_piece)
+                map_piece = Map._reverse_map_piece(map_piece)
 
             # The 6x3 pieces are added in blocks starting from top-left corner.
             # Offset for block coordinates can then be
@@ -278,15 +345,114 @@ class Map:
         # The 0,0 coordinate is on the top-left corner
         return game_map
 
+    @staticmethod
+    def _generate_feature_masks(
+        biomes: bytes, animals: array, structures: array
+    ) -> dict[tuple[str, str], int]:
+        """
+        Form bitboards of the tiles having each feature.
+
+        Args:
+            biomes: Biome letter of each tile
+            animals: Animal code of each tile
+            structures: Structure code of each tile
+
+        Returns:
+            Bitboards keyed by (clue_type, feature), e.g. ("biome", "F") or
+            ("structure", "blue")
+        """
+
+        animal_names = {
+            code: name
+            for name, code in ANIMAL_CODES.items()
+            if name is not None
+        }
+        structure_names = {
+            code: names
+            for names, code in STRUCTURE_CODES.items()
+            if names is not None
+        }
+
+        feature_masks: dict[tuple[str, str], int] = {}
+
+        def add(key: tuple[str, str], index: int) -> None:
+            feature_masks[key] = feature_masks.get(key, 0) | (1 << index)
+
+        for index, biome in enumerate(biomes):
+            add(("biome", chr(biome)), index)
+
+            if animals[index]:
+                add(("animal", animal_names[animals[index]]), index)
+
+            if structures[index]:
+                color, shape = structure_names[structures[index]]
+                add(("structure", color), index)
+                add(("structure", shape), index)
+
+        return feature_masks
+
+    def feature_mask(self, clue_type: str, features) -> int:
+        """
+        Returns the tiles having any of the features, as a bitboard.
+
+        Args:
+            clue_type: Type of the features biome/animal/structure.
+            features: Biomes, animals or structure colors and shapes.
+
+        Returns:
+            Bitboard of the tiles with any of the features
+        """
+
+        mask = 0
+        for feature in features:
+            mask |= self._feature_masks.get((clue_type, feature), 0)
+        return mask
+
+    def tiles_from_mask(self, mask: int) -> frozenset[MapTile]:
+        """
+        Returns the tiles set on a bitboard.
+
+        Args:
+            mask: Bitboard indexed as in cryptidsolver.bitboard
+
+        Returns:
+            Tiles corresponding to the set bits
+        """
+
+        tiles = self._tiles
+        return frozenset(tiles[index] for index in iter_indices(mask))
+
+    def _tile(self, index: int) -> MapTile:
+        """
+        Unchecked tile access by bit index, for library hot paths.
+
+        Args:
+            index: Index of the tile, as in cryptidsolver.bitboard
+
+        Returns:
+            Tile at index
+        """
+        return self._tiles[index]
+
+    @property
+    def map(self) -> list[list[MapTile]]:
+        """
+        Column-major matrix of the tiles. Kept for compatibility, prefer
+        indexing the map directly.
+        """
+        return [
+            list(self._tiles[start : start + _MAP_MAX_Y])
+            for start in range(0, len(self._tiles), _MAP_MAX_Y)
+        ]
+
     def __iter__(self) -> Generator[MapTile, None, None]:
-        for col in self.map:
-            yield from col
+        yield from self._tiles
 
     def __repr__(self) -> str:
         stringify = ""
-        for row in range(len(self.map[0])):
-            for col in range(len(self.map)):
-                element = self.map[col][row]
+        for row in range(_MAP_MAX_Y):
+            for col in range(_MAP_MAX_X):
+                element = self._tiles[col * _MAP_MAX_Y + row]
                 stringify += f"| {element!s:^8} |"
             stringify += "\n"
         return stringify
@@ -302,6 +468,12 @@ class Map:
         assert isinstance(coordinates[1], int), (
             "Second coordinate has to be an integer"
         )
+        assert (
+            1 <= coordinates[0] <= _MAP_MAX_X
+            and 1 <= coordinates[1] <= _MAP_MAX_Y
+        ), "Coordinates have to be within the map"
 
         # Convert from strictly positive coordinates to 0-starting-indexing
-        return self.map[coordinates[0] - 1][coordinates[1] - 1]
+        return self._tiles[
+            (coordinates[0] - 1) * _MAP_MAX_Y + (coordinates[1] - 1)
+        ]
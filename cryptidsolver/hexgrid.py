@@ -0,0 +1,150 @@
+"""
+Cube coordinates for the game's hexagon grid.
+
+The game describes tiles with 1-based (x, y) offset coordinates, x being
+the column. Odd columns neighbour rows y-1 and y of the adjacent columns,
+even columns rows y and y+1. In cube coordinates (q, r, s), with
+q + r + s == 0, the distance of two tiles is a constant-time expression.
+"""
+
+from collections.abc import Generator
+
+from cryptidsolver.constant.limits import _MAP_MAX_X, _MAP_MAX_Y
+
+# Steps to the six neighbours in cube coordinates
+_DIRECTIONS = (
+    (1, 0, -1),
+    (1, -1, 0),
+    (0, -1, 1),
+    (-1, 0, 1),
+    (-1, 1, 0),
+    (0, 1, -1),
+)
+
+
+def to_cube(x: int, y: int) -> tuple[int, int, int]:
+    """
+    Convert offset coordinates to cube coordinates.
+
+    Args:
+        x: x coordinate - left-most column being 1
+        y: y coordinate - top-most row being 1
+
+    Returns:
+        Cube coordinates (q, r, s)
+    """
+
+    col, row = x - 1, y - 1
+    q = col
+    r = row - (col - (col & 1)) // 2
+    return (q, r, -q - r)
+
+
+def from_cube(q: int, r: int, s: int) -> tuple[int, int]:
+    """
+    Convert cube coordinates to offset coordinates.
+
+    Args:
+        q, r, s: Cube coordinates
+
+    Returns:
+        Offset coordinates (x, y), which may lie outside the map
+    """
+
+    assert q + r + s == 0, "Cube coordinates have to sum to zero"
+
+    row = r + (q - (q & 1)) // 2
+    return (q + 1, row + 1)
+
+
+def on_map(x: int, y: int) -> bool:
+    """
+    Check whether offset coordinates lie on the map.
+
+    Args:
+        x: x coordinate - left-most column being 1
+        y: y coordinate - top-most row being 1
+
+    Returns:
+        Whether tile x,y is on the map
+    """
+
+    return 1 <= x <= _MAP_MAX_X and 1 <= y <= _MAP_MAX_Y
+
+
+def hex_distance(a: tuple[int, int], b: tuple[int, int]) -> int:
+    """
+    Number of steps between two tiles.
+
+    Args:
+        a: Offset coordinates (x, y) of the first tile
+        b: Offset coordinates (x, y) of the second tile
+
+    Returns:
+        Distance between the tiles
+    """
+
+    aq, ar, a_s = to_cube(*a)
+    bq, br, b_s = to_cube(*b)
+    return max(abs(aq - bq), abs(ar - br), abs(a_s - b_s))
+
+
+def ring(
+    x: int, y: int, radius: int
+) -> Generator[tuple[int, int], None, None]:
+    """
+    Yields the tiles on the map at exactly radius from tile x,y.
+
+    Args:
+        x: x coordinate - left-most column being 1
+        y: y coordinate - top-most row being 1
+        radius: Distance from the tile
+
+    Returns:
+        Offset coordinates of the tiles
+    """
+
+    if radius == 0:
+        if on_map(x, y):
+            yield (x, y)
+        return
+
+    q, r, s = to_cube(x, y)
+
+    # Start radius steps away and walk the six sides of the ring
+    dq, dr, ds = _DIRECTIONS[4]
+    q, r, s = q + dq * radius, r + dr * radius, s + ds * radius
+
+    for dq, dr, ds in _DIRECTIONS:
+        for _ in range(radius):
+            coordinates = from_cube(q, r, s)
+            if on_map(*coordinates):
+                yield coordinates
+            q, r, s = q + dq, r + dr, s + ds
+
+
+def within(
+    x: int, y: int, radius: int
+) -> Generator[tuple[int, int], None, None]:
+    """
+    Yields the tiles on the map within radius from tile x,y, the tile
+    itself included.
+
+    Args:
+        x: x coordinate - left-most column being 1
+        y: y coordinate - top-most row being 1
+        radius: Distance from the tile
+
+    Returns:
+        Offset coordinates of the tiles
+    """
+
+    q, r, s = to_cube(x, y)
+
+    for dq in range(-radius, radius + 1):
+        lowest = max(-radius, -dq - radius)
+        highest = min(radius, -dq + radius)
+        for dr in range(lowest, highest + 1):
+            coordinates = from_cube(q + dq, r + dr, s - dq - dr)
+            if on_map(*coordinates):
+                yield coordinates
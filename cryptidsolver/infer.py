@@ -1,10 +1,10 @@
 import copy
 
+from cryptidsolver import trace
 from cryptidsolver.clue import Clue
-from cryptidsolver.game import Game
+from cryptidsolver.game import Game, PossibleTiles
 from cryptidsolver.gamemap import Map
 from cryptidsolver.player import Player
-from cryptidsolver.tile import MapTile
 
 
 def possible_clues_for_player(
@@ -43,12 +43,24 @@ def possible_clues_after_cube_placement(
         Set of Clues that would remain possible after cube placement.
     """
 
-    imagined_player = copy.deepcopy(player)
-    imagined_player.cubes.append(placement)
+    with trace.analysis("cube_placement") as record:
+        imagined_player = copy.deepcopy(player)
+        imagined_player.cubes.append(placement)
 
-    return imagined_player.possible_clues(
-        gamemap=gamemap, inverted_clues=inverted_clues
-    )
+        clues = imagined_player.possible_clues(
+            gamemap=gamemap, inverted_clues=inverted_clues
+        )
+
+        if record.active:
+            record.set(
+                map=gamemap.fingerprint[:16],
+                player=player.color,
+                placement=placement,
+                candidates_before=len(player.possible_clues(gamemap)),
+                candidates_after=len(clues),
+            )
+
+    return clues
 
 
 def possible_clues_after_disk_placement(
@@ -70,17 +82,27 @@ def possible_clues_after_disk_placement(
         Set of Clues that would remain possible after disk placement.
     """
 
-    imagined_player = copy.deepcopy(player)
-    imagined_player.disks.append(placement)
+    with trace.analysis("disk_placement") as record:
+        imagined_player = copy.deepcopy(player)
+        imagined_player.disks.append(placement)
+
+        clues = imagined_player.possible_clues(
+            gamemap=gamemap, inverted_clues=inverted_clues
+        )
+
+        if record.active:
+            record.set(
+                map=gamemap.fingerprint[:16],
+                player=player.color,
+                placement=placement,
+                candidates_before=len(player.possible_clues(gamemap)),
+                candidates_after=len(clues),
+            )
 
-    return imagined_player.possible_clues(
-        gamemap=gamemap, inverted_clues=inverted_clues
-    )
+    return clues
 
 
-def possible_tiles(
-    game: Game, inverted_clues: bool = False
-) -> dict[MapTile, float]:
+def possible_tiles(game: Game, inverted_clues: bool = False) -> PossibleTiles:
     """
     Infer possible tiles from the clue possible clue combinations.
 
@@ -89,7 +111,7 @@ def possible_tiles(
         inverted_clues: Playing with inverted clue?
 
     Returns:
-        MapTile with number of clue combinations pointing on them
+        MapTile with the share of clue combinations pointing on them
     """
 
     return game.possible_tiles(inverted_clues)
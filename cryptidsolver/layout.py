@@ -0,0 +1,385 @@
+"""
+Precomputed terrain clue masks for every map layout.
+
+A layout is an ordering of the six map pieces together with their
+headings, giving 6! * 2^6 = 46080 layouts. Clues about biomes and animals
+only depend on the layout, so their accepted tiles can be computed once and
+stored in a table of fixed-width records indexed by the layout number.
+
+The table is generated with:
+
+    python -m cryptidsolver.layout PATH
+
+and taken into use with use_mask_table(PATH), or by pointing the
+CRYPTIDSOLVER_MASK_TABLE environment variable to it. The file is
+memory-mapped on first lookup. A missing file named by the environment
+variable is warned about, and the masks are computed instead.
+"""
+
+import argparse
+import itertools
+import math
+import mmap
+import os
+import struct
+import tempfile
+import warnings
+from collections.abc import Iterable
+
+from cryptidsolver.bitboard import MASK_BYTES, dilate, tile_index
+from cryptidsolver.gamemap import _MAP_DESCRIPTION_LENGTH, Map, MapPiece
+
+N_ORIENTATIONS = 2**_MAP_DESCRIPTION_LENGTH
+N_LAYOUTS = math.factorial(_MAP_DESCRIPTION_LENGTH) * N_ORIENTATIONS
+
+# (clue_type, distance, distance_from) of the clues that only depend on the
+# map pieces. Order defines the order of the masks within a record.
+TERRAIN_CLUES: tuple[tuple[str, int, frozenset[str]], ...] = (
+    *(
+        ("biome", 0, frozenset(pair))
+        for pair in itertools.combinations("FDSWM", 2)
+    ),
+    *(("biome", 1, frozenset(biome)) for biome in "FDSWM"),
+    ("animal", 1, frozenset(("cougar", "bear"))),
+    ("animal", 2, frozenset(("cougar",))),
+    ("animal", 2, frozenset(("bear",))),
+)
+
+_TERRAIN_CLUE_POSITION = {key: num for num, key in enumerate(TERRAIN_CLUES)}
+
+_MAGIC = b"CRYPTIDM"
+_FORMAT_VERSION = 1
+_HEADER = struct.Struct("<8sHHH")
+_HEADER_SIZE = 16
+RECORD_SIZE = len(TERRAIN_CLUES) * MASK_BYTES
+
+_MASK_TABLE_ENV = "CRYPTIDSOLVER_MASK_TABLE"
+
+_PIECES = {
+    "1": MapPiece.P1,
+    "2": MapPiece.P2,
+    "3": MapPiece.P3,
+    "4": MapPiece.P4,
+    "5": MapPiece.P5,
+    "6": MapPiece.P6,
+}
+
+
+def layout_number(description: Iterable[str]) -> int:
+    """
+    Returns the layout number of a map description.
+
+    Args:
+        description: Map pieces (num, heading) in an ordered list, as given
+            to Map.
+
+    Returns:
+        Layout number in range 0 ... N_LAYOUTS - 1
+    """
+
+    description = list(description)
+    pieces = [descriptor[0] for descriptor in description]
+
+    if sorted(pieces) != sorted(_PIECES):
+        raise ValueError("Map description has to use every map piece once")
+
+    rank = 0
+    remaining = sorted(pieces)
+    for piece in pieces:
+        position = remaining.index(piece)
+        rank += position * math.factorial(len(remaining) - 1)
+        remaining.pop(position)
+
+    orientation = 0
+    for num, descriptor in enumerate(description):
+        if descriptor[1].lower() == "s":
+            orientation |= 1 << num
+
+    return rank * N_ORIENTATIONS + orientation
+
+
+def layout_description(number: int) -> list[str]:
+    """
+    Returns the map description of a layout number.
+
+    Args:
+        number: Layout number in range 0 ... N_LAYOUTS - 1
+
+    Returns:
+        Map pieces (num, heading) in an ordered list
+    """
+
+    if not 0 <= number < N_LAYOUTS:
+        raise ValueError(
+            f"Layout number has to be in range 0...{N_LAYOUTS - 1}"
+        )
+
+    rank, orientation = divmod(number, N_ORIENTATIONS)
+
+    remaining = sorted(_PIECES)
+    pieces = []
+    for left in range(len(remaining) - 1, -1, -1):
+        position, rank = divmod(rank, math.factorial(left))
+        pieces.append(remaining.pop(position))
+
+    return [
+        f"{piece}{'S' if orientation & (1 << num) else 'N'}"
+        for num, piece in enumerate(pieces)
+    ]
+
+
+def _piece_features() -> dict[tuple[str, str, int], dict[str, int]]:
+    """
+    Bitboards of every biome and animal for each piece, heading and slot.
+    """
+
+    features = {}
+
+    for piece_num, heading, slot in itertools.product(
+        _PIECES, "NS", range(_MAP_DESCRIPTION_LENGTH)
+    ):
+        map_piece = _PIECES[piece_num].value
+        if heading == "S":
+            map_piece = Map._reverse_map_piece(map_piece)
+
+        y_offset = (slot % 3) * 3
+        x_offset = (slot // 3) * 6
+
+        piece_masks: dict[str, int] = {}
+        for x, col in enumerate(map_piece):
+            for y, biome in enumerate(col):
+                bit = 1 << tile_index(x + x_offset + 1, y + y_offset + 1)
+                piece_masks[biome.biome] = (
+                    piece_masks.get(biome.biome, 0) | bit
+                )
+                if biome.animal is not None:
+                    piece_masks[biome.animal] = (
+                        piece_masks.get(biome.animal, 0) | bit
+                    )
+
+        features[(piece_num, heading, slot)] = piece_masks
+
+    return features
+
+
+_PIECE_FEATURES = _piece_features()
+
+
+def compute_terrain_masks(description: Iterable[str]) -> tuple[int, ...]:
+    """
+    Compute the masks of TERRAIN_CLUES for a map description.
+
+    Args:
+        description: Map pieces (num, heading) in an ordered list.
+
+    Returns:
+        Accepted-tile bitboard of each clue in TERRAIN_CLUES
+    """
+
+    feature_masks: dict[str, int] = {}
+
+    for slot, descriptor in enumerate(description):
+        piece_masks = _PIECE_FEATURES[
+            (descriptor[0], descriptor[1].upper(), slot)
+        ]
+        for feature, mask in piece_masks.items():
+            feature_masks[feature] = feature_masks.get(feature, 0) | mask
+
+    masks = []
+    for _, distance, distance_from in TERRAIN_CLUES:
+        mask = 0
+        for feature in distance_from:
+            mask |= feature_masks.get(feature, 0)
+
+        masks.append(dilate(mask, distance))
+
+    return tuple(masks)
+
+
+def _pack_record(masks: tuple[int, ...]) -> bytes:
+    return b"".join(mask.to_bytes(MASK_BYTES, "little") for mask in masks)
+
+
+def generate_mask_table(
+    path: str | os.PathLike, layouts: Iterable[int] | None = None
+) -> None:
+    """
+    Write the terrain mask table to path.
+
+    Layouts left out are written as zeroed records, which are treated as
+    missing on lookup. The file is replaced atomically.
+
+    Args:
+        path: Destination of the table.
+        layouts: Layout numbers to compute. Defaults to every layout.
+    """
+
+    if layouts is None:
+        layouts = range(N_LAYOUTS)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    header = _HEADER.pack(
+        _MAGIC, _FORMAT_VERSION, len(TERRAIN_CLUES), MASK_BYTES
+    ).ljust(_HEADER_SIZE, b"\0")
+
+    with tempfile.NamedTemporaryFile(dir=directory, delete=False) as handle:
+        try:
+            handle.write(header)
+            handle.truncate(_HEADER_SIZE + N_LAYOUTS * RECORD_SIZE)
+
+            for number in layouts:
+                masks = compute_terrain_masks(layout_description(number))
+                handle.seek(_HEADER_SIZE + number * RECORD_SIZE)
+                handle.write(_pack_record(masks))
+        except BaseException:
+            handle.close()
+            os.unlink(handle.name)
+            raise
+
+    os.chmod(handle.name, 0o644)
+    os.replace(handle.name, path)
+
+
+class MaskTable:
+    """
+    Read-only view to a generated terrain mask table.
+    """
+
+    __slots__ = ("_buffer", "_path")
+
+    def __init__(self, path: str | os.PathLike) -> None:
+        self._path = os.fspath(path)
+        self._buffer: mmap.mmap | None = None
+
+    def _open(self) -> mmap.mmap:
+        with open(self._path, "rb") as handle:
+            buffer = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, n_masks, mask_bytes = _HEADER.unpack_from(buffer)
+        expected_size = _HEADER_SIZE + N_LAYOUTS * RECORD_SIZE
+
+        if (
+            magic != _MAGIC
+            or version != _FORMAT_VERSION
+            or n_masks != len(TERRAIN_CLUES)
+            or mask_bytes != MASK_BYTES
+            or len(buffer) != expected_size
+        ):
+            buffer.close()
+            raise ValueError(f"'{self._path}' is not a compatible mask table")
+
+        return buffer
+
+    def masks(self, number: int) -> tuple[int, ...] | None:
+        """
+        Returns the masks of a layout.
+
+        Args:
+            number: Layout number
+
+        Returns:
+            Masks in TERRAIN_CLUES order, or None if layout is missing
+        """
+
+        if self._buffer is None:
+            self._buffer = self._open()
+
+        offset = _HEADER_SIZE + number * RECORD_SIZE
+        record = self._buffer[offset : offset + RECORD_SIZE]
+
+        if not any(record):
+            return None
+
+        return tuple(
+            int.from_bytes(record[start : start + MASK_BYTES], "little")
+            for start in range(0, RECORD_SIZE, MASK_BYTES)
+        )
+
+    def close(self) -> None:
+        if self._buffer is not None:
+            self._buffer.close()
+            self._buffer = None
+
+
+_mask_table: MaskTable | None = None
+_mask_table_configured = False
+
+
+def use_mask_table(path: str | os.PathLike | None) -> None:
+    """
+    Take a generated mask table into use. None disables the table.
+
+    Args:
+        path: Location of the table generated by generate_mask_table.
+    """
+
+    global _mask_table, _mask_table_configured  # noqa: PLW0603
+
+    if _mask_table is not None:
+        _mask_table.close()
+
+    _mask_table = MaskTable(path) if path is not None else None
+    _mask_table_configured = True
+
+
+def _active_table() -> MaskTable | None:
+    if not _mask_table_configured:
+        path = os.environ.get(_MASK_TABLE_ENV) or None
+        if path is not None and not os.path.isfile(path):
+            # The masks are computed as without a table
+            warnings.warn(
+                f"{_MASK_TABLE_ENV} points to a missing mask table "
+                f"'{path}', computing the masks instead",
+                RuntimeWarning,
+                stacklevel=2,
+            )
+            path = None
+        use_mask_table(path)
+
+    return _mask_table
+
+
+def terrain_mask(
+    gamemap: Map, clue_type: str, distance: int, distance_from: frozenset[str]
+) -> int | None:
+    """
+    Look up the non-inverted mask of a terrain clue from the mask table.
+
+    Args:
+        gamemap: Current gamemap
+        clue_type: Type of clue biome/animal/structure.
+        distance: Distance mentioned on clue.
+        distance_from: Distance from what
+
+    Returns:
+        Accepted-tile bitboard, or None if it is not in the table
+    """
+
+    position = _TERRAIN_CLUE_POSITION.get((clue_type, distance, distance_from))
+    if position is None:
+        return None
+
+    table = _active_table()
+    if table is None:
+        return None
+
+    try:
+        number = layout_number(gamemap.description)
+    except ValueError:
+        return None
+
+    masks = table.masks(number)
+    if masks is None:
+        return None
+
+    return masks[position]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Generate the terrain clue mask table"
+    )
+    parser.add_argument("path", type=str, help="Destination of the table")
+    args = parser.parse_args()
+
+    generate_mask_table(args.path)
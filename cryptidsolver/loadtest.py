@@ -0,0 +1,508 @@
+"""
+Load generator for the solver server.
+
+Replays simulated games, or recorded sessions, as concurrent clients
+against a locally started server and reports the throughput, latency
+percentiles per operation, hit rates of the shared map and clue mask caches
+and the memory of the server over time:
+
+    python -m cryptidsolver.loadtest --clients 8 --games 200 --output r.json
+
+Without --url a server is started as a subprocess, and its resident memory
+is sampled from /proc.
+"""
+
+import argparse
+import http.client
+import json
+import math
+import queue
+import random
+import subprocess
+import sys
+import threading
+import time
+from collections.abc import Callable, Iterable
+from functools import lru_cache
+from http import HTTPStatus
+from pathlib import Path
+from typing import NamedTuple
+from urllib.parse import urlsplit
+
+from cryptidsolver import counters, simulate
+from cryptidsolver.bitboard import index_coordinates
+from cryptidsolver.clue import Clue
+from cryptidsolver.constant.clues import by_booklet_entry
+from cryptidsolver.engine import read_session
+
+_BOOKLETS = {
+    "alpha": "a",
+    "beta": "b",
+    "gamma": "g",
+    "delta": "d",
+    "epsilon": "e",
+}
+_MAX_BOOKLET_ENTRY = 200
+_SHAPES = {"stone": "ss", "shack": "as"}
+_SAMPLE_INTERVAL = 0.5
+
+_OPERATIONS = {
+    "place": "place",
+    "answer": "place",
+    "undo": "place",
+    "location prob": "possible tiles",
+    "possible clues": "possible clues",
+    "infer cube placement": "infer",
+    "question": "question",
+}
+
+
+class Workload(NamedTuple):
+    setup: dict
+    commands: list[str]
+
+
+@lru_cache(maxsize=1)
+def _booklet_notation() -> dict[Clue, str]:
+    notation: dict[Clue, str] = {}
+    for alphabet, letter in _BOOKLETS.items():
+        for number in range(1, _MAX_BOOKLET_ENTRY):
+            try:
+                clue = by_booklet_entry(alphabet, number)
+            except (AssertionError, NotImplementedError):
+                continue
+            notation.setdefault(clue, f"{letter}{number}")
+    return notation
+
+
+def simulated_workloads(
+    n_games: int,
+    n_players: int,
+    seed: int = 0,
+    question_rate: float = 0.0,
+    n_deals: int | None = None,
+) -> list[Workload]:
+    """
+    Simulate games and turn them into the commands of a tablet following
+    the game: every placement is answered, the location probabilities are
+    asked every round, and a question planned at question_rate per round.
+    The first seat is the acting player.
+
+    Args:
+        n_games: Number of games
+        n_players: Number of players
+        seed: Seed of the simulated games
+        question_rate: Probability of planning a question on a round
+        n_deals: Number of distinct deals the games are played on, e.g. to
+            exercise the shared map caches. Defaults to one per game.
+
+    Returns:
+        Session setup and commands of each game
+    """
+
+    rng = random.Random(seed)
+    notation = _booklet_notation()
+    workloads = []
+    deals = [simulate.deal(rng, n_players) for _ in range(n_deals or n_games)]
+
+    for num in range(n_games):
+        setup = deals[num % len(deals)]
+        result = simulate.play(
+            setup, [simulate.NarrowingStrategy() for _ in setup.clues], rng
+        )
+        colors = simulate.PLAYER_COLORS[:n_players]
+
+        body = {
+            "map": list(setup.map_description),
+            "players": [
+                f"{'@' if seat == 0 else ''}{color}_{notation[clue]}"
+                for seat, (color, clue) in enumerate(zip(colors, setup.clues))
+            ],
+            "structures": [
+                f"{structure.color}_{_SHAPES[structure.shape]}_"
+                f"{structure.x},{structure.y}"
+                for structure in setup.structures
+            ],
+        }
+
+        commands = []
+        for placement, (seat, cube, tile) in enumerate(result.moves, start=1):
+            x, y = index_coordinates(tile)
+            commands.append(
+                f"answer {colors[seat]} {'c' if cube else 'd'} {x} {y}"
+            )
+
+            if placement % n_players == 0:
+                commands.append("location prob")
+                if rng.random() < question_rate:
+                    commands.append("question")
+
+        workloads.append(Workload(body, commands))
+
+    return workloads
+
+
+def recorded_workloads(directory: str, pattern: str = "*") -> list[Workload]:
+    """
+    Read the recorded sessions of a directory, see engine.read_session.
+    """
+
+    workloads = []
+    for path in sorted(Path(directory).glob(pattern)):
+        if path.is_file() and not path.name.startswith("."):
+            args, commands = read_session(path)
+            body = {
+                "map": args.map,
+                "players": args.players,
+                "structures": args.structures,
+            }
+            workloads.append(Workload(body, commands))
+    return workloads
+
+
+def operation(cmd: str) -> str:
+    """
+    Returns:
+        Name of the operation a command is reported under
+    """
+
+    for prefix, name in _OPERATIONS.items():
+        if cmd.startswith(prefix):
+            return name
+    return "other"
+
+
+def percentile(ordered: list[float], fraction: float) -> float:
+    """
+    Nearest-rank percentile.
+
+    Args:
+        ordered: Values in ascending order
+        fraction: Percentile as a fraction, e.g. 0.95
+
+    Returns:
+        Smallest value at or above the fraction of the values
+    """
+
+    rank = max(1, math.ceil(round(fraction * len(ordered), 9)))
+    return ordered[rank - 1]
+
+
+class _Client:
+    __slots__ = ("_connection",)
+
+    def __init__(self, host: str, port: int) -> None:
+        self._connection = http.client.HTTPConnection(host, port, timeout=300)
+
+    def request(
+        self, method: str, path: str, body: dict | None = None
+    ) -> tuple[int, dict]:
+        """
+        Raises:
+            ConnectionError: Server unreachable, or the connection dropped
+        """
+
+        try:
+            self._connection.request(
+                method,
+                path,
+                body=None if body is None else json.dumps(body),
+                headers={"Content-Type": "application/json"},
+            )
+            response = self._connection.getresponse()
+            return response.status, json.loads(response.read())
+        except (OSError, http.client.HTTPException, ValueError) as error:
+            # Reconnected on the next request
+            self._connection.close()
+            raise ConnectionError(f"{method} {path}: {error!r}") from error
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+def _rss(pid: int) -> int | None:
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+def start_server(max_bytes: int | None = None) -> tuple[subprocess.Popen, str]:
+    """
+    Start a server on a free local port.
+
+    Returns:
+        Server process and its url
+    """
+
+    command = [sys.executable, "-m", "cryptidsolver.server", "--port", "0"]
+    if max_bytes is not None:
+        command += ["--max-bytes", str(max_bytes)]
+
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    assert process.stdout is not None
+    banner = process.stdout.readline()
+
+    if not banner.startswith("Serving on "):
+        process.kill()
+        raise RuntimeError("Server did not start")
+
+    return process, banner.removeprefix("Serving on ").strip()
+
+
+def _replay(
+    connection: _Client,
+    workload: Workload,
+    record: Callable[[str, float, bool], None],
+) -> None:
+    # A session is abandoned at its first connection error
+    name = "create"
+    started = time.perf_counter()
+    try:
+        status, created = connection.request(
+            "POST", "/sessions", workload.setup
+        )
+        record(
+            name, time.perf_counter() - started, status == HTTPStatus.CREATED
+        )
+        if status != HTTPStatus.CREATED:
+            return
+
+        path = f"/sessions/{created['session']}"
+        for cmd in workload.commands:
+            name = operation(cmd)
+            started = time.perf_counter()
+            status, response = connection.request(
+                "POST", f"{path}/commands", {"command": cmd}
+            )
+            record(
+                name,
+                time.perf_counter() - started,
+                status == HTTPStatus.OK and response["ok"],
+            )
+
+        name = "close"
+        connection.request("DELETE", path)
+    except ConnectionError:
+        record(name, time.perf_counter() - started, False)
+
+
+def _server_counts(connection: _Client) -> dict:
+    _, stats = connection.request("GET", "/stats")
+    _, snapshot = connection.request("GET", "/metrics")
+    return {**stats, **snapshot["counters"]}
+
+
+def _hit_rate(hits: int, misses: int) -> dict:
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / (hits + misses) if hits + misses else None,
+    }
+
+
+def _report(
+    latencies: dict[str, list[float]],
+    failures: dict[str, int],
+    before: dict,
+    after: dict,
+) -> dict:
+    def delta(key: str) -> int:
+        return after.get(key, 0) - before.get(key, 0)
+
+    report: dict = {
+        "operations": sum(len(values) for values in latencies.values()),
+        "latency": {},
+        "cache": {
+            "maps": _hit_rate(delta("map_hits"), delta("map_misses")),
+            "clue_masks": _hit_rate(
+                delta(counters.CLUE_MASK_HITS),
+                delta(counters.CLUE_MASK_MISSES),
+            ),
+            "evictions": delta("evictions"),
+        },
+    }
+
+    for name, values in sorted(latencies.items()):
+        ordered = sorted(values)
+        report["latency"][name] = {
+            "count": len(ordered),
+            "failures": failures.get(name, 0),
+            "p50": percentile(ordered, 0.50),
+            "p95": percentile(ordered, 0.95),
+            "p99": percentile(ordered, 0.99),
+            "max": ordered[-1],
+        }
+
+    return report
+
+
+def _memory(samples: list[tuple[float, int]]) -> dict | None:
+    if not samples:
+        return None
+
+    return {
+        "start": samples[0][1],
+        "end": samples[-1][1],
+        "peak": max(rss for _, rss in samples),
+        "growth": samples[-1][1] - samples[0][1],
+        "samples": samples,
+    }
+
+
+def run(
+    url: str,
+    workloads: Iterable[Workload],
+    n_clients: int,
+    pid: int | None = None,
+) -> dict:
+    """
+    Replay the workloads with concurrent clients, each running a session at
+    a time. A session hitting a connection error is abandoned and counted
+    as a failure of the operation.
+
+    Args:
+        url: Server url, e.g. http://127.0.0.1:8765
+        workloads: Sessions to replay
+        n_clients: Number of concurrent clients
+        pid: Process id of the server for sampling its memory
+
+    Returns:
+        Report of the run
+    """
+
+    address = urlsplit(url)
+    host, port = address.hostname or "127.0.0.1", address.port or 80
+
+    pending: queue.SimpleQueue[Workload] = queue.SimpleQueue()
+    for workload in workloads:
+        pending.put(workload)
+
+    latencies: dict[str, list[float]] = {}
+    failures: dict[str, int] = {}
+    lock = threading.Lock()
+
+    def record(name: str, elapsed: float, ok: bool) -> None:
+        with lock:
+            latencies.setdefault(name, []).append(elapsed)
+            if not ok:
+                failures[name] = failures.get(name, 0) + 1
+
+    def client() -> None:
+        connection = _Client(host, port)
+        try:
+            while True:
+                try:
+                    workload = pending.get_nowait()
+                except queue.Empty:
+                    return
+                _replay(connection, workload, record)
+        finally:
+            connection.close()
+
+    samples: list[tuple[float, int]] = []
+    done = threading.Event()
+    started = time.perf_counter()
+
+    def sample() -> None:
+        while pid is not None:
+            rss = _rss(pid)
+            if rss is not None:
+                samples.append((time.perf_counter() - started, rss))
+            if done.wait(_SAMPLE_INTERVAL):
+                return
+
+    stats_connection = _Client(host, port)
+    before = _server_counts(stats_connection)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    clients = [threading.Thread(target=client) for _ in range(n_clients)]
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+
+    duration = time.perf_counter() - started
+    done.set()
+    sampler.join()
+    if pid is not None and (rss := _rss(pid)) is not None:
+        samples.append((duration, rss))
+
+    after = _server_counts(stats_connection)
+    stats_connection.close()
+
+    operations = _report(latencies, failures, before, after)
+    return {
+        "clients": n_clients,
+        "duration": duration,
+        "operations": operations["operations"],
+        "throughput": operations["operations"] / duration if duration else 0.0,
+        "latency": operations["latency"],
+        "cache": operations["cache"],
+        "memory": _memory(samples),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the solver server")
+    parser.add_argument("--url", type=str, help="Server to test")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument(
+        "--sessions", type=str, help="Directory of recorded sessions"
+    )
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--deals", type=int, default=None, help="Distinct simulated deals"
+    )
+    parser.add_argument("--question-rate", type=float, default=0.0)
+    parser.add_argument("--max-bytes", type=int, default=None)
+    parser.add_argument("--output", type=str, help="File for the report")
+    args = parser.parse_args()
+
+    if args.sessions is not None:
+        workloads = recorded_workloads(args.sessions)
+    else:
+        workloads = simulated_workloads(
+            args.games,
+            args.players,
+            args.seed,
+            args.question_rate,
+            args.deals,
+        )
+
+    process = None
+    url = args.url
+    if url is None:
+        process, url = start_server(args.max_bytes)
+
+    try:
+        report = run(
+            url,
+            workloads,
+            args.clients,
+            pid=None if process is None else process.pid,
+        )
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    if args.output is not None:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+
+    summary = {key: value for key, value in report.items() if key != "memory"}
+    if report["memory"] is not None:
+        summary["memory"] = {
+            key: value
+            for key, value in report["memory"].items()
+            if key != "samples"
+        }
+    print(json.dumps(summary, indent=2))
@@ -0,0 +1,236 @@
+"""
+Opt-in timing of the solver hot paths.
+
+While disabled, the instrumented functions are the plain functions, so the
+metrics cost nothing. enable() swaps in wrappers recording the number of
+calls and the cumulative and maximum durations of each function, and
+snapshot() reports them together with the counters of
+cryptidsolver.counters and the in-memory cache statistics:
+
+    metrics.enable()
+    game.possible_tiles().counts()
+    print(metrics.to_json())
+    metrics.reset()
+
+Durations are inclusive: the time of PossibleTiles.counts contains the clue
+evaluations it makes. Wrappers only see calls made through the module or
+class attribute, e.g. not those of functions imported by name before
+enable().
+"""
+
+import importlib
+import json
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable, Generator
+from contextlib import contextmanager
+from functools import wraps
+from typing import NamedTuple
+
+from cryptidsolver import counters
+from cryptidsolver.clue import Clue
+from cryptidsolver.solutions import solution_table
+
+
+class _Target(NamedTuple):
+    module: str
+    owner: str | None
+    attribute: str
+    # Counter whose amount per call is reported, e.g. the combination space
+    counter: str | None = None
+
+    @property
+    def name(self) -> str:
+        prefix = self.owner or self.module.rsplit(".", 1)[-1]
+        return f"{prefix}.{self.attribute}"
+
+    def resolve(self) -> object:
+        owner = importlib.import_module(self.module)
+        if self.owner is not None:
+            owner = getattr(owner, self.owner)
+        return owner
+
+
+TARGETS = (
+    _Target("cryptidsolver.clue", "Clue", "accepted_tiles"),
+    _Target("cryptidsolver.player", "Player", "possible_clues"),
+    _Target("cryptidsolver.game", "Game", "possible_tiles"),
+    _Target(
+        "cryptidsolver.game",
+        "PossibleTiles",
+        "counts",
+        counters.COMBINATIONS,
+    ),
+    _Target("cryptidsolver.infer", None, "possible_clues_for_player"),
+    _Target(
+        "cryptidsolver.infer", None, "possible_clues_after_cube_placement"
+    ),
+    _Target(
+        "cryptidsolver.infer", None, "possible_clues_after_disk_placement"
+    ),
+    _Target("cryptidsolver.infer", None, "possible_tiles"),
+    _Target("cryptidsolver.engine", None, "plan_question"),
+)
+
+
+class _Timing:
+    __slots__ = ("amount", "calls", "max", "max_amount", "total")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.amount = 0
+        self.max_amount = 0
+
+    def as_dict(self, counter: str | None) -> dict:
+        timing: dict[str, float | dict[str, int]] = {
+            "calls": self.calls,
+            "total": self.total,
+            "max": self.max,
+            "mean": self.total / self.calls if self.calls else 0.0,
+        }
+        if counter is not None:
+            timing[counter] = {"total": self.amount, "max": self.max_amount}
+        return timing
+
+
+_lock = threading.Lock()
+_originals: dict[_Target, Callable] = {}
+_timings: dict[_Target, _Timing] = {}
+_counts_at_reset: Counter[str] = Counter()
+
+
+def _wrap(target: _Target, function: Callable) -> Callable:
+    _timings.setdefault(target, _Timing())
+    counter = target.counter
+
+    @wraps(function)
+    def timed(*args, **kwargs):
+        before = counters.value(counter) if counter is not None else 0
+        started = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            amount = (
+                counters.value(counter) - before if counter is not None else 0
+            )
+            with _lock:
+                # Looked up per call, as reset() starts afresh
+                timing = _timings[target]
+                timing.calls += 1
+                timing.total += elapsed
+                timing.max = max(timing.max, elapsed)
+                timing.amount += amount
+                timing.max_amount = max(timing.max_amount, amount)
+
+    # Keep the interface of lru_cache wrapped functions
+    for attribute in ("cache_info", "cache_clear"):
+        if hasattr(function, attribute):
+            setattr(timed, attribute, getattr(function, attribute))
+
+    return timed
+
+
+def enabled() -> bool:
+    return bool(_originals)
+
+
+def enable() -> None:
+    """
+    Start timing the instrumented functions. No-op when already enabled.
+    """
+
+    if _originals:
+        return
+
+    for target in TARGETS:
+        owner = target.resolve()
+        function = getattr(owner, target.attribute)
+        _originals[target] = function
+        setattr(owner, target.attribute, _wrap(target, function))
+
+
+def disable() -> None:
+    """
+    Restore the plain functions. Collected metrics are kept until reset.
+    """
+
+    for target, function in _originals.items():
+        setattr(target.resolve(), target.attribute, function)
+    _originals.clear()
+
+
+def reset() -> None:
+    """
+    Forget the collected metrics, e.g. at the start of a game or request.
+    """
+
+    with _lock:
+        for target in _timings:
+            _timings[target] = _Timing()
+        _counts_at_reset.clear()
+        _counts_at_reset.update(counters.snapshot())
+
+
+def snapshot() -> dict:
+    """
+    Returns:
+        JSON serializable metrics collected since the latest reset
+    """
+
+    with _lock:
+        timings = {
+            target.name: timing.as_dict(target.counter)
+            for target, timing in _timings.items()
+            if timing.calls
+        }
+        counts = dict(Counter(counters.snapshot()) - _counts_at_reset)
+
+    # lru_cache statistics are process-wide, not since the latest reset. The
+    # timing wrappers keep the cache interface, which pylint cannot see.
+    # pylint: disable=no-value-for-parameter
+    caches = {
+        "Clue.accepted_tiles": Clue.accepted_tiles.cache_info()._asdict(),
+        "solution_table": solution_table.cache_info()._asdict(),
+    }
+    # pylint: enable=no-value-for-parameter
+
+    return {
+        "enabled": enabled(),
+        "timings": timings,
+        "counters": counts,
+        "caches": caches,
+    }
+
+
+def to_json(indent: int | None = None) -> str:
+    """
+    Returns:
+        Snapshot of the metrics as JSON
+    """
+    return json.dumps(snapshot(), indent=indent)
+
+
+@contextmanager
+def collecting() -> Generator[dict, None, None]:
+    """
+    Collect the metrics of a block, e.g. a single game. Resets the metrics
+    and enables them for the block.
+
+    Returns:
+        Dictionary filled with the snapshot when the block exits
+    """
+
+    was_enabled = enabled()
+    reset()
+    enable()
+    report: dict = {}
+    try:
+        yield report
+    finally:
+        report.update(snapshot())
+        if not was_enabled:
+            disable()
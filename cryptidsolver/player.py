@@ -1,10 +1,82 @@
+from collections.abc import Iterable
+from typing import SupportsIndex
+
+from cryptidsolver import backends
+from cryptidsolver.bitboard import coordinates_mask, tile_index
 from cryptidsolver.clue import Clue
-from cryptidsolver.constant.clues import CLUE_COLLECTION, THREE_FROM_BLACK
 from cryptidsolver.gamemap import Map
 
 
+class Placements(list):
+    """
+    List of x,y coordinates of placed cubes or disks. Keeps a bitboard of
+    the coordinates in sync with the list. Reordering in place, with sort
+    or reverse, keeps the bitboard as is.
+    """
+
+    __slots__ = ("mask",)
+
+    def __init__(self, coordinates: Iterable[tuple[int, int]] = ()) -> None:
+        super().__init__(coordinates)
+        self.mask = coordinates_mask(self)
+
+    def __reduce__(self):
+        return (Placements, (list(self),))
+
+    def _unset(self, coordinates: tuple[int, int]) -> None:
+        if coordinates not in self:
+            self.mask &= ~(1 << tile_index(*coordinates))
+
+    def append(self, coordinates: tuple[int, int]) -> None:
+        super().append(coordinates)
+        self.mask |= 1 << tile_index(*coordinates)
+
+    def extend(self, coordinates: Iterable[tuple[int, int]]) -> None:
+        for pair in coordinates:
+            self.append(pair)
+
+    def insert(self, index, coordinates: tuple[int, int]) -> None:
+        super().insert(index, coordinates)
+        self.mask |= 1 << tile_index(*coordinates)
+
+    def remove(self, coordinates: tuple[int, int]) -> None:
+        super().remove(coordinates)
+        self._unset(coordinates)
+
+    def pop(self, index=-1) -> tuple[int, int]:
+        coordinates = super().pop(index)
+        self._unset(coordinates)
+        return coordinates
+
+    def clear(self) -> None:
+        super().clear()
+        self.mask = 0
+
+    def __setitem__(self, index, value) -> None:
+        super().__setitem__(index, value)
+        self.mask = coordinates_mask(self)
+
+    def __delitem__(self, index) -> None:
+        super().__delitem__(index)
+        self.mask = coordinates_mask(self)
+
+    # Same operand as list.__iadd__. mypy checks it against the list[_S]
+    # overload of list.__add__, which no list subclass can satisfy.
+    def __iadd__(  # type: ignore[misc, override]
+        self, coordinates: Iterable[tuple[int, int]]
+    ) -> "Placements":
+        self.extend(coordinates)
+        return self
+
+    def __imul__(self, times: SupportsIndex) -> "Placements":
+        super().__imul__(times)
+        # Repeating keeps the coordinates, unless it empties the list
+        self.mask = coordinates_mask(self)
+        return self
+
+
 class Player:
-    __slots__ = ("clue", "color", "cubes", "disks", "teamname")
+    __slots__ = ("_cubes", "_disks", "clue", "color", "teamname")
 
     def __init__(
         self,
@@ -16,34 +88,48 @@ class Player:
         self.color = color
         self.teamname = teamname
         self.clue = clue
-        self.cubes: list[tuple[int, int]] = []
-        self.disks: list[tuple[int, int]] = []
+        self._cubes = Placements()
+        self._disks = Placements()
+
+    @property
+    def cubes(self) -> Placements:
+        return self._cubes
+
+    @cubes.setter
+    def cubes(self, coordinates: Iterable[tuple[int, int]]) -> None:
+        self._cubes = Placements(coordinates)
+
+    @property
+    def disks(self) -> Placements:
+        return self._disks
+
+    @disks.setter
+    def disks(self, coordinates: Iterable[tuple[int, int]]) -> None:
+        self._disks = Placements(coordinates)
+
+    def public_view(self) -> "Player":
+        """
+        Returns the player as seen by others: same placements, which stay
+        in sync with this player, but an unknown clue.
+
+        Returns:
+            Player sharing the placements of this player
+        """
+
+        view = Player(self.color, clue=None, teamname=self.teamname)
+        view._cubes = self._cubes
+        view._disks = self._disks
+        return view
 
     def possible_clues(
         self, gamemap: Map, inverted_clues: bool = False
     ) -> frozenset[Clue]:
-        possible_clues = set()
-
         if inverted_clues:
             raise NotImplementedError(
                 "Missing implementation for inverted clues"
             )
-        clues = CLUE_COLLECTION.difference({THREE_FROM_BLACK})
-
-        for clue in clues:
-            # Clue is possible only if it accepts all disk locations and refuses all cube locations
-            if all(
-                gamemap[disk[0], disk[1]] in clue.accepted_tiles(gamemap)
-                for disk in self.disks
-            ):
-                if all(
-                    gamemap[cube[0], cube[1]]
-                    not in clue.accepted_tiles(gamemap)
-                    for cube in self.cubes
-                ):
-                    possible_clues.add(clue)
-
-        return frozenset(possible_clues)
+
+        return backends.active().possible_clues(self, gamemap)
 
     def __repr__(self) -> str:
         return f"{self.color.capitalize()} player"
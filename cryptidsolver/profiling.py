@@ -0,0 +1,137 @@
+"""
+Per-command profiles of the solver engine.
+
+Every command is run under cProfile, and its profile is written to a file
+numbered after the command, e.g. 0003-question.prof. Profiles are written
+either as pstats files, for python -m pstats or snakeviz, or as collapsed
+stacks for flamegraph tools:
+
+    flamegraph.pl 0003-question.folded > question.svg
+
+cProfile records the callers of each function, not whole stacks, so the
+collapsed stacks split the time of a function between its callers in
+proportion to the time it spent under each of them.
+"""
+
+import cProfile
+import os
+import pstats
+import re
+from pathlib import Path
+
+FORMATS = ("pstats", "collapsed")
+
+_SUFFIXES = {"pstats": ".prof", "collapsed": ".folded"}
+
+_Function = tuple[str, int, str]
+
+
+def _label(function: _Function) -> str:
+    filename, line, name = function
+    if filename == "~":
+        # Built-in function, e.g. "<built-in method builtins.len>"
+        return name.strip("<>")
+    return f"{name} ({Path(filename).name}:{line})"
+
+
+def collapsed_stacks(stats: pstats.Stats) -> dict[str, int]:
+    """
+    Expand the caller graph of a profile into stacks.
+
+    Args:
+        stats: Profile of a command
+
+    Returns:
+        Self time in microseconds by semicolon separated stack, root first
+    """
+
+    # function -> (primitive calls, calls, self time, cumulative, callers)
+    entries = stats.stats  # type: ignore[attr-defined]
+    callees: dict[_Function, list[_Function]] = {}
+    for function, (*_, callers) in entries.items():
+        for caller in callers:
+            callees.setdefault(caller, []).append(function)
+
+    stacks: dict[str, int] = {}
+
+    def expand(
+        function: _Function, path: tuple[_Function, ...], time: float
+    ) -> None:
+        _, _, self_time, cumulative, _ = entries[function]
+        if cumulative <= 0 or time <= 0:
+            return
+
+        scale = time / cumulative
+        stack = ";".join(_label(frame) for frame in (*path, function))
+        weight = round(self_time * scale * 1e6)
+        if weight:
+            stacks[stack] = stacks.get(stack, 0) + weight
+
+        for callee in callees.get(function, ()):
+            # Recursion is folded into the outermost call
+            if callee in path or callee == function:
+                continue
+            edge_cumulative = entries[callee][4][function][3]
+            expand(callee, (*path, function), edge_cumulative * scale)
+
+    for function, (*_, cumulative, callers) in entries.items():
+        # Skip the profiler disabling itself
+        if not callers and "_lsprof" not in function[2]:
+            expand(function, (), cumulative)
+
+    return stacks
+
+
+class CommandProfiler:
+    """
+    Profiles commands into numbered files of a directory.
+    """
+
+    __slots__ = ("_count", "directory", "format")
+
+    def __init__(
+        self,
+        directory: str | os.PathLike,
+        format: str = "pstats",  # pylint: disable=redefined-builtin
+    ) -> None:
+        """
+        Args:
+            directory: Directory for the profiles, created if needed
+            format: 'pstats' or 'collapsed'
+        """
+
+        if format not in FORMATS:
+            raise ValueError(f"Profile format has to be one of {FORMATS}")
+
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.format = format
+        self._count = 0
+
+    def write(self, cmd: str, profiler: cProfile.Profile) -> Path:
+        """
+        Write the profile of a command.
+
+        Args:
+            cmd: Profiled command
+            profiler: Profile of the command
+
+        Returns:
+            Path of the written profile
+        """
+
+        self._count += 1
+        slug = re.sub(r"[^a-z0-9]+", "-", cmd.lower()).strip("-")
+        path = self.directory / (
+            f"{self._count:04d}-{slug}{_SUFFIXES[self.format]}"
+        )
+
+        if self.format == "pstats":
+            profiler.dump_stats(path)
+        else:
+            stacks = collapsed_stacks(pstats.Stats(profiler))
+            with open(path, "w", encoding="utf-8") as handle:
+                for stack, weight in sorted(stacks.items()):
+                    handle.write(f"{stack} {weight}\n")
+
+        return path
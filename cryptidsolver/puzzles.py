@@ -0,0 +1,225 @@
+"""
+Generate valid puzzles: a map layout, structure locations and a clue per
+player, where the clues single out a single tile and every clue is needed
+for it.
+
+Instead of sampling clues per setup, every valid clue combination of a
+sampled setup is enumerated from the clue masks. puzzles() yields them as
+a lazy stream, and a deduplicated corpus is written with:
+
+    python -m cryptidsolver.puzzles PATH --puzzles N --players N
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+from collections.abc import Generator, Iterable
+from typing import NamedTuple
+
+from cryptidsolver.bitboard import BOARD_SIZE, index_coordinates
+from cryptidsolver.constant.clues import ORDERED_CLUES
+from cryptidsolver.gamemap import _NON_INVERTED_GAME_STRUCTURE_COUNT, Map
+from cryptidsolver.layout import N_LAYOUTS, layout_description
+from cryptidsolver.simulate import BASE_STRUCTURES, Setup
+from cryptidsolver.solutions import is_irredundant, solution_table
+from cryptidsolver.structure import Structure
+
+
+class Puzzle(NamedTuple):
+    """
+    A puzzle in compact form.
+
+    layout: Layout number of the map
+    structures: Tile indices of the structures, in BASE_STRUCTURES order
+    clues: Ascending positions of the clues in ORDERED_CLUES
+    tile: Tile index of the cryptid
+    """
+
+    layout: int
+    structures: tuple[int, ...]
+    clues: tuple[int, ...]
+    tile: int
+
+    def setup(self) -> Setup:
+        """
+        Returns:
+            The puzzle as a simulation setup, clues in seat order
+        """
+
+        return Setup(
+            tuple(layout_description(self.layout)),
+            _structures(self.structures),
+            tuple(ORDERED_CLUES[position] for position in self.clues),
+        )
+
+
+def _structures(locations: Iterable[int]) -> tuple[Structure, ...]:
+    return tuple(
+        Structure(color, shape, *index_coordinates(index))
+        for (color, shape), index in zip(BASE_STRUCTURES, locations)
+    )
+
+
+def puzzles_for(
+    layout: int, locations: tuple[int, ...], n_players: int
+) -> list[Puzzle]:
+    """
+    Every valid puzzle of a setup.
+
+    Args:
+        layout: Layout number of the map
+        locations: Tile indices of the structures, in BASE_STRUCTURES order
+        n_players: Number of clues in a puzzle
+
+    Returns:
+        Puzzles in ascending order of clue positions
+    """
+
+    gamemap = Map(layout_description(layout), list(_structures(locations)))
+    masks = [clue.accepted_mask(gamemap) for clue in ORDERED_CLUES]
+
+    return [
+        Puzzle(layout, locations, clues, tile)
+        for clues, tile in sorted(solution_table(gamemap, n_players).items())
+        if is_irredundant([masks[position] for position in clues])
+    ]
+
+
+def puzzles(
+    rng: random.Random, n_players: int, per_setup: int | None = None
+) -> Generator[Puzzle, None, None]:
+    """
+    Endless stream of puzzles on randomly sampled setups.
+
+    Args:
+        rng: Source of randomness
+        n_players: Number of clues in a puzzle
+        per_setup: Puzzles drawn from each setup at most. Defaults to all.
+
+    Returns:
+        Puzzles, grouped by setup
+
+    Raises:
+        ValueError: per_setup is below 1
+    """
+
+    # Checked before the stream starts, as no setup would yield a puzzle
+    if per_setup is not None and per_setup < 1:
+        raise ValueError("Puzzles per setup have to be at least 1")
+    return _stream(rng, n_players, per_setup)
+
+
+def _stream(
+    rng: random.Random, n_players: int, per_setup: int | None
+) -> Generator[Puzzle, None, None]:
+    while True:
+        layout = rng.randrange(N_LAYOUTS)
+        locations = tuple(
+            rng.sample(range(BOARD_SIZE), _NON_INVERTED_GAME_STRUCTURE_COUNT)
+        )
+        found = puzzles_for(layout, locations, n_players)
+
+        if per_setup is not None and len(found) > per_setup:
+            found = rng.sample(found, per_setup)
+
+        yield from found
+
+
+def _to_json(puzzle: Puzzle) -> str:
+    return json.dumps(puzzle._asdict())
+
+
+def _from_json(line: str) -> Puzzle:
+    record = json.loads(line)
+    return Puzzle(
+        record["layout"],
+        tuple(record["structures"]),
+        tuple(record["clues"]),
+        record["tile"],
+    )
+
+
+def write_corpus(
+    path: str | os.PathLike,
+    n_puzzles: int,
+    n_players: int,
+    seed: int = 0,
+    per_setup: int | None = None,
+) -> None:
+    """
+    Write distinct puzzles as JSON lines to path. The file is replaced
+    atomically.
+
+    Args:
+        path: Destination of the corpus
+        n_puzzles: Number of puzzles
+        n_players: Number of clues in a puzzle
+        seed: Seed of the sampled setups
+        per_setup: Puzzles drawn from each setup at most. Defaults to all.
+
+    Raises:
+        ValueError: per_setup is below 1
+    """
+
+    directory = os.path.dirname(os.path.abspath(path))
+    seen: set[Puzzle] = set()
+    stream = puzzles(random.Random(seed), n_players, per_setup)
+
+    with tempfile.NamedTemporaryFile(
+        "w", dir=directory, delete=False, encoding="utf-8"
+    ) as handle:
+        try:
+            for puzzle in stream:
+                if len(seen) == n_puzzles:
+                    break
+                if puzzle in seen:
+                    continue
+
+                seen.add(puzzle)
+                handle.write(_to_json(puzzle) + "\n")
+        except BaseException:
+            handle.close()
+            os.unlink(handle.name)
+            raise
+
+    os.chmod(handle.name, 0o644)
+    os.replace(handle.name, path)
+
+
+def read_corpus(path: str | os.PathLike) -> Generator[Puzzle, None, None]:
+    """
+    Yields the puzzles of a corpus written by write_corpus.
+
+    Args:
+        path: Location of the corpus
+    """
+
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            if line.strip():
+                yield _from_json(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Write a corpus of distinct valid puzzles"
+    )
+    parser.add_argument("path", type=str, help="Destination of the corpus")
+    parser.add_argument("--puzzles", type=int, required=True)
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--per-setup",
+        type=int,
+        default=None,
+        help="Puzzles drawn from each setup at most",
+    )
+    args = parser.parse_args()
+    if args.per_setup is not None and args.per_setup < 1:
+        parser.error("--per-setup has to be at least 1")
+
+    write_corpus(
+        args.path, args.puzzles, args.players, args.seed, args.per_setup
+    )
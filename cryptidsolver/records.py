@@ -0,0 +1,282 @@
+"""
+Compact binary format for archived games.
+
+A file starts with a file header, followed by the games back to back. Each
+game is a fixed-width setup header and a fixed-width record per move:
+
+    layout number       u16
+    number of players   u8
+    winning seat        u8, 0xFF without a winner
+    number of moves     u32
+    structure codes     8 x u8, STRUCTURE_CODES, 0 for an unused slot
+    structure tiles     8 x u8, tile indices
+    clues               5 x u8, positions in ORDERED_CLUES, 0xFF if unknown
+
+    move                u8 seat, u8 tile index with the high bit set for
+                        a cube
+
+RecordReader memory-maps the file and iterates the games without copying
+or building Game objects.
+"""
+
+import mmap
+import os
+import struct
+import weakref
+from collections.abc import Generator, Iterable
+from typing import NamedTuple
+
+from cryptidsolver.bitboard import tile_index
+from cryptidsolver.constant.clues import ORDERED_CLUES
+from cryptidsolver.constant.limits import _MAX_PLAYERS
+from cryptidsolver.gamemap import STRUCTURE_CODES
+from cryptidsolver.layout import layout_number
+from cryptidsolver.simulate import GameResult, Move
+
+_MAGIC = b"CRYPTIDG"
+_FORMAT_VERSION = 1
+_FILE_HEADER = struct.Struct("<8sH6x")
+
+_MAX_STRUCTURES = len(STRUCTURE_CODES) - 1
+_GAME_HEADER = struct.Struct(
+    f"<HBBI{_MAX_STRUCTURES}B{_MAX_STRUCTURES}B{_MAX_PLAYERS}B3x"
+)
+_MOVE = struct.Struct("<BB")
+
+_UNSET = 0xFF
+_CUBE_BIT = 0x80
+
+_CLUE_POSITIONS = {clue: num for num, clue in enumerate(ORDERED_CLUES)}
+
+
+class GameRecord(NamedTuple):
+    """
+    A game in compact form.
+
+    layout: Layout number of the map
+    structures: (STRUCTURE_CODES code, tile index) of each structure
+    clues: Position in ORDERED_CLUES of the clue of each seat, None if
+        unknown
+    winner: Winning seat, None without a winner
+    moves: Placements in the order they were made
+    """
+
+    layout: int
+    structures: tuple[tuple[int, int], ...]
+    clues: tuple[int | None, ...]
+    winner: int | None
+    moves: tuple[Move, ...]
+
+
+def from_result(result: GameResult) -> GameRecord:
+    """
+    Args:
+        result: Simulated game
+
+    Returns:
+        The game as a record
+    """
+
+    setup = result.setup
+
+    return GameRecord(
+        layout_number(setup.map_description),
+        tuple(
+            (
+                STRUCTURE_CODES[(structure.color, structure.shape)],
+                tile_index(structure.x, structure.y),
+            )
+            for structure in setup.structures
+        ),
+        tuple(_CLUE_POSITIONS.get(clue) for clue in setup.clues),
+        result.winner,
+        result.moves,
+    )
+
+
+def _pack(record: GameRecord) -> bytes:
+    if len(record.structures) > _MAX_STRUCTURES:
+        raise ValueError(f"Games have at most {_MAX_STRUCTURES} structures")
+    if len(record.clues) > _MAX_PLAYERS:
+        raise ValueError(f"Games have at most {_MAX_PLAYERS} players")
+
+    unused = _MAX_STRUCTURES - len(record.structures)
+    codes = [code for code, _ in record.structures] + [0] * unused
+    tiles = [tile for _, tile in record.structures] + [0] * unused
+    clues = [_UNSET if clue is None else clue for clue in record.clues]
+    clues += [_UNSET] * (_MAX_PLAYERS - len(clues))
+
+    header = _GAME_HEADER.pack(
+        record.layout,
+        len(record.clues),
+        _UNSET if record.winner is None else record.winner,
+        len(record.moves),
+        *codes,
+        *tiles,
+        *clues,
+    )
+
+    moves = bytearray(_MOVE.size * len(record.moves))
+    for num, (seat, cube, tile) in enumerate(record.moves):
+        _MOVE.pack_into(
+            moves, num * _MOVE.size, seat, tile | (_CUBE_BIT if cube else 0)
+        )
+
+    return header + moves
+
+
+class RecordWriter:
+    """
+    Appends games to a record file, creating it if needed.
+    """
+
+    __slots__ = ("_handle",)
+
+    def __init__(self, path: str | os.PathLike) -> None:
+        self._handle = open(path, "ab")
+
+        if self._handle.tell() == 0:
+            self._handle.write(_FILE_HEADER.pack(_MAGIC, _FORMAT_VERSION))
+
+    def write(self, records: Iterable[GameRecord]) -> None:
+        """
+        Append games with a single write.
+
+        Args:
+            records: Games to append
+        """
+
+        self._handle.write(b"".join(_pack(record) for record in records))
+
+    def close(self) -> None:
+        self._handle.close()
+
+    def __enter__(self) -> "RecordWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class RecordView:
+    """
+    A game within a memory-mapped record file. Valid until the reader is
+    closed.
+    """
+
+    __slots__ = ("_header", "_moves")
+
+    def __init__(self, header: tuple, moves: memoryview) -> None:
+        self._header = header
+        self._moves = moves
+
+    @property
+    def layout(self) -> int:
+        return self._header[0]
+
+    @property
+    def n_players(self) -> int:
+        return self._header[1]
+
+    @property
+    def winner(self) -> int | None:
+        winner = self._header[2]
+        return None if winner == _UNSET else winner
+
+    @property
+    def n_moves(self) -> int:
+        return self._header[3]
+
+    @property
+    def structures(self) -> tuple[tuple[int, int], ...]:
+        codes = self._header[4 : 4 + _MAX_STRUCTURES]
+        tiles = self._header[4 + _MAX_STRUCTURES : 4 + 2 * _MAX_STRUCTURES]
+        return tuple(
+            (code, tile) for code, tile in zip(codes, tiles) if code != 0
+        )
+
+    @property
+    def clues(self) -> tuple[int | None, ...]:
+        start = 4 + 2 * _MAX_STRUCTURES
+        return tuple(
+            None if clue == _UNSET else clue
+            for clue in self._header[start : start + self.n_players]
+        )
+
+    @property
+    def raw_moves(self) -> memoryview:
+        """
+        Returns:
+            The move records as they are in the file
+        """
+        return self._moves
+
+    def moves(self) -> Generator[Move, None, None]:
+        for seat, packed in _MOVE.iter_unpack(self._moves):
+            yield Move(seat, bool(packed & _CUBE_BIT), packed & ~_CUBE_BIT)
+
+    def record(self) -> GameRecord:
+        return GameRecord(
+            self.layout,
+            self.structures,
+            self.clues,
+            self.winner,
+            tuple(self.moves()),
+        )
+
+
+class RecordReader:
+    """
+    Read-only, memory-mapped view to a record file.
+    """
+
+    __slots__ = ("_buffer", "_handle", "_moves", "_view")
+
+    def __init__(self, path: str | os.PathLike) -> None:
+        self._handle = open(path, "rb")
+        # Move slices handed out, released on close so that the map can be
+        # closed while views are still referenced
+        self._moves: weakref.WeakSet[memoryview] = weakref.WeakSet()
+
+        try:
+            self._buffer = mmap.mmap(
+                self._handle.fileno(), 0, access=mmap.ACCESS_READ
+            )
+        except ValueError as error:
+            self._handle.close()
+            raise ValueError(f"{path} is not a game record file") from error
+
+        if len(self._buffer) < _FILE_HEADER.size or _FILE_HEADER.unpack_from(
+            self._buffer
+        ) != (_MAGIC, _FORMAT_VERSION):
+            self.close()
+            raise ValueError(f"{path} is not a game record file")
+
+        self._view = memoryview(self._buffer)
+
+    def __iter__(self) -> Generator[RecordView, None, None]:
+        offset = _FILE_HEADER.size
+
+        while offset < len(self._view):
+            header = _GAME_HEADER.unpack_from(self._view, offset)
+            offset += _GAME_HEADER.size
+            end = offset + header[3] * _MOVE.size
+
+            moves = self._view[offset:end]
+            self._moves.add(moves)
+            yield RecordView(header, moves)
+            offset = end
+
+    def close(self) -> None:
+        for moves in list(self._moves):
+            moves.release()
+        if hasattr(self, "_view"):
+            self._view.release()
+        self._buffer.close()
+        self._handle.close()
+
+    def __enter__(self) -> "RecordReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,160 @@
+"""
+Monte Carlo estimates of the possible tiles, for combination spaces too
+large to count within a turn.
+
+Clue combinations are sampled uniformly from the candidate clues of the
+players, with clues of equal masks merged into weights. The combinations
+singling out a tile are a uniform sample of the solutions, so the share of
+each tile estimates its probability, with a Wilson score interval.
+Sampling continues in batches until every interval is within the
+tolerance, the time budget runs out or max_samples combinations are drawn:
+
+    estimate = game.possible_tiles().estimate(tolerance=0.02, seconds=0.5)
+    estimate.probabilities, estimate.intervals
+"""
+
+import functools
+import math
+import operator
+import random
+import time
+from statistics import NormalDist
+from typing import NamedTuple
+
+from cryptidsolver import counters
+from cryptidsolver.bitboard import FULL_BOARD
+from cryptidsolver.clue import Clue
+from cryptidsolver.gamemap import Map
+from cryptidsolver.tile import MapTile
+
+DEFAULT_TOLERANCE = 0.01
+DEFAULT_CONFIDENCE = 0.95
+DEFAULT_MAX_SAMPLES = 1_000_000
+
+# Combinations drawn between the checks of the stopping rules
+_BATCH = 2048
+
+
+class Settings(NamedTuple):
+    # Largest accepted half-width of the intervals
+    tolerance: float = DEFAULT_TOLERANCE
+    # Confidence level of the intervals
+    confidence: float = DEFAULT_CONFIDENCE
+    # Time budget, unlimited if None
+    seconds: float | None = None
+    # Largest number of combinations drawn
+    max_samples: int = DEFAULT_MAX_SAMPLES
+    # Seed of the sampled combinations
+    seed: int | None = None
+
+
+class Estimate(NamedTuple):
+    # Estimated share of the clue combinations pointing on each tile
+    probabilities: dict[MapTile, float]
+    # Confidence interval of each probability
+    intervals: dict[MapTile, tuple[float, float]]
+    # Combinations drawn, and those singling out a tile
+    samples: int
+    accepted: int
+    # Whether every interval is within the tolerance
+    converged: bool
+
+
+def _half_width(hits: int, n: int, z: float) -> float:
+    # Wilson score interval, which stays sensible near 0 and 1
+    p = hits / n
+    return (
+        z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / (1 + z * z / n)
+    )
+
+
+def _interval(hits: int, n: int, z: float) -> tuple[float, float]:
+    p = hits / n
+    center = (p + z * z / (2 * n)) / (1 + z * z / n)
+    half_width = _half_width(hits, n, z)
+    return max(0.0, center - half_width), min(1.0, center + half_width)
+
+
+def estimate_tiles(
+    gamemap: Map,
+    candidates: list[frozenset[Clue]],
+    settings: Settings = Settings(),
+) -> Estimate:
+    """
+    Estimate the probability of each tile by sampling clue combinations.
+
+    Args:
+        gamemap: Current gamemap
+        candidates: Possible clues of each player
+        settings: Stopping rules and seed of the sampling
+
+    Returns:
+        Estimated probabilities with their intervals
+    """
+
+    tolerance, confidence, seconds, max_samples, seed = settings
+    assert 0 < tolerance < 1, "Tolerance has to be between 0 and 1"
+    assert 0 < confidence < 1, "Confidence has to be between 0 and 1"
+
+    started = time.perf_counter()
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    rng = random.Random(seed)
+
+    # Distinct masks of each player, weighted by the clues having them
+    levels = []
+    for clues in candidates:
+        weights: dict[int, int] = {}
+        for clue in clues:
+            mask = clue.accepted_mask(gamemap)
+            weights[mask] = weights.get(mask, 0) + 1
+        levels.append((list(weights), list(weights.values())))
+
+    hits_by_index: dict[int, int] = {}
+    samples = accepted = 0
+    converged = False
+
+    while levels and all(masks for masks, _ in levels):
+        batch = min(_BATCH, max_samples - samples)
+        if batch <= 0:
+            break
+
+        draws = [
+            rng.choices(masks, weights, k=batch) for masks, weights in levels
+        ]
+        for combination in zip(*draws):
+            remaining = functools.reduce(
+                operator.and_, combination, FULL_BOARD
+            )
+            # Exactly one bit left
+            if remaining and remaining & (remaining - 1) == 0:
+                index = remaining.bit_length() - 1
+                hits_by_index[index] = hits_by_index.get(index, 0) + 1
+                accepted += 1
+        samples += batch
+
+        if accepted:
+            # Tiles not sampled yet may still have a probability up to the
+            # upper bound of an interval without hits
+            widest = max(
+                _interval(0, accepted, z)[1],
+                *(
+                    _half_width(hits, accepted, z)
+                    for hits in hits_by_index.values()
+                ),
+            )
+            if widest <= tolerance:
+                converged = True
+                break
+        if seconds is not None and time.perf_counter() - started > seconds:
+            break
+
+    counters.increment(counters.SAMPLES, samples)
+
+    probabilities = {}
+    intervals = {}
+    for index in sorted(hits_by_index):
+        tile = gamemap._tile(index)
+        probabilities[tile] = hits_by_index[index] / accepted
+        intervals[tile] = _interval(hits_by_index[index], accepted, z)
+
+    return Estimate(probabilities, intervals, samples, accepted, converged)
@@ -0,0 +1,339 @@
+"""
+Local HTTP/JSON server hosting many solver sessions in one process.
+
+Sessions on the same map share the Map instance, and with it the clue masks
+and solution tables cached on it. Sessions are evicted least recently used
+first when their estimated size, with that of the maps they share, exceeds
+the memory cap.
+
+    POST   /sessions                  {"map": [...], "players": [...],
+                                       "structures": [...]}
+    POST   /sessions/ID/commands      {"command": "place c 1 1"}
+    DELETE /sessions/ID
+    GET    /stats
+    GET    /metrics                   see cryptidsolver.metrics
+    DELETE /metrics                   reset the metrics
+
+Players and structures use the notation of interactive_solver.py, and
+commands are those of the interactive mode. Started with:
+
+    python -m cryptidsolver.server --port 8765 [--metrics]
+"""
+
+import argparse
+import json
+import threading
+import uuid
+from collections import OrderedDict
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from cryptidsolver import cache, metrics, trace
+from cryptidsolver.engine import Engine, parse_setup, respond
+from cryptidsolver.game import Game
+from cryptidsolver.gamemap import Map
+
+DEFAULT_MAX_BYTES = 256 * 1024**2
+
+# Estimated footprint of a session at its start, and per placement, as
+# measured with tracemalloc and rounded up. The placement covers the event,
+# the placement lists and amortized snapshots. TestFootprint checks that
+# these and _MAP_BYTES stay upper bounds.
+_SESSION_BYTES = 4 * 1024
+_PLACEMENT_BYTES = 256
+# Footprint of a map shared by sessions, with the clue masks warmed at its
+# creation and the masks cached by the analyses, measured the same way.
+# These caches are bounded by the number of clues, not by the sessions.
+_MAP_BYTES = 24 * 1024
+
+# Path parts of /sessions/ID and /sessions/ID/commands
+_N_PARTS_SESSION = 2
+_N_PARTS_COMMANDS = 3
+
+
+class SessionError(KeyError):
+    pass
+
+
+class _Session:
+    __slots__ = ("accounted", "engine", "fingerprint", "lock")
+
+    def __init__(self, engine: Engine, fingerprint: str) -> None:
+        self.engine = engine
+        self.fingerprint = fingerprint
+        self.lock = threading.Lock()
+        # Size included in the total of the store
+        self.accounted = 0
+
+    def size(self) -> int:
+        return _SESSION_BYTES + _PLACEMENT_BYTES * self.engine.game.position
+
+
+class SessionStore:
+    """
+    Sessions by id, in least recently used order, and the maps they share.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self.map_hits = 0
+        self.map_misses = 0
+
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._sessions: OrderedDict[str, _Session] = OrderedDict()
+        # Shared maps with the number of sessions on them
+        self._maps: dict[str, tuple[Map, int]] = {}
+
+    def create(
+        self,
+        map_description: list[str],
+        players: list[str],
+        structures: list[str],
+    ) -> str:
+        """
+        Start a session.
+
+        Args:
+            map_description: Map pieces as '(Mappiece number)(S/N)'
+            players: Players as '[@](color)_(clue alphabet)(clue number)'
+            structures: Structures as '(color)_([SS/AS])_(x),(y)'
+
+        Returns:
+            Id of the session
+        """
+
+        parsed_players, parsed_structures = parse_setup(players, structures)
+        gamemap = Map(map_description, parsed_structures)
+        fingerprint = gamemap.fingerprint
+
+        with self._lock:
+            if fingerprint in self._maps:
+                gamemap, n_sessions = self._maps[fingerprint]
+                self.map_hits += 1
+            else:
+                n_sessions = 0
+                self.map_misses += 1
+                self._bytes += _MAP_BYTES
+            self._maps[fingerprint] = (gamemap, n_sessions + 1)
+
+        if n_sessions == 0:
+            cache.warm_clue_masks(gamemap)
+
+        session_id = uuid.uuid4().hex
+        session = _Session(
+            Engine(Game.from_map(gamemap, parsed_players)), fingerprint
+        )
+
+        with self._lock:
+            self._sessions[session_id] = session
+            self._account(session)
+            self._evict()
+
+        return session_id
+
+    def execute(self, session_id: str, cmd: str) -> dict:
+        """
+        Execute a command of a session.
+
+        Args:
+            session_id: Id of the session
+            cmd: Command as typed in the interactive mode
+
+        Returns:
+            JSON serializable record of the response
+        """
+
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                raise SessionError(session_id)
+            self._sessions.move_to_end(session_id)
+
+        with session.lock:
+            _, record = respond(session.engine, cmd)
+
+            with self._lock:
+                # May have been evicted meanwhile
+                if self._sessions.get(session_id) is session:
+                    self._account(session)
+                    self._evict()
+
+        return record
+
+    def close(self, session_id: str) -> None:
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is None:
+                raise SessionError(session_id)
+            self._release(session)
+
+    def _account(self, session: _Session) -> None:
+        size = session.size()
+        self._bytes += size - session.accounted
+        session.accounted = size
+
+    def _release(self, session: _Session) -> None:
+        self._bytes -= session.accounted
+        gamemap, n_sessions = self._maps[session.fingerprint]
+        if n_sessions == 1:
+            del self._maps[session.fingerprint]
+            self._bytes -= _MAP_BYTES
+        else:
+            self._maps[session.fingerprint] = (gamemap, n_sessions - 1)
+
+    def _evict(self) -> None:
+        # The latest session is kept even when it alone exceeds the cap
+        while self._bytes > self.max_bytes and len(self._sessions) > 1:
+            _, session = self._sessions.popitem(last=False)
+            self._release(session)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "maps": len(self._maps),
+                "estimated_bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+                "map_hits": self.map_hits,
+                "map_misses": self.map_misses,
+            }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "SolverServer"
+
+    def _reply(self, status: HTTPStatus, body: dict) -> None:
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _body(self) -> dict:
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _route(self, method: str) -> None:
+        parts = self.path.strip("/").split("/")
+        store = self.server.store
+
+        try:
+            if method == "GET" and parts == ["stats"]:
+                self._reply(HTTPStatus.OK, store.stats())
+            elif method == "GET" and parts == ["metrics"]:
+                self._reply(HTTPStatus.OK, metrics.snapshot())
+            elif method == "DELETE" and parts == ["metrics"]:
+                metrics.reset()
+                self._reply(HTTPStatus.OK, metrics.snapshot())
+            elif method == "POST" and parts == ["sessions"]:
+                body = self._body()
+                session_id = store.create(
+                    body["map"], body["players"], body["structures"]
+                )
+                self._reply(HTTPStatus.CREATED, {"session": session_id})
+            elif (
+                method == "POST"
+                and len(parts) == _N_PARTS_COMMANDS
+                and parts[0] == "sessions"
+                and parts[2] == "commands"
+            ):
+                record = store.execute(parts[1], self._body()["command"])
+                self._reply(HTTPStatus.OK, record)
+            elif (
+                method == "DELETE"
+                and len(parts) == _N_PARTS_SESSION
+                and parts[0] == "sessions"
+            ):
+                store.close(parts[1])
+                self._reply(HTTPStatus.OK, {"session": parts[1]})
+            else:
+                self._reply(HTTPStatus.NOT_FOUND, {"error": "Unknown route"})
+        except SessionError as error:
+            self._reply(
+                HTTPStatus.NOT_FOUND,
+                {"error": f"Unknown or evicted session {error}"},
+            )
+        except (LookupError, TypeError, ValueError, AssertionError) as error:
+            self._reply(HTTPStatus.BAD_REQUEST, {"error": repr(error)})
+        except Exception as error:  # pylint: disable=broad-except
+            self._reply(
+                HTTPStatus.INTERNAL_SERVER_ERROR, {"error": repr(error)}
+            )
+
+    def do_GET(self) -> None:
+        self._route("GET")
+
+    def do_POST(self) -> None:
+        self._route("POST")
+
+    def do_DELETE(self) -> None:
+        self._route("DELETE")
+
+    # Parameters named as in BaseHTTPRequestHandler
+    # pylint: disable-next=redefined-builtin
+    def log_message(self, format, *args) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class SolverServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server over a SessionStore.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple[str, int],
+        store: SessionStore | None = None,
+        verbose: bool = False,
+    ) -> None:
+        super().__init__(address, _Handler)
+        self.store = store if store is not None else SessionStore()
+        self.verbose = verbose
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Serve solver sessions over HTTP"
+    )
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--max-bytes",
+        type=int,
+        default=DEFAULT_MAX_BYTES,
+        help="Estimated memory of the sessions before eviction",
+    )
+    parser.add_argument("--verbose", action="store_true")
+    parser.add_argument(
+        "--metrics",
+        action="store_true",
+        help="Time the solver hot paths, reported at /metrics",
+    )
+    parser.add_argument(
+        "--trace",
+        type=str,
+        help="Append a JSON line per analysis of the solver to a file",
+    )
+    args = parser.parse_args()
+
+    if args.metrics:
+        metrics.enable()
+    if args.trace is not None:
+        trace.enable(args.trace)
+
+    server = SolverServer(
+        (args.host, args.port), SessionStore(args.max_bytes), args.verbose
+    )
+    print(
+        f"Serving on http://{args.host}:{server.server_address[1]}",
+        flush=True,
+    )
+    server.serve_forever()
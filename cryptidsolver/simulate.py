@@ -0,0 +1,490 @@
+"""
+Headless simulation of complete games for automated self-play.
+
+A game is dealt with deal(), and played with play() by one Strategy per
+seat. Strategies see the game through a SeatView: the placements of every
+player and only their own clue. The rules follow the base game: after the
+opening cubes each turn is either a question or a search, and a player who
+makes another player place a cube places a cube of their own.
+"""
+
+import random
+from typing import NamedTuple
+
+from cryptidsolver.bitboard import (
+    BOARD_SIZE,
+    index_coordinates,
+    iter_indices,
+    tile_index,
+)
+from cryptidsolver.clue import Clue
+from cryptidsolver.constant.clues import ORDERED_CLUES, THREE_FROM_BLACK
+from cryptidsolver.constant.limits import _MAX_PLAYERS, _MIN_PLAYERS
+from cryptidsolver.game import Game
+from cryptidsolver.gamemap import _NON_INVERTED_GAME_STRUCTURE_COUNT, Map
+from cryptidsolver.layout import N_LAYOUTS, layout_description
+from cryptidsolver.player import Player
+from cryptidsolver.solutions import is_irredundant
+from cryptidsolver.structure import Structure
+
+PLAYER_COLORS = ("red", "orange", "purple", "cyan", "brown")
+
+BASE_STRUCTURES = (
+    ("white", "stone"),
+    ("white", "shack"),
+    ("green", "stone"),
+    ("green", "shack"),
+    ("blue", "stone"),
+    ("blue", "shack"),
+)
+
+_BASE_CLUES = tuple(clue for clue in ORDERED_CLUES if clue != THREE_FROM_BLACK)
+
+_OPENING_CUBES = 2
+_MAX_TURNS = 200
+_CLUE_ATTEMPTS = 2000
+# Maps dealt before giving up, far above the handful usually needed
+_DEAL_ATTEMPTS = 100
+
+
+class Setup(NamedTuple):
+    map_description: tuple[str, ...]
+    structures: tuple[Structure, ...]
+    clues: tuple[Clue, ...]
+
+
+class Question(NamedTuple):
+    """
+    Ask the player on seat 'player' whether the cryptid could be on 'tile'.
+    """
+
+    player: int
+    tile: int
+
+
+class Search(NamedTuple):
+    """
+    Search for the cryptid on 'tile'.
+    """
+
+    tile: int
+
+
+class Move(NamedTuple):
+    """
+    Cube or disk placed by the player on seat.
+    """
+
+    seat: int
+    cube: bool
+    tile: int
+
+
+class GameResult(NamedTuple):
+    winner: int | None
+    turns: int
+    setup: Setup
+    moves: tuple[Move, ...] = ()
+
+
+class IllegalMove(ValueError):
+    pass
+
+
+def deal(rng: random.Random, n_players: int) -> Setup:
+    """
+    Deal a random setup with a unique solution, where every clue is needed
+    to single out the cryptid.
+
+    Args:
+        rng: Source of randomness
+        n_players: Number of players
+
+    Returns:
+        Map description, structures and one clue per seat
+    """
+
+    if not _MIN_PLAYERS <= n_players <= _MAX_PLAYERS:
+        raise ValueError(
+            f"Games have {_MIN_PLAYERS} to {_MAX_PLAYERS} players"
+        )
+
+    for _ in range(_DEAL_ATTEMPTS):
+        description = layout_description(rng.randrange(N_LAYOUTS))
+        locations = rng.sample(
+            range(BOARD_SIZE), _NON_INVERTED_GAME_STRUCTURE_COUNT
+        )
+        structures = [
+            Structure(color, shape, *index_coordinates(index))
+            for (color, shape), index in zip(BASE_STRUCTURES, locations)
+        ]
+        gamemap = Map(description, structures)
+
+        # Solutions are rare among clue combinations, but sampling is still
+        # cheaper than enumerating all of them for every deal.
+        for _ in range(_CLUE_ATTEMPTS):
+            clues = rng.sample(_BASE_CLUES, n_players)
+            masks = [clue.accepted_mask(gamemap) for clue in clues]
+            if is_irredundant(masks):
+                return Setup(
+                    tuple(description), tuple(structures), tuple(clues)
+                )
+
+    raise RuntimeError(
+        f"No setup for {n_players} players found in {_DEAL_ATTEMPTS} deals"
+    )
+
+
+class SeatView:
+    """
+    The game as seen from a seat: placements of every player, but only the
+    clue of the seat itself.
+    """
+
+    __slots__ = ("_me", "clue", "game", "rng", "seat")
+
+    def __init__(
+        self, players: list[Player], seat: int, gamemap: Map, rng
+    ) -> None:
+        self.seat = seat
+        self.clue = players[seat].clue
+        self.rng = rng
+        self.game = Game.from_map(
+            gamemap,
+            [
+                player if num == seat else player.public_view()
+                for num, player in enumerate(players)
+            ],
+        )
+        # How the others see this seat
+        self._me = players[seat].public_view()
+
+    @property
+    def n_players(self) -> int:
+        return len(self.game.players)
+
+    def own_mask(self) -> int:
+        """
+        Returns:
+            Bitboard of the tiles accepted by the own clue
+        """
+        assert self.clue is not None
+        return self.clue.accepted_mask(self.game.map)
+
+    def cube_options(self) -> int:
+        """
+        Returns:
+            Bitboard of the tiles where the seat may place a cube
+        """
+        return self.game.free_tiles() & ~self.own_mask()
+
+    def candidate_masks(self, seat: int) -> list[int]:
+        """
+        Masks of the clues the player on seat may still have, as known
+        publicly. Clues with equal masks are listed once.
+
+        Args:
+            seat: Seat of the player
+
+        Returns:
+            Accepted-tile bitboards of the candidate clues
+        """
+
+        player = self._me if seat == self.seat else self.game.players[seat]
+        return list(
+            {
+                clue.accepted_mask(self.game.map)
+                for clue in player.possible_clues(self.game.map)
+            }
+        )
+
+
+class Strategy:
+    """
+    Base class of the player strategies.
+    """
+
+    def take_turn(self, view: SeatView) -> Question | Search:
+        raise NotImplementedError
+
+    def penalty_cube(self, view: SeatView) -> int:
+        """
+        Choose where to place a cube after another player placed one. Only
+        asked when view.cube_options() is not empty, otherwise no cube is
+        placed.
+
+        Returns:
+            Tile index from view.cube_options()
+        """
+        raise NotImplementedError
+
+    def opening_cube(self, view: SeatView) -> int:
+        """
+        Choose where to place a cube before the first turn.
+
+        Returns:
+            Tile index from view.cube_options()
+        """
+        return self.penalty_cube(view)
+
+
+def _random_index(rng: random.Random, mask: int) -> int:
+    return rng.choice(list(iter_indices(mask)))
+
+
+class RandomStrategy(Strategy):
+    """
+    Plays random legal moves. Searches only tiles accepted by its own clue.
+    """
+
+    def __init__(self, search_rate: float = 0.1) -> None:
+        self.search_rate = search_rate
+
+    def take_turn(self, view: SeatView) -> Question | Search:
+        free = view.game.free_tiles()
+
+        if view.rng.random() < self.search_rate:
+            return Search(_random_index(view.rng, free & view.own_mask()))
+
+        others = [seat for seat in range(view.n_players) if seat != view.seat]
+        return Question(view.rng.choice(others), _random_index(view.rng, free))
+
+    def penalty_cube(self, view: SeatView) -> int:
+        return _random_index(view.rng, view.cube_options())
+
+
+class NarrowingStrategy(Strategy):
+    """
+    Asks the questions that split the candidate clues of the others most
+    evenly, searches once a single tile remains, and places its cubes where
+    they rule out the fewest of its own candidate clues.
+    """
+
+    def take_turn(self, view: SeatView) -> Question | Search:
+        free = view.game.free_tiles()
+        possible = free & view.own_mask()
+
+        candidates = {
+            seat: view.candidate_masks(seat)
+            for seat in range(view.n_players)
+            if seat != view.seat
+        }
+
+        for masks in candidates.values():
+            union = 0
+            for mask in masks:
+                union |= mask
+            possible &= union
+
+        if possible & (possible - 1) == 0 and possible:
+            return Search(possible.bit_length() - 1)
+
+        # Split of the candidate clues, seat and tile of the best question
+        best = (0, 0, 0)
+        for seat, masks in candidates.items():
+            for tile in iter_indices(possible):
+                accepting = sum(mask >> tile & 1 for mask in masks)
+                split = min(accepting, len(masks) - accepting)
+
+                if split > best[0]:
+                    best = (split, seat, tile)
+
+        if best[0] == 0:
+            # Nothing left to learn about the candidate tiles
+            return Search(_random_index(view.rng, possible or free))
+
+        return Question(best[1], best[2])
+
+    def penalty_cube(self, view: SeatView) -> int:
+        masks = view.candidate_masks(view.seat)
+
+        return min(
+            iter_indices(view.cube_options()),
+            key=lambda tile: sum(mask >> tile & 1 for mask in masks),
+        )
+
+
+class _Table:
+    """
+    Game in progress: the placements go through the Game, whose event log
+    keeps the moves, and the strategies see it through their seat views.
+    """
+
+    def __init__(
+        self, setup: Setup, strategies: list[Strategy], rng: random.Random
+    ) -> None:
+        self.strategies = strategies
+        self.n_players = len(setup.clues)
+
+        players = [
+            Player(PLAYER_COLORS[seat], clue)
+            for seat, clue in enumerate(setup.clues)
+        ]
+        self.game = Game(
+            list(setup.map_description), players, list(setup.structures)
+        )
+        self.views = [
+            SeatView(players, seat, self.game.map, rng)
+            for seat in range(self.n_players)
+        ]
+        self.accepted = [
+            clue.accepted_mask(self.game.map) for clue in setup.clues
+        ]
+
+    def moves(self) -> tuple[Move, ...]:
+        return tuple(
+            Move(event.seat, event.cube, tile_index(event.x, event.y))
+            for event in self.game.history
+        )
+
+    def refuses(self, seat: int, tile: int) -> bool:
+        return not self.accepted[seat] >> tile & 1
+
+    def cube(self, seat: int, opening: bool = False) -> bool:
+        """
+        Let the seat choose a cube and place it. Returns whether the seat
+        had a tile to place it on.
+        """
+
+        view = self.views[seat]
+        options = view.cube_options()
+        if not options:
+            return False
+
+        strategy = self.strategies[seat]
+        tile = (
+            strategy.opening_cube(view)
+            if opening
+            else strategy.penalty_cube(view)
+        )
+        if not options >> tile & 1:
+            raise IllegalMove(f"Seat {seat} cannot place a cube on {tile}")
+
+        x, y = index_coordinates(tile)
+        if opening:
+            self.game.place(seat, x, y, cube=True)
+        else:
+            # The penalty cube of the acting player ends the turn
+            self.game.place_cube(x, y)
+        return True
+
+    def answer(
+        self, seat: int, responder: int, tile: int, question: bool
+    ) -> bool:
+        """
+        Place the answer of the responder. A disk answering a question ends
+        the turn. A refusal is followed by a penalty cube of the acting
+        seat, which ends the turn instead if the seat has a tile for it.
+        Returns whether the responder refused.
+        """
+
+        refused = self.refuses(responder, tile)
+        penalized = refused and bool(
+            self.views[seat].cube_options() & ~(1 << tile)
+        )
+        self.game.place(
+            responder,
+            *index_coordinates(tile),
+            cube=refused,
+            advance_tick=(question or refused) and not penalized,
+        )
+        if penalized:
+            self.cube(seat)
+        return refused
+
+    def question(self, seat: int, action: Question) -> None:
+        if action.player == seat or not 0 <= action.player < self.n_players:
+            raise IllegalMove(f"Seat {seat} cannot ask {action.player}")
+
+        self.answer(seat, action.player, action.tile, question=True)
+
+    def search(self, seat: int, action: Search) -> bool:
+        """
+        Returns:
+            Whether every other player accepted the tile
+        """
+
+        if self.refuses(seat, action.tile):
+            raise IllegalMove(f"Seat {seat} cannot search {action.tile}")
+
+        self.game.place_disk(*index_coordinates(action.tile), False)
+
+        for offset in range(1, self.n_players):
+            responder = (seat + offset) % self.n_players
+            if self.answer(seat, responder, action.tile, question=False):
+                return False
+        return True
+
+
+def play(
+    setup: Setup,
+    strategies: list[Strategy],
+    rng: random.Random | None = None,
+    max_turns: int = _MAX_TURNS,
+    opening_cubes: int = _OPENING_CUBES,
+) -> GameResult:
+    """
+    Play a game to the end.
+
+    Args:
+        setup: Dealt setup
+        strategies: Strategy of each seat, in turn order
+        rng: Source of randomness for the strategies
+        max_turns: Turns after which the game ends without a winner
+        opening_cubes: Cubes each player places before the first turn
+
+    Returns:
+        Winning seat, or None if the turn limit was reached, and the
+        placements in the order they were made
+    """
+
+    if len(strategies) != len(setup.clues):
+        raise ValueError("Every seat needs a strategy")
+
+    table = _Table(
+        setup, strategies, rng if rng is not None else random.Random()
+    )
+    game = table.game
+
+    for _ in range(opening_cubes):
+        for seat in range(table.n_players):
+            table.cube(seat, opening=True)
+
+    while game.gametick < max_turns:
+        seat = game.gametick % table.n_players
+        table.views[seat].game.gametick = game.gametick
+
+        action = strategies[seat].take_turn(table.views[seat])
+
+        if not game.free_tiles() >> action.tile & 1:
+            raise IllegalMove(f"Tile {action.tile} already has a cube")
+
+        if isinstance(action, Question):
+            table.question(seat, action)
+        elif table.search(seat, action):
+            return GameResult(seat, game.gametick + 1, setup, table.moves())
+
+    return GameResult(None, game.gametick, setup, table.moves())
+
+
+def position(setup: Setup, moves: tuple[Move, ...] | list[Move]) -> Game:
+    """
+    Replay placements of a simulated game, e.g. to analyse a position of it.
+
+    Args:
+        setup: Dealt setup
+        moves: Placements to replay, in the order they were made
+
+    Returns:
+        Game after the placements, in which only the first seat knows its
+        clue
+    """
+
+    players = [
+        Player(color, clue if seat == 0 else None)
+        for seat, (color, clue) in enumerate(zip(PLAYER_COLORS, setup.clues))
+    ]
+    game = Game(list(setup.map_description), players, list(setup.structures))
+    for seat, cube, tile in moves:
+        game.place(seat, *index_coordinates(tile), cube=cube)
+    return game
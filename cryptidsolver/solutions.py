@@ -0,0 +1,106 @@
+from functools import lru_cache
+
+from cryptidsolver import cache
+from cryptidsolver.bitboard import FULL_BOARD
+from cryptidsolver.constant.clues import ORDERED_CLUES
+from cryptidsolver.gamemap import Map
+
+
+def _enumerate_solutions(
+    masks: list[int], n_clues: int
+) -> dict[tuple[int, ...], int]:
+    solutions: dict[tuple[int, ...], int] = {}
+
+    def extend(start: int, chosen: tuple[int, ...], remaining: int) -> None:
+        if len(chosen) == n_clues:
+            # Exactly one bit left
+            if remaining & (remaining - 1) == 0:
+                solutions[chosen] = remaining.bit_length() - 1
+            return
+
+        for position in range(start, len(masks)):
+            narrowed = remaining & masks[position]
+            # Intersections only shrink, an empty one has no solutions
+            if narrowed:
+                extend(position + 1, (*chosen, position), narrowed)
+
+    extend(0, (), FULL_BOARD)
+
+    return solutions
+
+
+def _encode(solutions: dict[tuple[int, ...], int]) -> bytes:
+    return b"".join(
+        bytes((*combination, tile)) for combination, tile in solutions.items()
+    )
+
+
+def _decode(payload: bytes, n_clues: int) -> dict[tuple[int, ...], int]:
+    width = n_clues + 1
+    return {
+        tuple(payload[start : start + n_clues]): payload[start + n_clues]
+        for start in range(0, len(payload), width)
+    }
+
+
+@lru_cache(maxsize=32)
+def solution_table(gamemap: Map, n_clues: int) -> dict[tuple[int, ...], int]:
+    """
+    Find every combination of distinct clues that singles out a single tile.
+    Uses the persistent cache when it is enabled.
+
+    Args:
+        gamemap: Current gamemap
+        n_clues: Number of clues in a combination, i.e. number of players
+
+    Returns:
+        Ascending positions in ORDERED_CLUES mapped to the index of the tile
+        they single out
+    """
+
+    store = cache.active()
+    kind = f"solutions-{n_clues}"
+
+    if store is not None:
+        payload = store.get(gamemap.fingerprint, kind)
+        if payload is not None:
+            return _decode(payload, n_clues)
+
+    masks = [clue.accepted_mask(gamemap) for clue in ORDERED_CLUES]
+    solutions = _enumerate_solutions(masks, n_clues)
+
+    if store is not None:
+        store.put(gamemap.fingerprint, kind, _encode(solutions))
+
+    return solutions
+
+
+def is_irredundant(masks: list[int]) -> bool:
+    """
+    Check that the clue masks single out a single tile, and that every clue
+    is needed for it.
+
+    Args:
+        masks: Accepted-tile bitboards of the clues
+
+    Returns:
+        Do the masks form a solution without redundant clues
+    """
+
+    remaining = FULL_BOARD
+    for mask in masks:
+        remaining &= mask
+
+    if remaining == 0 or remaining & (remaining - 1):
+        return False
+
+    for left_out in range(len(masks)):
+        without = FULL_BOARD
+        for position, mask in enumerate(masks):
+            if position != left_out:
+                without &= mask
+
+        if without & (without - 1) == 0:
+            return False
+
+    return True
@@ -0,0 +1,354 @@
+"""
+Play simulated games between strategies over a process pool.
+
+Every game is seeded from the master seed and its game number only, so
+results reproduce regardless of the number of workers. Consecutive games
+replay the same deal with the entrants rotated over the seats, a cycle of
+lcm(entrants, seats) games giving every strategy every seat equally often
+on every deal. Results are streamed to a JSON-lines file as they
+complete.
+
+A chunk of games that does not finish in time once a worker started it,
+e.g. because the worker hung or died, is retried game by game. Only that
+worker is stopped and replaced, the other chunks carry on. A game failing on
+its own is recorded as an error, without stopping the run.
+"""
+
+import argparse
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import random
+import signal
+import time
+import traceback
+from collections import deque
+from collections.abc import Callable
+from multiprocessing.pool import AsyncResult
+from multiprocessing.queues import SimpleQueue
+from typing import IO, NamedTuple
+
+from cryptidsolver import simulate
+
+STRATEGIES: dict[str, Callable[[], simulate.Strategy]] = {
+    "random": simulate.RandomStrategy,
+    "narrowing": simulate.NarrowingStrategy,
+}
+
+_CHUNK_SIZE = 8
+_GAME_TIMEOUT = 30.0
+_POLL_INTERVAL = 0.01
+
+
+def cycle(entrants: list[str], n_players: int) -> int:
+    """
+    Args:
+        entrants: Names of the competing strategies
+        n_players: Number of seats
+
+    Returns:
+        Games after which every entrant had every seat equally often
+    """
+    return math.lcm(len(entrants), n_players)
+
+
+def lineup(entrants: list[str], n_players: int, game: int) -> list[str]:
+    """
+    Entrant of each seat for a game. Entrants are cycled over the seats and
+    shifted by one entrant on every game, so each seat sees the entrants in
+    turn even when their number does not divide the seats.
+
+    Args:
+        entrants: Names of the competing strategies
+        n_players: Number of seats
+        game: Game number
+
+    Returns:
+        Entrant names in seat order
+    """
+
+    return [
+        entrants[(seat + game) % len(entrants)] for seat in range(n_players)
+    ]
+
+
+class Settings(NamedTuple):
+    # Names of the competing strategies
+    entrants: list[str]
+    n_games: int
+    # Seats per game
+    n_players: int
+    # Seed every game is derived from
+    master_seed: int
+    # Worker processes, defaults to the number of cores
+    workers: int | None = None
+    # Strategy constructors by name, defaults to STRATEGIES. Have to be
+    # picklable, e.g. module level classes.
+    factories: dict[str, Callable[[], simulate.Strategy]] | None = None
+    # Games sent to a worker at once
+    chunk_size: int = _CHUNK_SIZE
+    # Seconds a game may run before it is given up
+    game_timeout: float = _GAME_TIMEOUT
+    # Turns after which a game ends without a winner
+    max_turns: int = 200
+
+
+class _Chunk(NamedTuple):
+    handle: AsyncResult
+    games: list[int]
+    # Retried chunks hold a single game
+    retried: bool
+    # Worker process and deadline, once a worker has started the chunk
+    pid: int | None = None
+    deadline: float | None = None
+
+
+# Queue the pool workers announce the chunks they start on
+_started: SimpleQueue[tuple[int, int]] | None = None
+
+
+def play_game(settings: Settings, game: int) -> dict:
+    """
+    Play a single tournament game.
+
+    Args:
+        settings: Tournament settings
+        game: Game number
+
+    Returns:
+        JSON serializable result record
+    """
+
+    n_players = settings.n_players
+    factories = settings.factories or STRATEGIES
+    seats = lineup(settings.entrants, n_players, game)
+    record: dict = {"game": game, "seats": seats}
+    started = time.perf_counter()
+
+    try:
+        # Games of a rotation cycle share the deal
+        deal = game // cycle(settings.entrants, n_players)
+        deal_rng = random.Random(f"{settings.master_seed}:deal:{deal}")
+        play_rng = random.Random(f"{settings.master_seed}:play:{game}")
+
+        setup = simulate.deal(deal_rng, n_players)
+        result = simulate.play(
+            setup,
+            [factories[name]() for name in seats],
+            play_rng,
+            max_turns=settings.max_turns,
+        )
+
+        record["winner"] = result.winner
+        record["winner_strategy"] = (
+            None if result.winner is None else seats[result.winner]
+        )
+        record["turns"] = result.turns
+    except Exception:  # pylint: disable=broad-except
+        record["error"] = traceback.format_exc(limit=5)
+
+    record["elapsed"] = time.perf_counter() - started
+    return record
+
+
+def _init_worker(started: SimpleQueue[tuple[int, int]]) -> None:
+    global _started  # noqa: PLW0603
+    _started = started
+
+
+def _play_chunk(settings: Settings, chunk: int, games: list[int]) -> list:
+    assert _started is not None, "Worker not initialized"
+    _started.put((chunk, os.getpid()))
+    return [play_game(settings, game) for game in games]
+
+
+class _Summary:
+    __slots__ = ("draws", "errors", "games", "wins")
+
+    def __init__(self, entrants: list[str]) -> None:
+        self.games = 0
+        self.draws = 0
+        self.errors = 0
+        self.wins = dict.fromkeys(entrants, 0)
+
+    def add(self, record: dict) -> None:
+        self.games += 1
+        if "error" in record:
+            self.errors += 1
+        elif record["winner"] is None:
+            self.draws += 1
+        else:
+            self.wins[record["winner_strategy"]] += 1
+
+    def as_dict(self) -> dict:
+        return {
+            "games": self.games,
+            "draws": self.draws,
+            "errors": self.errors,
+            "wins": self.wins,
+        }
+
+
+def _stop(pid: int | None) -> None:
+    # The pool replaces the stopped worker
+    if pid is None:
+        return
+    try:
+        os.kill(pid, signal.SIGTERM)
+    except ProcessLookupError:
+        # Died on its own
+        pass
+
+
+def _start_deadlines(
+    started: SimpleQueue[tuple[int, int]],
+    in_flight: dict[int, _Chunk],
+    game_timeout: float,
+) -> None:
+    # Chunks wait in the pool queue until a worker is free, their time only
+    # runs from the start
+    while not started.empty():
+        chunk_id, pid = started.get()
+        if chunk_id in in_flight:
+            chunk = in_flight[chunk_id]
+            in_flight[chunk_id] = chunk._replace(
+                pid=pid,
+                deadline=time.monotonic() + game_timeout * len(chunk.games),
+            )
+
+
+def run(settings: Settings, output: IO[str]) -> dict:
+    """
+    Play a tournament, writing a JSON line per game to output.
+
+    Args:
+        settings: Tournament settings
+        output: Text stream for the result records
+
+    Returns:
+        Game, draw, error and per entrant win counts
+    """
+
+    factories = settings.factories or STRATEGIES
+    unknown = set(settings.entrants) - set(factories)
+    if unknown:
+        raise ValueError(f"Unknown strategies: {sorted(unknown)}")
+
+    workers = settings.workers or os.cpu_count() or 1
+    summary = _Summary(settings.entrants)
+
+    def write(records: list[dict]) -> None:
+        for record in records:
+            summary.add(record)
+            output.write(json.dumps(record) + "\n")
+        output.flush()
+
+    def give_up(chunk: _Chunk, reason: str) -> None:
+        # A failed chunk is retried a game at a time, a failed retry recorded
+        if not chunk.retried:
+            pending.extend(([game], True) for game in chunk.games)
+            return
+
+        write(
+            [
+                {
+                    "game": game,
+                    "seats": lineup(
+                        settings.entrants, settings.n_players, game
+                    ),
+                    "error": reason,
+                }
+                for game in chunk.games
+            ]
+        )
+
+    # (games, retried) - retried chunks hold a single game
+    n_games, chunk_size = settings.n_games, settings.chunk_size
+    pending: deque[tuple[list[int], bool]] = deque(
+        (list(range(start, min(start + chunk_size, n_games))), False)
+        for start in range(0, n_games, chunk_size)
+    )
+    in_flight: dict[int, _Chunk] = {}
+    chunk_ids = itertools.count()
+    started: SimpleQueue[tuple[int, int]] = multiprocessing.SimpleQueue()
+    pool = multiprocessing.Pool(
+        workers, initializer=_init_worker, initargs=(started,)
+    )
+
+    try:
+        while pending or in_flight:
+            while pending and len(in_flight) < 2 * workers:
+                games, retried = pending.popleft()
+                chunk_id = next(chunk_ids)
+                handle = pool.apply_async(
+                    _play_chunk, (settings, chunk_id, games)
+                )
+                in_flight[chunk_id] = _Chunk(handle, games, retried)
+
+            _start_deadlines(started, in_flight, settings.game_timeout)
+
+            progressed = False
+            for chunk_id, chunk in list(in_flight.items()):
+                if chunk.handle.ready():
+                    del in_flight[chunk_id]
+                    progressed = True
+                    try:
+                        records = chunk.handle.get()
+                    except Exception as error:  # pylint: disable=broad-except
+                        give_up(chunk, repr(error))
+                    else:
+                        write(records)
+                elif (
+                    chunk.deadline is not None
+                    and time.monotonic() >= chunk.deadline
+                ):
+                    # A stuck or dead worker, the other chunks carry on
+                    del in_flight[chunk_id]
+                    progressed = True
+                    _stop(chunk.pid)
+                    give_up(chunk, "timeout")
+
+            if not progressed:
+                time.sleep(_POLL_INTERVAL)
+    finally:
+        pool.terminate()
+        pool.join()
+
+    return summary.as_dict()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Play simulated games between strategies"
+    )
+    parser.add_argument(
+        "--strategies",
+        nargs="+",
+        required=True,
+        choices=sorted(STRATEGIES),
+        help="Competing strategies",
+    )
+    parser.add_argument("--games", type=int, required=True)
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--output", type=str, required=True, help="JSON-lines result file"
+    )
+    args = parser.parse_args()
+
+    with open(args.output, "w", encoding="utf-8") as results:
+        totals = run(
+            Settings(
+                args.strategies,
+                args.games,
+                args.players,
+                args.seed,
+                workers=args.workers,
+            ),
+            results,
+        )
+
+    print(json.dumps(totals, indent=2))
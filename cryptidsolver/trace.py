@@ -0,0 +1,210 @@
+"""
+Opt-in JSON-lines trace of the solver analyses.
+
+Every analysis of Game.possible_tiles, the infer helpers and the question
+planner writes a record with the hash of the game state, the candidate clue
+counts per player, its phase timings and what it found, e.g. the size of
+the clue combination space before and after pruning or the top candidate
+questions with their fitness. Analyses made within another one are covered
+by the outer record only, e.g. the possible tiles of every imagined
+placement of the question planner.
+
+Enable with enable(PATH) or by pointing the CRYPTIDSOLVER_TRACE environment
+variable to the trace file. Records are appended, one JSON object per line.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections.abc import Generator
+from contextlib import contextmanager
+from typing import IO, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from cryptidsolver.game import Game
+
+_TRACE_ENV = "CRYPTIDSOLVER_TRACE"
+
+_sink: IO[str] | None = None
+_sink_owned = False
+_sink_configured = False
+_lock = threading.Lock()
+# Depth of the analyses of each thread
+_local = threading.local()
+
+
+class Record:
+    """
+    Fields of an analysis, written when the analysis ends.
+    """
+
+    __slots__ = ("fields", "phases")
+
+    # Whether the fields are written, to skip computing them otherwise
+    active = True
+
+    def __init__(self, kind: str) -> None:
+        self.fields: dict = {"kind": kind, "time": time.time()}
+        self.phases: dict[str, float] = {}
+
+    def set(self, **fields) -> None:
+        self.fields.update(fields)
+
+    @contextmanager
+    def phase(self, name: str) -> Generator[None, None, None]:
+        """
+        Time a phase of the analysis. Repeated phases add up.
+        """
+
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = (
+                self.phases.get(name, 0.0) + time.perf_counter() - started
+            )
+
+
+class _NullRecord(Record):
+    """
+    Discards the fields, when tracing is disabled or the analysis is nested.
+    """
+
+    __slots__ = ()
+
+    active = False
+
+    def set(self, **fields) -> None:
+        pass
+
+    @contextmanager
+    def phase(self, name: str) -> Generator[None, None, None]:
+        yield
+
+
+_NULL_RECORD = _NullRecord("null")
+
+
+def enable(target: str | os.PathLike | IO[str]) -> None:
+    """
+    Start tracing.
+
+    Args:
+        target: File to append the records to, or an open text stream
+    """
+
+    global _sink, _sink_owned, _sink_configured  # noqa: PLW0603
+
+    disable()
+    _sink_owned = isinstance(target, (str, os.PathLike))
+    if isinstance(target, (str, os.PathLike)):
+        _sink = open(target, "a", encoding="utf-8")
+    else:
+        _sink = target
+    _sink_configured = True
+
+
+def disable() -> None:
+    global _sink, _sink_owned, _sink_configured  # noqa: PLW0603
+
+    # Streams given to enable() are left open to their owner
+    if _sink is not None and _sink_owned:
+        _sink.close()
+
+    _sink = None
+    _sink_owned = False
+    _sink_configured = True
+
+
+def active() -> bool:
+    """
+    Returns:
+        Whether analyses are traced
+    """
+
+    if not _sink_configured:
+        path = os.environ.get(_TRACE_ENV)
+        if path:
+            enable(path)
+        else:
+            disable()
+
+    return _sink is not None
+
+
+def state_hash(game: "Game") -> str:
+    """
+    Identify a game position by its map, known clues and placements.
+
+    Args:
+        game: Current game
+
+    Returns:
+        Hex digest, equal for games at equal positions
+    """
+
+    digest = hashlib.sha256(game.map.fingerprint.encode())
+    digest.update(str(game.gametick).encode())
+    for player in game.players:
+        digest.update(
+            f"|{player.color}:{player.clue}:"
+            f"{player.cubes.mask:x}:{player.disks.mask:x}".encode()
+        )
+    return digest.hexdigest()[:16]
+
+
+def candidate_counts(game: "Game") -> dict[str, int]:
+    """
+    Returns:
+        Number of possible clues of each player, by color
+    """
+
+    return {
+        player.color: (
+            1
+            if player.clue is not None
+            else len(player.possible_clues(game.map))
+        )
+        for player in game.players
+    }
+
+
+@contextmanager
+def analysis(
+    kind: str, game: "Game | None" = None
+) -> Generator[Record, None, None]:
+    """
+    Trace an analysis. Yields a record discarding its fields when tracing
+    is disabled or the analysis is nested in another one.
+
+    Args:
+        kind: Name of the analysis, e.g. 'possible_tiles'
+        game: Analysed game, whose state hash is recorded
+    """
+
+    depth = getattr(_local, "depth", 0)
+    if depth or not active():
+        _local.depth = depth + 1
+        try:
+            yield _NULL_RECORD
+        finally:
+            _local.depth = depth
+        return
+
+    record = Record(kind)
+    if game is not None:
+        record.set(state=state_hash(game))
+    started = time.perf_counter()
+    _local.depth = 1
+    try:
+        yield record
+    finally:
+        _local.depth = 0
+        record.set(elapsed=time.perf_counter() - started, phases=record.phases)
+        line = json.dumps(record.fields, default=str) + "\n"
+        with _lock:
+            if _sink is not None:
+                _sink.write(line)
+                _sink.flush()
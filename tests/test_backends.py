@@ -0,0 +1,167 @@
+import importlib.util
+import os
+import unittest
+from unittest import mock
+
+from cryptidsolver import backends, benchmark, distribution
+from cryptidsolver.clue import Clue
+from cryptidsolver.constant.clues import ORDERED_CLUES
+from cryptidsolver.game import Game
+from cryptidsolver.gamemap import Map
+from cryptidsolver.structure import Structure
+
+MAP = ["3N", "1S", "5S", "4S", "2N", "6S"]
+STRUCTURES = [
+    Structure("green", "stone", 12, 2),
+    Structure("green", "shack", 7, 3),
+    Structure("white", "stone", 8, 6),
+    Structure("white", "shack", 10, 8),
+    Structure("blue", "stone", 9, 1),
+    Structure("blue", "shack", 7, 4),
+]
+
+
+def _positions(seed: int) -> list[Game]:
+    # The reference backend enumerates every combination, skip the openings
+    # with large combination spaces
+    return [
+        scenario.game()
+        for scenario in benchmark.scenarios(seed)
+        if scenario.stage != "opening"
+    ]
+
+
+class TestBackends(unittest.TestCase):
+    def tearDown(self) -> None:
+        backends.use(backends.DEFAULT_BACKEND)
+
+    def test_backends_agree(self) -> None:
+        names = backends.available()
+        self.assertIn(backends.REFERENCE, names)
+        self.assertIn(backends.BITSET, names)
+
+        for game in _positions(seed=5):
+            results = {}
+            for name in names:
+                backends.use(name)
+                results[name] = (
+                    [
+                        player.possible_clues(game.map)
+                        for player in game.players
+                    ],
+                    game.possible_tiles(),
+                )
+
+            for name in names:
+                with self.subTest(backend=name, state=game.gametick):
+                    self.assertEqual(
+                        results[name], results[backends.REFERENCE]
+                    )
+
+    def test_accepted_tiles(self) -> None:
+        gamemap = Map(MAP, STRUCTURES)
+        reference = backends.ReferenceBackend()
+        inverted = [
+            Clue(clue.distance, set(clue.distance_from), clue.clue_type, True)
+            for clue in ORDERED_CLUES
+        ]
+
+        for clue in [*ORDERED_CLUES, *inverted]:
+            self.assertEqual(
+                reference.accepted_tiles(clue, gamemap),
+                gamemap.tiles_from_mask(clue.accepted_mask(gamemap)),
+            )
+
+    def test_strategies(self) -> None:
+        gamemap = Map(MAP, STRUCTURES)
+        candidates = [frozenset(ORDERED_CLUES[:2]), frozenset(ORDERED_CLUES)]
+        bitset = backends.get(backends.BITSET)
+
+        self.assertEqual(
+            bitset.strategy(candidates),
+            distribution.select(2 * len(ORDERED_CLUES)),
+        )
+        self.assertEqual(
+            bitset.strategy(candidates, distribution.PRODUCT),
+            distribution.PRODUCT,
+        )
+        with self.assertRaises(ValueError):
+            bitset.strategy(candidates, "bogus")
+
+        reference = backends.get(backends.REFERENCE)
+        self.assertIsNone(reference.strategy(candidates))
+        with self.assertRaises(ValueError):
+            reference.tile_counts(gamemap, candidates, distribution.PRUNING)
+
+    def test_numpy_without_numpy(self) -> None:
+        with mock.patch.dict("sys.modules", {"numpy": None}):
+            with self.assertRaises(ImportError):
+                backends.NumpyBackend()
+
+    def test_fallback(self) -> None:
+        with (
+            mock.patch.dict(
+                os.environ, {"CRYPTIDSOLVER_BACKEND": backends.NUMPY}
+            ),
+            mock.patch.dict("sys.modules", {"numpy": None}),
+            mock.patch.object(backends, "_active", None),
+            mock.patch.object(backends, "_instances", {}),
+        ):
+            with self.assertWarns(RuntimeWarning):
+                self.assertEqual(backends.active().name, backends.BITSET)
+
+    def test_unknown_backend(self) -> None:
+        with self.assertRaises(ValueError):
+            backends.use("abacus")
+
+    def test_environment(self) -> None:
+        with (
+            mock.patch.dict(
+                os.environ, {"CRYPTIDSOLVER_BACKEND": backends.REFERENCE}
+            ),
+            mock.patch.object(backends, "_active", None),
+        ):
+            self.assertEqual(backends.active().name, backends.REFERENCE)
+
+
+@unittest.skipUnless(importlib.util.find_spec("numpy"), "NumPy not installed")
+class TestNumpyBackend(unittest.TestCase):
+    def setUp(self) -> None:
+        backend = backends.get(backends.NUMPY)
+        assert isinstance(backend, backends.NumpyBackend)
+        self.backend = backend
+        self.bitset = backends.get(backends.BITSET)
+
+    def test_matrix(self) -> None:
+        gamemap = Map(MAP, STRUCTURES)
+        matrix = self.backend.matrix(gamemap)
+
+        self.assertEqual(matrix.shape, (len(ORDERED_CLUES), 108))
+        for clue, row in zip(ORDERED_CLUES, matrix):
+            self.assertEqual(
+                {gamemap._tile(index) for index in row.nonzero()[0]},
+                gamemap.tiles_from_mask(clue.accepted_mask(gamemap)),
+            )
+
+    def test_chunks(self) -> None:
+        # Chunks smaller than the candidates of a player
+        with mock.patch.object(backends, "CHUNK_ROWS", 3):
+            for game in _positions(seed=7)[::2]:
+                candidates = [
+                    frozenset((player.clue,))
+                    if player.clue is not None
+                    else player.possible_clues(game.map)
+                    for player in game.players
+                ]
+                self.assertEqual(
+                    self.backend.tile_counts(game.map, candidates)[0],
+                    self.bitset.tile_counts(game.map, candidates)[0],
+                )
+
+    def test_no_candidates(self) -> None:
+        gamemap = Map(MAP, STRUCTURES)
+        candidates = [frozenset(ORDERED_CLUES[:2]), frozenset()]
+
+        self.assertEqual(
+            self.backend.tile_counts(gamemap, candidates), ({}, 0)
+        )
@@ -0,0 +1,57 @@
+import random
+import unittest
+from unittest import mock
+
+from cryptidsolver import benchmark
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_scenarios_cover_stages(self) -> None:
+        scenarios = benchmark.scenarios()
+
+        self.assertEqual(
+            {(s.n_players, s.stage) for s in scenarios},
+            {(n, stage) for n in (3, 4, 5) for stage in benchmark.STAGES},
+        )
+        for scenario in scenarios:
+            game = scenario.game()
+            self.assertEqual(game.position, len(scenario.moves))
+
+    def test_clue_sampling_is_bounded(self) -> None:
+        rng = random.Random(0)
+        # The same clue for every player never singles out a tile
+        with mock.patch.object(
+            rng, "sample", side_effect=lambda clues, k: [clues[0]] * k
+        ):
+            with self.assertRaises(RuntimeError):
+                benchmark._test_map_setup(rng, 3)
+
+    def test_run_selected(self) -> None:
+        results = benchmark.run(
+            pattern="Player.possible_clues/test-map/3p", repeat=1
+        )
+
+        self.assertEqual(
+            sorted(results["results"]),
+            [
+                f"Player.possible_clues/test-map/3p/{stage}"
+                for stage in sorted(benchmark.STAGES)
+            ],
+        )
+
+    def test_compare_flags_regressions(self) -> None:
+        baseline = {"results": {"a": {"median": 1.0}, "b": {"median": 1.0}}}
+        current = {
+            "results": {
+                "a": {"median": 1.1},
+                "b": {"median": 2.0},
+                "c": {"median": 1.0},
+            }
+        }
+
+        rows = benchmark.compare(current, baseline, threshold=0.25)
+
+        self.assertEqual(
+            [(row["benchmark"], row["regression"]) for row in rows],
+            [("a", False), ("b", True)],
+        )
@@ -0,0 +1,89 @@
+import random
+import unittest
+
+from cryptidsolver import bitboard
+from cryptidsolver.constant.clues import ORDERED_CLUES
+from cryptidsolver.gamemap import Map, Structure
+
+MAP_DESCRIPTOR = ["3N", "1S", "5S", "4S", "2N", "6S"]
+STRUCTURES = [
+    Structure("green", "stone", 12, 2),
+    Structure("green", "shack", 7, 3),
+    Structure("white", "stone", 8, 6),
+    Structure("white", "shack", 10, 8),
+    Structure("blue", "stone", 9, 1),
+    Structure("blue", "shack", 7, 4),
+]
+
+
+def coordinates(tiles) -> set[tuple[int, int]]:
+    return {(tile.x, tile.y) for tile in tiles}
+
+
+class TestIndexing(unittest.TestCase):
+    def test_index_round_trip(self) -> None:
+        for index in range(bitboard.BOARD_SIZE):
+            x, y = bitboard.index_coordinates(index)
+            self.assertEqual(bitboard.tile_index(x, y), index)
+
+    def test_iter_indices_returns_set_bits(self) -> None:
+        self.assertEqual(list(bitboard.iter_indices(0b100101)), [0, 2, 5])
+
+
+class TestDilate(unittest.TestCase):
+    def setUp(self) -> None:
+        self.map = Map(MAP_DESCRIPTOR, STRUCTURES)
+
+    def test_single_tile_matches_tiles_on_distance(self) -> None:
+        for tile in self.map:
+            for distance in range(4):
+                dilated = bitboard.dilate(
+                    1 << bitboard.tile_index(tile.x, tile.y), distance
+                )
+
+                self.assertSetEqual(
+                    coordinates(self.map.tiles_from_mask(dilated)),
+                    coordinates(
+                        self.map.tiles_on_distance(tile.x, tile.y, distance)
+                    ),
+                    msg=f"Dilation differs from tile walk on {tile}",
+                )
+
+    def test_dilation_distributes_over_union(self) -> None:
+        rng = random.Random(0)
+
+        for _ in range(100):
+            mask = rng.getrandbits(bitboard.BOARD_SIZE)
+            expected = 0
+            for index in bitboard.iter_indices(mask):
+                expected |= bitboard.dilate(1 << index, 2)
+
+            self.assertEqual(bitboard.dilate(mask, 2), expected)
+
+    def test_clue_masks_match_tile_walk(self) -> None:
+        for clue in ORDERED_CLUES:
+            expected = set()
+            for tile in self.map:
+                for near in self.map.tiles_on_distance(
+                    tile.x, tile.y, clue.distance
+                ):
+                    features = {near.biome, near.animal}
+                    if near.structure is not None:
+                        features |= {
+                            near.structure.color,
+                            near.structure.shape,
+                        }
+                    if features & clue.distance_from:
+                        expected.add((tile.x, tile.y))
+
+            self.assertSetEqual(
+                coordinates(
+                    self.map.tiles_from_mask(clue.accepted_mask(self.map))
+                ),
+                expected,
+                msg=f"Mask of '{clue}' differs from tile walk",
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import os
+import tempfile
+import unittest
+
+from cryptidsolver import cache
+from cryptidsolver.constant import clues
+from cryptidsolver.constant.clues import ORDERED_CLUES
+from cryptidsolver.game import Game
+from cryptidsolver.gamemap import Map, Structure
+from cryptidsolver.player import Player
+from cryptidsolver.solutions import solution_table
+
+MAP_DESCRIPTOR = ["3N", "1S", "5S", "4S", "2N", "6S"]
+STRUCTURES = [
+    Structure("green", "stone", 12, 2),
+    Structure("green", "shack", 7, 3),
+    Structure("white", "stone", 8, 6),
+    Structure("white", "shack", 10, 8),
+    Structure("blue", "stone", 9, 1),
+    Structure("blue", "shack", 7, 4),
+]
+
+
+class TestPersistentCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "cache.sqlite")
+
+    def tearDown(self) -> None:
+        cache.disable()
+        self.directory.cleanup()
+
+    def test_stored_entry_is_returned(self) -> None:
+        store = cache.PersistentCache(self.path)
+        store.put("abc", "kind", b"payload")
+
+        self.assertEqual(store.get("abc", "kind"), b"payload")
+        self.assertIsNone(store.get("abc", "other"))
+        store.close()
+
+    def test_entries_are_visible_to_other_connections(self) -> None:
+        writer = cache.PersistentCache(self.path)
+        reader = cache.PersistentCache(self.path)
+
+        writer.put("abc", "kind", b"payload")
+
+        self.assertEqual(reader.get("abc", "kind"), b"payload")
+        writer.close()
+        reader.close()
+
+    def test_least_recently_used_entries_are_evicted(self) -> None:
+        store = cache.PersistentCache(self.path, max_bytes=20)
+
+        store.put("first", "kind", b"x" * 10)
+        store.put("second", "kind", b"x" * 10)
+        # Refresh the first entry, leaving second as least recently used
+        store.get("first", "kind")
+        store.put("third", "kind", b"x" * 10)
+
+        self.assertIsNotNone(store.get("first", "kind"))
+        self.assertIsNone(store.get("second", "kind"))
+        self.assertLessEqual(store.size(), 20)
+        store.close()
+
+
+class TestWarmClueMasks(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        cache.enable(os.path.join(self.directory.name, "cache.sqlite"))
+
+    def tearDown(self) -> None:
+        cache.disable()
+        self.directory.cleanup()
+
+    def test_masks_are_loaded_for_seen_maps(self) -> None:
+        players = [
+            Player("orange", clues.by_booklet_entry("alpha", 2)),
+            Player("cyan"),
+            Player("purple"),
+        ]
+        first = Game(MAP_DESCRIPTOR, players, STRUCTURES)
+
+        gamemap = Map(MAP_DESCRIPTOR, STRUCTURES)
+        self.assertEqual(len(gamemap._clue_masks), 0)
+
+        cache.warm_clue_masks(gamemap)
+
+        self.assertEqual(len(gamemap._clue_masks), len(ORDERED_CLUES))
+        for clue in ORDERED_CLUES:
+            self.assertEqual(
+                clue.accepted_mask(gamemap), clue.accepted_mask(first.map)
+            )
+
+    def test_solution_table_survives_reload(self) -> None:
+        computed = solution_table(Map(MAP_DESCRIPTOR, STRUCTURES), 3)
+        loaded = solution_table(Map(MAP_DESCRIPTOR, STRUCTURES), 3)
+
+        self.assertDictEqual(computed, loaded)
+
+
+if __name__ == "__main__":
+    unittest.main()
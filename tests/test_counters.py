@@ -0,0 +1,151 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from cryptidsolver import cache, counters, distribution, infer
+from cryptidsolver.clue import Clue
+from cryptidsolver.constant import clues
+from cryptidsolver.game import Game
+from cryptidsolver.gamemap import Map, Structure
+from cryptidsolver.player import Player
+
+MAP_DESCRIPTOR = ["3N", "1S", "5S", "4S", "2N", "6S"]
+STRUCTURES = [
+    Structure("green", "stone", 12, 2),
+    Structure("green", "shack", 7, 3),
+    Structure("white", "stone", 8, 6),
+    Structure("white", "shack", 10, 8),
+    Structure("blue", "stone", 9, 1),
+    Structure("blue", "shack", 7, 4),
+]
+
+# Clues of the base game, without the black structures
+N_CLUES = len(clues.CLUE_COLLECTION) - 1
+
+
+def _game() -> Game:
+    players = [
+        Player("orange", clues.by_booklet_entry("alpha", 2)),
+        Player("cyan"),
+        Player("purple"),
+    ]
+    game = Game(MAP_DESCRIPTOR, players, STRUCTURES)
+    game.place(1, 1, 1, cube=True)
+    game.place(2, 3, 3, cube=False)
+    game.place(1, 5, 5, cube=False)
+    game.place(2, 8, 8, cube=True)
+    return game
+
+
+class TestOperationCounts(unittest.TestCase):
+    """
+    Upper bounds on the work of fixed scenarios. Exceeding one means the
+    algorithm does more work than before, regardless of the host.
+    """
+
+    def setUp(self) -> None:
+        Clue.accepted_tiles.cache_clear()
+        self.game = _game()
+
+    def test_possible_clues_evaluates_each_clue_once(self) -> None:
+        player = self.game.players[1]
+
+        with counters.delta() as cold:
+            player.possible_clues(self.game.map)
+        with counters.delta() as warm:
+            player.possible_clues(self.game.map)
+
+        self.assertLessEqual(cold[counters.CLUE_EVALUATIONS], N_CLUES)
+        self.assertLessEqual(cold[counters.CLUE_MASK_MISSES], N_CLUES)
+        self.assertLessEqual(warm[counters.CLUE_EVALUATIONS], N_CLUES)
+        self.assertNotIn(counters.CLUE_MASK_MISSES, warm)
+
+    def test_possible_tiles(self) -> None:
+        with counters.delta() as cold:
+            self.game.possible_tiles().counts()
+        with counters.delta() as warm:
+            self.game.possible_tiles().counts()
+
+        self.assertLessEqual(cold[counters.COMBINATIONS], 64)
+        self.assertLessEqual(cold[counters.CLUE_EVALUATIONS], 2 * N_CLUES + 16)
+        # Combinations are intersected as bitboards, not tile sets
+        self.assertNotIn(counters.TILE_SETS, cold)
+        self.assertEqual(
+            warm[counters.COMBINATIONS], cold[counters.COMBINATIONS]
+        )
+
+    def test_possible_tiles_by_product(self) -> None:
+        with counters.delta() as counts:
+            self.game.possible_tiles(algorithm=distribution.PRODUCT).counts()
+
+        self.assertLessEqual(counts[counters.COMBINATIONS], 56)
+
+    def test_infer_per_tile(self) -> None:
+        player = self.game.players[2]
+        tiles = [(x, 4) for x in range(1, 13)]
+
+        with counters.delta() as counts:
+            for tile in tiles:
+                infer.possible_clues_after_cube_placement(
+                    self.game.map, player, tile
+                )
+                infer.possible_clues_after_disk_placement(
+                    self.game.map, player, tile
+                )
+
+        self.assertLessEqual(
+            counts[counters.CLUE_EVALUATIONS], 2 * len(tiles) * N_CLUES
+        )
+        # Masks are computed once per map, not per tile
+        self.assertLessEqual(counts[counters.CLUE_MASK_MISSES], N_CLUES)
+
+    def test_tiles_on_distance(self) -> None:
+        with counters.delta() as counts:
+            self.game.map.tiles_on_distance(6, 5, 2)
+
+        # A hexagon of radius 2
+        self.assertLessEqual(counts[counters.TILES_VISITED], 19)
+
+    def test_persistent_cache(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            cache.enable(os.path.join(directory, "cache.sqlite"))
+            try:
+                with counters.delta() as cold:
+                    cache.warm_clue_masks(Map(MAP_DESCRIPTOR, STRUCTURES))
+                with counters.delta() as warm:
+                    cache.warm_clue_masks(Map(MAP_DESCRIPTOR, STRUCTURES))
+            finally:
+                cache.disable()
+
+        self.assertEqual(cold[counters.PERSISTENT_MISSES], 1)
+        self.assertEqual(warm[counters.PERSISTENT_HITS], 1)
+        self.assertNotIn(counters.CLUE_EVALUATIONS, warm)
+
+
+class TestCounters(unittest.TestCase):
+    def test_reset(self) -> None:
+        counters.increment("test.counter", 3)
+        self.assertEqual(counters.snapshot()["test.counter"], 3)
+
+        counters.reset()
+        self.assertNotIn("test.counter", counters.snapshot())
+
+    def test_threads(self) -> None:
+        def count() -> None:
+            for _ in range(10_000):
+                counters.increment("test.threads")
+
+        with counters.delta() as counts:
+            threads = [threading.Thread(target=count) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        # Increments are not locked, a thread switch may lose a count
+        self.assertLessEqual(counts["test.threads"], 40_000)
+        self.assertGreater(counts["test.threads"], 30_000)
+        self.assertEqual(
+            counters.value("test.threads"), counts["test.threads"]
+        )
@@ -0,0 +1,84 @@
+import functools
+import unittest
+
+from cryptidsolver import benchmark, distribution
+from cryptidsolver.game import Game
+
+
+def _reference(game: Game) -> dict:
+    counts: dict = {}
+    candidates = [
+        [player.clue]
+        if player.clue is not None
+        else player.possible_clues(game.map)
+        for player in game.players
+    ]
+
+    def extend(chosen: tuple) -> None:
+        if len(chosen) == len(candidates):
+            tiles = functools.reduce(
+                lambda x, y: x & y.accepted_tiles(game.map),
+                chosen,
+                set(game.map),
+            )
+            if len(tiles) == 1:
+                tile = tiles.pop()
+                counts[tile] = counts.get(tile, 0) + 1
+            return
+
+        for clue in candidates[len(chosen)]:
+            extend((*chosen, clue))
+
+    extend(())
+    total = sum(counts.values())
+    return {tile: count / total for tile, count in counts.items()}
+
+
+class TestStrategies(unittest.TestCase):
+    def test_strategies_agree(self) -> None:
+        for scenario in benchmark.scenarios(seed=3):
+            # The reference enumerates every combination
+            if scenario.stage == "opening":
+                continue
+
+            game = scenario.game()
+            expected = _reference(game)
+            for algorithm in distribution.ALGORITHMS:
+                with self.subTest(scenario=scenario.name, algorithm=algorithm):
+                    self.assertEqual(
+                        game.possible_tiles(algorithm=algorithm), expected
+                    )
+
+    def test_unknown_strategy(self) -> None:
+        game = benchmark.scenarios(seed=3)[-1].game()
+
+        with self.assertRaises(ValueError):
+            dict(game.possible_tiles(algorithm="quantum"))
+
+
+class TestSelection(unittest.TestCase):
+    def tearDown(self) -> None:
+        distribution.force(None)
+
+    def test_select_by_space(self) -> None:
+        crossover = distribution.crossover()
+
+        self.assertEqual(distribution.select(crossover), distribution.PRODUCT)
+        self.assertEqual(
+            distribution.select(crossover + 1), distribution.PRUNING
+        )
+
+    def test_force(self) -> None:
+        distribution.force(distribution.PRODUCT)
+        self.assertEqual(distribution.select(10**9), distribution.PRODUCT)
+
+        with self.assertRaises(ValueError):
+            distribution.force("quantum")
+
+    def test_calibrate(self) -> None:
+        crossover = distribution.calibrate(apply=False)
+
+        self.assertGreaterEqual(crossover, 0)
+        self.assertEqual(
+            distribution.crossover(), distribution.DEFAULT_CROSSOVER
+        )
@@ -0,0 +1,158 @@
+import io
+import json
+import os
+import pstats
+import tempfile
+import unittest
+from pathlib import Path
+
+from cryptidsolver import engine
+from cryptidsolver.profiling import CommandProfiler
+
+SETUP = (
+    "--map 3N 1S 5S 4S 2N 6S --players @orange_a2 cyan_b79 purple_e28"
+    " --structures green_ss_12,2 green_as_7,3 white_ss_8,6 white_as_10,8"
+    " blue_ss_9,1 blue_as_7,4"
+)
+
+
+def new_engine() -> engine.Engine:
+    return engine.Engine(
+        engine.new_game(
+            ["3N", "1S", "5S", "4S", "2N", "6S"],
+            ["@orange_a2", "cyan_b79", "purple_e28"],
+            [
+                "green_ss_12,2",
+                "green_as_7,3",
+                "white_ss_8,6",
+                "white_as_10,8",
+                "blue_ss_9,1",
+                "blue_as_7,4",
+            ],
+        )
+    )
+
+
+class TestEngine(unittest.TestCase):
+    def test_placements_and_undo(self) -> None:
+        solver = new_engine()
+
+        placed = solver.execute("place c 1 1")
+        answered = solver.execute("answer Cyan d 5 5")
+
+        self.assertTrue(placed.ok)
+        self.assertEqual(answered.data["player"], "cyan")
+        self.assertEqual(solver.game.gametick, 2)
+
+        undone = solver.execute("undo")
+
+        self.assertEqual(undone.data["object"], "disk")
+        self.assertEqual(solver.game.gametick, 1)
+        self.assertEqual(len(solver.game.players[1].disks), 0)
+
+    def test_failing_commands(self) -> None:
+        solver = new_engine()
+
+        self.assertFalse(solver.execute("undo").ok)
+        self.assertFalse(solver.execute("answer red c 1 1").ok)
+        self.assertFalse(solver.execute("place x 1 1").ok)
+
+        unknown = solver.execute("hello")
+        self.assertFalse(unknown.ok)
+        self.assertEqual(unknown.text, engine.HELP)
+
+    def test_run_writes_json_lines(self) -> None:
+        output = io.StringIO()
+        commands = ["# comment", "place c 1 1", "", "answer cyan d a b"]
+
+        results = engine.run(new_engine(), commands, output, json_lines=True)
+        written = [json.loads(line) for line in output.getvalue().splitlines()]
+
+        self.assertEqual(written, results)
+        self.assertEqual(
+            [(result["command"], result["ok"]) for result in results],
+            [("place c 1 1", True), ("answer cyan d a b", False)],
+        )
+        self.assertIn("error", results[1])
+
+
+class TestReplay(unittest.TestCase):
+    def test_replay_directory(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            sessions = os.path.join(directory, "sessions")
+            output = os.path.join(directory, "output")
+            os.mkdir(sessions)
+
+            with open(os.path.join(sessions, "a.txt"), "w") as handle:
+                handle.write(f"{SETUP}\nplace c 1 1\nlocation prob\n")
+            with open(os.path.join(sessions, "b.txt"), "w") as handle:
+                handle.write("place c 1 1\n")
+
+            summaries = engine.replay_directory(sessions, output, workers=2)
+
+            with open(os.path.join(output, "a.jsonl")) as handle:
+                replayed = [json.loads(line) for line in handle]
+
+        self.assertEqual(
+            [(s["session"], s["commands"], s["errors"]) for s in summaries],
+            [("a.txt", 2, 0), ("b.txt", 1, 1)],
+        )
+        self.assertEqual(len(replayed), 2)
+        self.assertAlmostEqual(
+            sum(
+                location["probability"]
+                for location in replayed[1]["locations"]
+            ),
+            1.0,
+        )
+
+
+class TestCommandProfiler(unittest.TestCase):
+    def test_pstats_per_command(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            output = io.StringIO()
+            records = engine.run(
+                new_engine(),
+                ["place c 1 1", "location prob"],
+                output,
+                profiler=CommandProfiler(directory),
+            )
+
+            paths = [Path(record["profile"]) for record in records]
+            self.assertEqual(
+                [path.name for path in paths],
+                ["0001-place-c-1-1.prof", "0002-location-prob.prof"],
+            )
+            functions = pstats.Stats(str(paths[1])).get_stats_profile()
+            self.assertIn("possible_tiles", functions.func_profiles)
+
+        self.assertIn("[location prob took", output.getvalue())
+
+    def test_collapsed_stacks(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            _, record = engine.respond(
+                new_engine(),
+                "location prob",
+                CommandProfiler(directory, "collapsed"),
+            )
+
+            with open(record["profile"], encoding="utf-8") as handle:
+                lines = handle.read().splitlines()
+
+        stacks = dict(line.rsplit(" ", 1) for line in lines)
+        self.assertTrue(
+            any("possible_tiles (game.py" in stack for stack in stacks)
+        )
+        self.assertTrue(
+            all(stack.startswith("execute (engine.py") for stack in stacks)
+        )
+        # Microseconds of the command, apart from rounding
+        self.assertLessEqual(
+            sum(int(weight) for weight in stacks.values()),
+            record["elapsed"] * 1e6 + len(stacks),
+        )
+
+    def test_unknown_format(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            with self.assertRaises(ValueError):
+                CommandProfiler(directory, "svg")
@@ -1,5 +1,8 @@
 import unittest
+from unittest import mock
 
+from cryptidsolver import backends, counters, distribution
+from cryptidsolver.bitboard import FULL_BOARD, coordinates_mask
 from cryptidsolver.constant import clues
 from cryptidsolver.game import Game
 from cryptidsolver.gamemap import Structure
@@ -80,6 +83,23 @@ class TestAcceptsCube(unittest.TestCase):
             msg="Cubes can be placed on tiles with other cubes",
         )
 
+    def test_rejects_when_cube_added_to_player_directly(self) -> None:
+        # Answers to questions add cubes without advancing the game
+        self.game.players[2].cubes.append((4, 5))
+
+        self.assertFalse(self.game.accepts_cube(4, 5))
+
+    def test_free_tiles_exclude_cubes(self) -> None:
+        self.game.place_cube(1, 1)
+        self.game.place_cube(2, 2)
+        self.game.place_disk(3, 3)
+
+        self.assertEqual(
+            self.game.free_tiles(),
+            FULL_BOARD ^ coordinates_mask([(1, 1), (2, 2)]),
+        )
+        self.assertEqual(self.game.disk_mask(), coordinates_mask([(3, 3)]))
+
 
 class TestDiskPlacement(unittest.TestCase):
     def setUp(self) -> None:
@@ -108,6 +128,119 @@ class TestDiskPlacement(unittest.TestCase):
         self.assertEqual(self.game.gametick, before_placement + 1)
 
 
+class TestHistory(unittest.TestCase):
+    def setUp(self) -> None:
+        players = [
+            Player("orange", clues.by_booklet_entry("alpha", 2)),
+            Player("cyan", None),
+            Player("purple", None),
+        ]
+
+        self.game = Game(MAP_DESCRIPTOR, players, STRUCTURES)
+
+    def state(self, game: Game) -> tuple:
+        return (
+            game.gametick,
+            [(list(p.cubes), list(p.disks)) for p in game.players],
+            game.cube_mask(),
+            game.disk_mask(),
+        )
+
+    def place(self, game: Game, num: int) -> None:
+        # Every seat in turn, the last one ending the round
+        n_players = len(game.players)
+        game.place(
+            num % n_players,
+            num % 12 + 1,
+            num % 9 + 1,
+            cube=num % 2 == 0,
+            advance_tick=num % n_players == n_players - 1,
+        )
+
+    def place_many(self, game: Game, n_placements: int) -> None:
+        for num in range(n_placements):
+            self.place(game, num)
+
+    def test_undo_restores_previous_position(self) -> None:
+        self.game.place_cube(1, 1)
+        before = self.state(self.game)
+
+        self.game.place_disk(2, 2)
+        self.game.undo()
+
+        self.assertEqual(self.state(self.game), before)
+        self.assertEqual(self.game.position, 1)
+
+    def test_undo_across_snapshots(self) -> None:
+        states = [self.state(self.game)]
+        for num in range(70):
+            self.place(self.game, num)
+            states.append(self.state(self.game))
+
+        with mock.patch.object(self.game, "_apply") as apply:
+            for position in range(69, 29, -1):
+                self.game.undo()
+                self.assertEqual(self.state(self.game), states[position])
+        apply.assert_not_called()
+
+        # Placed again after the undone snapshots, and restored from them
+        for num in range(30, 70):
+            self.place(self.game, num)
+        self.game.rewind(33)
+        self.assertEqual(self.state(self.game), states[33])
+
+    def test_undo_after_unrecorded_placements(self) -> None:
+        self.place_many(self.game, 5)
+        before = self.state(self.game)
+
+        self.game.place_cube(12, 9, advance_tick=False)
+        self.game.current_player().cubes.append((1, 9))
+        self.game.undo()
+
+        self.assertEqual(self.state(self.game), before)
+
+    def test_rewind_across_snapshots(self) -> None:
+        states = [self.state(self.game)]
+        for num in range(100):
+            self.place(self.game, num)
+            states.append(self.state(self.game))
+
+        reference = self.game.branch()
+        reference.rewind(0)
+        self.assertEqual(self.state(reference), states[0])
+
+        for position in (99, 65, 64, 32, 31, 1, 0):
+            self.game.rewind(position)
+            self.assertEqual(self.state(self.game), states[position])
+
+    def test_replay_reproduces_game(self) -> None:
+        self.place_many(self.game, 40)
+
+        replayed = Game(
+            MAP_DESCRIPTOR,
+            [Player(p.color, p.clue) for p in self.game.players],
+            STRUCTURES,
+        )
+        replayed.replay(self.game.history)
+
+        self.assertEqual(self.state(replayed), self.state(self.game))
+
+    def test_branches_are_independent(self) -> None:
+        self.place_many(self.game, 10)
+        before = self.state(self.game)
+
+        branch = self.game.branch()
+        branch.place(1, 5, 5, cube=True, advance_tick=True)
+        branch.undo(3)
+
+        self.assertEqual(self.state(self.game), before)
+        self.assertEqual(branch.position, 8)
+
+    def test_rewind_out_of_range(self) -> None:
+        with self.assertRaises(ValueError):
+            self.game.rewind(1)
+
+
 class TestPossibleTiles(unittest.TestCase):
     def test_known_clues_return_a_single_tile(self) -> None:
         player_1 = Player(
@@ -132,5 +265,141 @@ class TestPossibleTiles(unittest.TestCase):
         )
 
 
+class TestLazyPossibleTiles(unittest.TestCase):
+    def setUp(self) -> None:
+        players = [
+            Player("red", clues.by_booklet_entry("alpha", 2)),
+            Player("orange", None),
+            Player("purple", None),
+        ]
+        self.game = Game(MAP_DESCRIPTOR, players, STRUCTURES)
+        self.game.place(1, 1, 1, cube=True)
+
+    def test_mapping(self) -> None:
+        possible_tiles = self.game.possible_tiles()
+        counts = self.game.possible_tiles().counts()
+        total = sum(counts.values())
+
+        self.assertEqual(
+            possible_tiles,
+            {tile: count / total for tile, count in counts.items()},
+        )
+        self.assertEqual(len(possible_tiles), len(counts))
+
+    def test_predicates_agree_with_counts(self) -> None:
+        counts = self.game.possible_tiles().counts()
+
+        self.assertFalse(self.game.possible_tiles().is_determined())
+        self.assertEqual(self.game.possible_tiles().support(), set(counts))
+        for tile in self.game.map:
+            self.assertEqual(
+                self.game.possible_tiles().contains(tile), tile in counts
+            )
+
+    def test_determined(self) -> None:
+        self.game.players[1].clue = clues.by_booklet_entry("beta", 79)
+        self.game.players[2].clue = clues.by_booklet_entry("epsilon", 28)
+
+        self.assertTrue(self.game.possible_tiles().is_determined())
+
+    def test_early_exit(self) -> None:
+        with counters.delta() as full:
+            self.game.possible_tiles().counts()
+        with counters.delta() as determined:
+            self.game.possible_tiles().is_determined()
+
+        self.assertLess(
+            determined[counters.COMBINATIONS], full[counters.COMBINATIONS]
+        )
+
+    def test_answers_are_kept(self) -> None:
+        possible_tiles = self.game.possible_tiles()
+        tile = self.game.map[6, 6]
+
+        def ask() -> tuple:
+            return (
+                possible_tiles.is_determined(),
+                tile in possible_tiles,
+                possible_tiles.support(),
+            )
+
+        first = ask()
+        with counters.delta() as again:
+            self.assertEqual(ask(), first)
+
+        self.assertNotIn(counters.COMBINATIONS, again)
+
+    def test_predicates_follow_the_backend(self) -> None:
+        backends.use(backends.REFERENCE)
+        self.addCleanup(backends.use, backends.DEFAULT_BACKEND)
+
+        with mock.patch.object(
+            distribution, "PruningSearch", side_effect=AssertionError
+        ):
+            possible_tiles = self.game.possible_tiles()
+            self.assertFalse(possible_tiles.is_determined())
+            self.assertEqual(
+                possible_tiles.support(), set(possible_tiles.counts())
+            )
+
+    def test_snapshot_of_the_position(self) -> None:
+        possible_tiles = self.game.possible_tiles()
+        counts = dict(possible_tiles.counts())
+        before = self.game.possible_tiles()
+
+        self.game.place(1, 6, 6, cube=False)
+
+        self.assertEqual(before.counts(), counts)
+        self.assertIs(possible_tiles.counts(), possible_tiles.counts())
+
+
+class TestSolutions(unittest.TestCase):
+    def setUp(self) -> None:
+        players = [
+            Player("red", clues.by_booklet_entry("alpha", 2)),
+            Player("orange", None),
+            Player("purple", None),
+        ]
+        self.game = Game(MAP_DESCRIPTOR, players, STRUCTURES)
+        self.game.place(1, 1, 1, cube=True)
+        self.game.place(2, 5, 5, cube=False)
+
+    def test_solutions_add_up_to_the_counts(self) -> None:
+        counts: dict = {}
+        for solution in self.game.iter_solutions():
+            counts[solution.tile] = counts.get(solution.tile, 0) + 1
+
+        self.assertEqual(counts, self.game.possible_tiles().counts())
+
+    def test_solutions_single_out_their_tile(self) -> None:
+        known = self.game.players[0].clue
+
+        for solution in self.game.iter_solutions():
+            self.assertEqual(solution.clues[0], known)
+            accepted = FULL_BOARD
+            for clue in solution.clues:
+                accepted &= clue.accepted_mask(self.game.map)
+            self.assertEqual(
+                accepted,
+                coordinates_mask([(solution.tile.x, solution.tile.y)]),
+            )
+
+    def test_close(self) -> None:
+        solutions = self.game.iter_solutions()
+        next(solutions)
+        solutions.close()
+
+        with self.assertRaises(StopIteration):
+            next(solutions)
+
+    def test_snapshot_of_the_position(self) -> None:
+        solutions = self.game.iter_solutions()
+        expected = list(self.game.iter_solutions())
+
+        self.game.place(1, 6, 6, cube=False)
+
+        self.assertEqual(list(solutions), expected)
+
+
 if __name__ == "__main__":
     unittest.main()
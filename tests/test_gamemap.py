@@ -1,6 +1,7 @@
 import unittest
 
-from cryptidsolver.gamemap import Map, Structure
+from cryptidsolver.bitboard import tile_index
+from cryptidsolver.gamemap import ANIMAL_CODES, Map, Structure
 
 MAP_DESCRIPTOR = ["3N", "1S", "5S", "4S", "2N", "6S"]
 STRUCTURES = [
@@ -109,5 +110,59 @@ class TestMapGeneration(unittest.TestCase):
             )
 
 
+class TestFlatStorage(unittest.TestCase):
+    def setUp(self) -> None:
+        self.gamemap = Map(MAP_DESCRIPTOR, STRUCTURES)
+
+    def test_index_access_matches_coordinate_access(self) -> None:
+        for tile in self.gamemap:
+            self.assertIs(
+                self.gamemap._tile(tile_index(tile.x, tile.y)),
+                self.gamemap[tile.x, tile.y],
+            )
+
+    def test_feature_arrays_match_tiles(self) -> None:
+        for index, tile in enumerate(self.gamemap):
+            self.assertEqual(chr(self.gamemap._biomes[index]), tile.biome)
+            self.assertEqual(
+                self.gamemap._animals[index], ANIMAL_CODES[tile.animal]
+            )
+            self.assertEqual(
+                self.gamemap._structures[index] != 0,
+                tile.structure is not None,
+            )
+
+    def test_rejects_coordinates_outside_map(self) -> None:
+        for coordinates in ((0, 1), (1, 0), (13, 1), (1, 10)):
+            with self.assertRaises(AssertionError):
+                _ = self.gamemap[coordinates]
+
+    def test_matrix_view_is_column_major(self) -> None:
+        matrix = self.gamemap.map
+
+        self.assertEqual(len(matrix), 12)
+        self.assertIs(matrix[2][5], self.gamemap[3, 6])
+
+
+class TestNeighbourhood(unittest.TestCase):
+    def setUp(self) -> None:
+        self.gamemap = Map(MAP_DESCRIPTOR, STRUCTURES)
+
+    def test_neighbourhood_includes_the_tile(self) -> None:
+        # Distances count from the tile itself, so a clue on distance 1
+        # accepts the tiles having the feature
+        for tile in self.gamemap:
+            neighbours = Map.neighbouring_coordinates(tile.x, tile.y)
+
+            self.assertIn((tile.x, tile.y), neighbours)
+            self.assertIn(
+                tile, self.gamemap.tiles_on_distance(tile.x, tile.y, 1)
+            )
+            self.assertEqual(
+                self.gamemap.tiles_on_distance(tile.x, tile.y, 0),
+                frozenset((tile,)),
+            )
+
+
 if __name__ == "__main__":
     unittest.main()
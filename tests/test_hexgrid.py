@@ -0,0 +1,109 @@
+import random
+import unittest
+from collections import deque
+
+from cryptidsolver import hexgrid
+from cryptidsolver.constant.limits import _MAP_MAX_X, _MAP_MAX_Y
+from cryptidsolver.gamemap import Map
+
+ALL_COORDINATES = [
+    (x, y) for x in range(1, _MAP_MAX_X + 1) for y in range(1, _MAP_MAX_Y + 1)
+]
+
+
+def offset_neighbours(x: int, y: int) -> set[tuple[int, int]]:
+    # Parity rules of the game, written out by hand. Like
+    # Map.neighbouring_coordinates, the neighbourhood includes the tile.
+    neighbours = set()
+    for col in (x - 1, x, x + 1):
+        for row in (y - 1, y, y + 1):
+            if x % 2 == 1 and row == y + 1 and col != x:
+                continue
+            if x % 2 == 0 and row == y - 1 and col != x:
+                continue
+            if 1 <= col <= _MAP_MAX_X and 1 <= row <= _MAP_MAX_Y:
+                neighbours.add((col, row))
+    return neighbours
+
+
+def bfs_distances(x: int, y: int) -> dict[tuple[int, int], int]:
+    distances = {(x, y): 0}
+    queue = deque([(x, y)])
+    while queue:
+        current = queue.popleft()
+        for neighbour in offset_neighbours(*current):
+            if neighbour not in distances:
+                distances[neighbour] = distances[current] + 1
+                queue.append(neighbour)
+    return distances
+
+
+class TestCubeConversion(unittest.TestCase):
+    def test_round_trip(self) -> None:
+        for x, y in ALL_COORDINATES:
+            q, r, s = hexgrid.to_cube(x, y)
+
+            self.assertEqual(q + r + s, 0)
+            self.assertEqual(hexgrid.from_cube(q, r, s), (x, y))
+
+
+class TestDistance(unittest.TestCase):
+    def test_distance_matches_bfs_for_every_pair(self) -> None:
+        for origin in ALL_COORDINATES:
+            distances = bfs_distances(*origin)
+
+            for target in ALL_COORDINATES:
+                self.assertEqual(
+                    hexgrid.hex_distance(origin, target),
+                    distances[target],
+                    msg=f"Distance from {origin} to {target}",
+                )
+
+    def test_neighbours_match_parity_rules(self) -> None:
+        for x, y in ALL_COORDINATES:
+            self.assertSetEqual(
+                set(Map.neighbouring_coordinates(x, y)),
+                offset_neighbours(x, y),
+            )
+
+    def test_neighbours_include_the_tile(self) -> None:
+        # Outputs of the parity rules before the hex grid
+        self.assertSetEqual(
+            set(Map.neighbouring_coordinates(3, 3)),
+            {(2, 2), (2, 3), (3, 2), (3, 3), (3, 4), (4, 2), (4, 3)},
+        )
+        self.assertSetEqual(
+            set(Map.neighbouring_coordinates(4, 4)),
+            {(3, 4), (3, 5), (4, 3), (4, 4), (4, 5), (5, 4), (5, 5)},
+        )
+        self.assertSetEqual(
+            set(Map.neighbouring_coordinates(1, 1)), {(1, 1), (1, 2), (2, 1)}
+        )
+
+
+class TestRingAndRange(unittest.TestCase):
+    def test_ring_and_within_match_bfs(self) -> None:
+        rng = random.Random(0)
+
+        for _ in range(200):
+            origin = rng.choice(ALL_COORDINATES)
+            radius = rng.randrange(0, 8)
+            distances = bfs_distances(*origin)
+
+            ring = list(hexgrid.ring(*origin, radius))
+            within = list(hexgrid.within(*origin, radius))
+
+            self.assertEqual(len(ring), len(set(ring)))
+            self.assertSetEqual(
+                set(ring),
+                {c for c, d in distances.items() if d == radius},
+            )
+            self.assertEqual(len(within), len(set(within)))
+            self.assertSetEqual(
+                set(within),
+                {c for c, d in distances.items() if d <= radius},
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from cryptidsolver import layout
+from cryptidsolver.clue import Clue
+from cryptidsolver.gamemap import Map, Structure
+
+MAP_DESCRIPTOR = ["3N", "1S", "5S", "4S", "2N", "6S"]
+STRUCTURES = [
+    Structure("green", "stone", 12, 2),
+    Structure("green", "shack", 7, 3),
+    Structure("white", "stone", 8, 6),
+    Structure("white", "shack", 10, 8),
+    Structure("blue", "stone", 9, 1),
+    Structure("blue", "shack", 7, 4),
+]
+
+
+def walked_tiles(clue: Clue, gamemap: Map) -> set:
+    # Per-tile evaluation, independent of any precomputed mask
+    accepted = set()
+    for tile in gamemap:
+        for near in gamemap.tiles_on_distance(tile.x, tile.y, clue.distance):
+            feature = near.biome if clue.clue_type == "biome" else near.animal
+            if feature in clue.distance_from:
+                accepted.add(tile)
+    return accepted
+
+
+class TestLayoutNumbering(unittest.TestCase):
+    def test_round_trip(self) -> None:
+        for number in (0, 1, 63, 64, 12345, layout.N_LAYOUTS - 1):
+            self.assertEqual(
+                layout.layout_number(layout.layout_description(number)),
+                number,
+            )
+
+    def test_description_round_trip(self) -> None:
+        number = layout.layout_number(MAP_DESCRIPTOR)
+
+        self.assertEqual(layout.layout_description(number), MAP_DESCRIPTOR)
+
+    def test_rejects_repeated_pieces(self) -> None:
+        with self.assertRaises(ValueError):
+            layout.layout_number(["1N", "1S", "5S", "4S", "2N", "6S"])
+
+
+class TestTerrainMasks(unittest.TestCase):
+    def test_masks_match_tile_walk(self) -> None:
+        for description in (
+            MAP_DESCRIPTOR,
+            ["6N", "5S", "2N", "3N", "4N", "1S"],
+        ):
+            gamemap = Map(description, STRUCTURES)
+            masks = layout.compute_terrain_masks(description)
+
+            for (clue_type, distance, distance_from), mask in zip(
+                layout.TERRAIN_CLUES, masks
+            ):
+                clue = Clue(distance, set(distance_from), clue_type)
+
+                self.assertSetEqual(
+                    set(gamemap.tiles_from_mask(mask)),
+                    walked_tiles(clue, gamemap),
+                    msg=f"Mask of '{clue}' differs from tile walk",
+                )
+
+
+class TestMaskTable(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "masks.bin")
+        self.number = layout.layout_number(MAP_DESCRIPTOR)
+
+        layout.generate_mask_table(self.path, layouts=[self.number])
+
+    def tearDown(self) -> None:
+        layout.use_mask_table(None)
+        self.directory.cleanup()
+
+    def test_table_returns_generated_masks(self) -> None:
+        table = layout.MaskTable(self.path)
+
+        self.assertEqual(
+            table.masks(self.number),
+            layout.compute_terrain_masks(MAP_DESCRIPTOR),
+        )
+        table.close()
+
+    def test_missing_layouts_are_none(self) -> None:
+        table = layout.MaskTable(self.path)
+
+        self.assertIsNone(table.masks(self.number + 1))
+        table.close()
+
+    def test_clues_use_table(self) -> None:
+        clue = Clue(1, {"S"}, clue_type="biome")
+        expected = clue.accepted_tiles(Map(MAP_DESCRIPTOR, STRUCTURES))
+
+        layout.use_mask_table(self.path)
+        gamemap = Map(MAP_DESCRIPTOR, STRUCTURES)
+
+        self.assertSetEqual(
+            {(tile.x, tile.y) for tile in clue.accepted_tiles(gamemap)},
+            {(tile.x, tile.y) for tile in expected},
+        )
+        self.assertIsNotNone(
+            layout.terrain_mask(gamemap, "biome", 1, frozenset({"S"}))
+        )
+
+    def test_missing_table_in_environment(self) -> None:
+        clue = Clue(1, {"S"}, clue_type="biome")
+        expected = clue.accepted_mask(Map(MAP_DESCRIPTOR, STRUCTURES))
+        missing = os.path.join(self.directory.name, "missing.bin")
+
+        with (
+            mock.patch.dict(os.environ, {"CRYPTIDSOLVER_MASK_TABLE": missing}),
+            mock.patch.object(layout, "_mask_table_configured", False),
+        ):
+            with self.assertWarnsRegex(
+                RuntimeWarning, "CRYPTIDSOLVER_MASK_TABLE"
+            ):
+                self.assertEqual(
+                    clue.accepted_mask(Map(MAP_DESCRIPTOR, STRUCTURES)),
+                    expected,
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import socket
+import threading
+import unittest
+
+from cryptidsolver import loadtest, server
+
+
+class TestPercentile(unittest.TestCase):
+    def test_nearest_rank(self) -> None:
+        ordered = [float(value) for value in range(1, 21)]
+
+        self.assertEqual(loadtest.percentile(ordered, 0.5), 10.0)
+        self.assertEqual(loadtest.percentile(ordered, 0.95), 19.0)
+        self.assertEqual(loadtest.percentile(ordered, 0.99), 20.0)
+        self.assertEqual(loadtest.percentile([3.0], 0.99), 3.0)
+
+
+class TestRun(unittest.TestCase):
+    def test_report_covers_operations(self) -> None:
+        solver = server.SolverServer(("127.0.0.1", 0))
+        thread = threading.Thread(target=solver.serve_forever)
+        thread.start()
+
+        try:
+            workloads = loadtest.simulated_workloads(4, 3, seed=1, n_deals=2)
+            report = loadtest.run(
+                f"http://127.0.0.1:{solver.server_port}", workloads, 2
+            )
+        finally:
+            solver.shutdown()
+            solver.server_close()
+            thread.join()
+
+        self.assertEqual(report["latency"]["create"]["count"], 4)
+        self.assertEqual(report["latency"]["place"]["failures"], 0)
+        self.assertEqual(
+            report["operations"],
+            4 + sum(len(workload.commands) for workload in workloads),
+        )
+        self.assertGreaterEqual(report["cache"]["maps"]["misses"], 2)
+        self.assertGreater(report["cache"]["clue_masks"]["hits"], 0)
+        self.assertIn("possible tiles", report["latency"])
+        self.assertIsNone(report["memory"])
+
+    def test_connection_errors_fail_the_session(self) -> None:
+        # A port nothing listens on
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
+
+        failed = []
+        workload = loadtest.simulated_workloads(1, 3, seed=1)[0]
+        connection = loadtest._Client("127.0.0.1", port)
+        try:
+            loadtest._replay(
+                connection,
+                workload,
+                lambda name, elapsed, ok: failed.append((name, ok)),
+            )
+        finally:
+            connection.close()
+
+        self.assertEqual(failed, [("create", False)])
@@ -0,0 +1,82 @@
+import json
+import unittest
+
+from cryptidsolver import infer, metrics
+from cryptidsolver.clue import Clue
+from cryptidsolver.constant import clues
+from cryptidsolver.game import Game
+from cryptidsolver.gamemap import Structure
+from cryptidsolver.player import Player
+
+MAP_DESCRIPTOR = ["3N", "1S", "5S", "4S", "2N", "6S"]
+STRUCTURES = [
+    Structure("green", "stone", 12, 2),
+    Structure("green", "shack", 7, 3),
+    Structure("white", "stone", 8, 6),
+    Structure("white", "shack", 10, 8),
+    Structure("blue", "stone", 9, 1),
+    Structure("blue", "shack", 7, 4),
+]
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self) -> None:
+        players = [
+            Player("orange", clues.by_booklet_entry("alpha", 2)),
+            Player("cyan"),
+            Player("purple"),
+        ]
+        self.game = Game(MAP_DESCRIPTOR, players, STRUCTURES)
+        self.game.place(1, 1, 1, cube=True)
+        self.game.place(2, 3, 3, cube=False)
+
+    def tearDown(self) -> None:
+        metrics.disable()
+        metrics.reset()
+
+    def test_disabled_functions_are_unwrapped(self) -> None:
+        originals = (
+            Clue.accepted_tiles,
+            Game.possible_tiles,
+            infer.possible_tiles,
+        )
+
+        metrics.enable()
+        self.assertIsNot(Game.possible_tiles, originals[1])
+        metrics.disable()
+
+        self.assertEqual(
+            (Clue.accepted_tiles, Game.possible_tiles, infer.possible_tiles),
+            originals,
+        )
+
+    def test_collecting(self) -> None:
+        with metrics.collecting() as report:
+            self.game.possible_tiles().counts()
+            self.game.possible_tiles().counts()
+
+        timing = report["timings"]["PossibleTiles.counts"]
+        self.assertEqual(timing["calls"], 2)
+        self.assertGreaterEqual(timing["total"], timing["max"])
+        self.assertEqual(
+            timing["possible_tiles.combinations"]["total"],
+            2 * timing["possible_tiles.combinations"]["max"],
+        )
+        self.assertIn("Player.possible_clues", report["timings"])
+        self.assertFalse(metrics.enabled())
+
+        # Snapshots are JSON serializable
+        self.assertEqual(json.loads(json.dumps(report)), report)
+
+    def test_reset(self) -> None:
+        metrics.enable()
+        self.game.players[1].possible_clues(self.game.map)
+        self.assertIn("Player.possible_clues", metrics.snapshot()["timings"])
+
+        metrics.reset()
+        self.assertEqual(metrics.snapshot()["timings"], {})
+        self.assertEqual(metrics.snapshot()["counters"], {})
+
+        self.game.players[1].possible_clues(self.game.map)
+        timing = metrics.snapshot()["timings"]["Player.possible_clues"]
+        self.assertEqual(timing["calls"], 1)
@@ -1,8 +1,11 @@
+import pickle
 import unittest
+from copy import deepcopy
 
+from cryptidsolver.bitboard import coordinates_mask
 from cryptidsolver.constant import clues
 from cryptidsolver.gamemap import Map, Structure
-from cryptidsolver.player import Player
+from cryptidsolver.player import Placements, Player
 
 MAP_DESCRIPTOR = ["3N", "1S", "5S", "4S", "2N", "6S"]
 STRUCTURES = [
@@ -75,5 +78,60 @@ class TestPossibleClues(unittest.TestCase):
         )
 
 
+class TestPlacements(unittest.TestCase):
+    def test_mask_follows_list_changes(self) -> None:
+        placements = Placements()
+
+        placements.append((1, 1))
+        placements.extend([(2, 3), (12, 9)])
+        self.assertEqual(
+            placements.mask, coordinates_mask([(1, 1), (2, 3), (12, 9)])
+        )
+
+        placements.remove((2, 3))
+        placements.pop()
+        self.assertEqual(placements.mask, coordinates_mask([(1, 1)]))
+
+        placements += ((5, 5),)
+        self.assertIsInstance(placements, Placements)
+        self.assertEqual(placements.mask, coordinates_mask([(1, 1), (5, 5)]))
+
+        placements *= 2
+        self.assertIsInstance(placements, Placements)
+        self.assertEqual(placements.mask, coordinates_mask([(1, 1), (5, 5)]))
+
+        placements.reverse()
+        placements.sort()
+        self.assertEqual(placements.mask, coordinates_mask([(1, 1), (5, 5)]))
+
+        placements *= 0
+        self.assertEqual(placements.mask, 0)
+
+        placements.append((2, 2))
+        placements.clear()
+        self.assertEqual(placements.mask, 0)
+
+    def test_duplicate_coordinates_keep_bit_until_last_removed(self) -> None:
+        placements = Placements([(4, 4), (4, 4)])
+
+        placements.remove((4, 4))
+
+        self.assertEqual(placements.mask, coordinates_mask([(4, 4)]))
+
+    def test_copies_keep_mask(self) -> None:
+        player = Player("cyan")
+        player.cubes.append((3, 3))
+
+        for copied in (deepcopy(player), pickle.loads(pickle.dumps(player))):
+            self.assertEqual(copied.cubes, [(3, 3)])
+            self.assertEqual(copied.cubes.mask, player.cubes.mask)
+
+    def test_assigned_lists_are_tracked(self) -> None:
+        player = Player("cyan")
+        player.disks = [(5, 5)]
+
+        self.assertEqual(player.disks.mask, coordinates_mask([(5, 5)]))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,78 @@
+import itertools
+import os
+import random
+import tempfile
+import unittest
+
+from cryptidsolver import puzzles
+from cryptidsolver.bitboard import tile_index
+from cryptidsolver.game import Game
+from cryptidsolver.gamemap import Map
+from cryptidsolver.player import Player
+from cryptidsolver.solutions import is_irredundant
+
+
+class TestPuzzles(unittest.TestCase):
+    def test_puzzles_are_valid(self) -> None:
+        stream = puzzles.puzzles(random.Random(0), 3, per_setup=2)
+
+        for puzzle in itertools.islice(stream, 10):
+            setup = puzzle.setup()
+            gamemap = Map(list(setup.map_description), list(setup.structures))
+            masks = [clue.accepted_mask(gamemap) for clue in setup.clues]
+
+            self.assertTrue(is_irredundant(masks))
+            self.assertEqual(masks[0] & masks[1] & masks[2], 1 << puzzle.tile)
+
+    def test_puzzle_agrees_with_game(self) -> None:
+        puzzle = next(puzzles.puzzles(random.Random(3), 3))
+        setup = puzzle.setup()
+
+        game = Game(
+            list(setup.map_description),
+            [
+                Player(color, clue)
+                for color, clue in zip(("red", "orange", "cyan"), setup.clues)
+            ],
+            list(setup.structures),
+        )
+
+        self.assertEqual(
+            [tile_index(tile.x, tile.y) for tile in game.possible_tiles()],
+            [puzzle.tile],
+        )
+
+    def test_per_setup_limits_puzzles(self) -> None:
+        limited = list(
+            itertools.islice(puzzles.puzzles(random.Random(1), 4, 3), 6)
+        )
+
+        self.assertEqual(len({puzzle.structures for puzzle in limited}), 2)
+
+    def test_per_setup_at_least_one(self) -> None:
+        with self.assertRaises(ValueError):
+            puzzles.puzzles(random.Random(1), 4, 0)
+
+
+class TestCorpus(unittest.TestCase):
+    def test_corpus_round_trip(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "corpus.jsonl")
+            puzzles.write_corpus(path, 50, 4, seed=2)
+
+            corpus = list(puzzles.read_corpus(path))
+
+        self.assertEqual(len(corpus), 50)
+        self.assertEqual(len(set(corpus)), 50)
+        self.assertEqual(
+            corpus[:5],
+            list(itertools.islice(puzzles.puzzles(random.Random(2), 4), 5)),
+        )
+
+    def test_no_corpus_without_puzzles(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "corpus.jsonl")
+            with self.assertRaises(ValueError):
+                puzzles.write_corpus(path, 5, 4, per_setup=0)
+
+            self.assertEqual(os.listdir(directory), [])
@@ -0,0 +1,99 @@
+import os
+import random
+import tempfile
+import unittest
+
+from cryptidsolver import records, simulate
+
+
+def simulated_games(n_games: int) -> list[simulate.GameResult]:
+    rng = random.Random(4)
+    return [
+        simulate.play(
+            simulate.deal(rng, 3),
+            [simulate.NarrowingStrategy() for _ in range(3)],
+            rng,
+        )
+        for _ in range(n_games)
+    ]
+
+
+class TestRecords(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "games.bin")
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_round_trip(self) -> None:
+        games = [records.from_result(game) for game in simulated_games(5)]
+
+        with records.RecordWriter(self.path) as writer:
+            writer.write(games[:2])
+        with records.RecordWriter(self.path) as writer:
+            writer.write(games[2:])
+
+        with records.RecordReader(self.path) as reader:
+            read = [view.record() for view in reader]
+
+        self.assertEqual(read, games)
+
+    def test_views_outliving_the_reader(self) -> None:
+        games = [records.from_result(game) for game in simulated_games(3)]
+        with records.RecordWriter(self.path) as writer:
+            writer.write(games)
+
+        with records.RecordReader(self.path) as reader:
+            for view in reader:
+                self.assertGreater(view.n_moves, 0)
+        with records.RecordReader(self.path) as reader:
+            first = next(iter(reader))
+
+        # Header fields are copied, the moves are not
+        self.assertEqual(first.layout, games[0].layout)
+        with self.assertRaises(ValueError):
+            first.record()
+
+    def test_moves_replay_placements(self) -> None:
+        (game,) = simulated_games(1)
+
+        with records.RecordWriter(self.path) as writer:
+            writer.write([records.from_result(game)])
+
+        with records.RecordReader(self.path) as reader:
+            view = next(iter(reader))
+            moves = list(view.moves())
+            self.assertEqual(len(view.raw_moves), 2 * view.n_moves)
+            del view
+
+        self.assertEqual(tuple(moves), game.moves)
+        self.assertTrue(any(move.cube for move in moves))
+        self.assertTrue(any(not move.cube for move in moves))
+
+    def test_unknown_clues_and_no_winner(self) -> None:
+        game = records.GameRecord(
+            layout=46079,
+            structures=((1, 0), (8, 107)),
+            clues=(None, 3, None),
+            winner=None,
+            moves=(simulate.Move(2, True, 107),),
+        )
+
+        with records.RecordWriter(self.path) as writer:
+            writer.write([game])
+
+        with records.RecordReader(self.path) as reader:
+            self.assertEqual([view.record() for view in reader], [game])
+
+    def test_other_files_are_rejected(self) -> None:
+        with open(self.path, "wb") as handle:
+            handle.write(b"not a record file")
+
+        with self.assertRaises(ValueError):
+            records.RecordReader(self.path)
+
+        open(self.path, "wb").close()
+
+        with self.assertRaises(ValueError):
+            records.RecordReader(self.path)
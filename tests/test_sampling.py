@@ -0,0 +1,77 @@
+import unittest
+
+from cryptidsolver import counters, sampling
+from cryptidsolver.constant import clues
+from cryptidsolver.game import Game
+from cryptidsolver.gamemap import Structure
+from cryptidsolver.player import Player
+
+MAP_DESCRIPTOR = ["3N", "1S", "5S", "4S", "2N", "6S"]
+STRUCTURES = [
+    Structure("green", "stone", 12, 2),
+    Structure("green", "shack", 7, 3),
+    Structure("white", "stone", 8, 6),
+    Structure("white", "shack", 10, 8),
+    Structure("blue", "stone", 9, 1),
+    Structure("blue", "shack", 7, 4),
+]
+
+
+class TestEstimate(unittest.TestCase):
+    def setUp(self) -> None:
+        players = [
+            Player("red", clues.by_booklet_entry("alpha", 2)),
+            Player("orange", None),
+            Player("purple", None),
+        ]
+        self.game = Game(MAP_DESCRIPTOR, players, STRUCTURES)
+
+    def test_converges_on_the_exact_probabilities(self) -> None:
+        possible_tiles = self.game.possible_tiles()
+        estimate = possible_tiles.estimate(tolerance=0.02, seed=1)
+
+        self.assertTrue(estimate.converged)
+        self.assertLessEqual(set(estimate.probabilities), set(possible_tiles))
+        self.assertAlmostEqual(sum(estimate.probabilities.values()), 1.0)
+        for tile, probability in possible_tiles.items():
+            self.assertAlmostEqual(
+                estimate.probabilities.get(tile, 0.0), probability, delta=0.05
+            )
+        for tile, (low, high) in estimate.intervals.items():
+            self.assertLessEqual(low, estimate.probabilities[tile])
+            self.assertLessEqual(estimate.probabilities[tile], high)
+            self.assertLessEqual(high - low, 2 * 0.02 + 1e-9)
+
+    def test_seeded(self) -> None:
+        possible_tiles = self.game.possible_tiles()
+
+        self.assertEqual(
+            possible_tiles.estimate(seed=3, max_samples=5000),
+            possible_tiles.estimate(seed=3, max_samples=5000),
+        )
+
+    def test_budgets(self) -> None:
+        possible_tiles = self.game.possible_tiles()
+
+        estimate = possible_tiles.estimate(tolerance=1e-4, max_samples=3000)
+        self.assertFalse(estimate.converged)
+        self.assertEqual(estimate.samples, 3000)
+
+        # A batch is drawn before the time budget is checked
+        estimate = possible_tiles.estimate(tolerance=1e-4, seconds=0.0)
+        self.assertFalse(estimate.converged)
+        self.assertEqual(estimate.samples, sampling._BATCH)
+
+    def test_counted(self) -> None:
+        with counters.delta() as counts:
+            estimate = self.game.possible_tiles().estimate(max_samples=100)
+
+        self.assertEqual(counts[counters.SAMPLES], estimate.samples)
+        self.assertNotIn(counters.COMBINATIONS, counts)
+
+    def test_no_candidates(self) -> None:
+        estimate = sampling.estimate_tiles(
+            self.game.map, [frozenset(), frozenset()]
+        )
+
+        self.assertEqual(estimate, sampling.Estimate({}, {}, 0, 0, False))
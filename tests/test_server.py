@@ -0,0 +1,207 @@
+import gc
+import http.client
+import json
+import threading
+import tracemalloc
+import unittest
+from unittest import mock
+
+from cryptidsolver import server
+
+MAP = ["3N", "1S", "5S", "4S", "2N", "6S"]
+OTHER_MAP = ["1N", "2N", "3N", "4N", "5N", "6N"]
+PLAYERS = ["@orange_a2", "cyan_b79", "purple_e28"]
+STRUCTURES = [
+    "green_ss_12,2",
+    "green_as_7,3",
+    "white_ss_8,6",
+    "white_as_10,8",
+    "blue_ss_9,1",
+    "blue_as_7,4",
+]
+
+
+class TestSessionStore(unittest.TestCase):
+    def test_sessions_share_maps(self) -> None:
+        store = server.SessionStore()
+        first = store.create(MAP, PLAYERS, STRUCTURES)
+        second = store.create(MAP, PLAYERS, STRUCTURES)
+
+        self.assertIs(
+            store._sessions[first].engine.game.map,
+            store._sessions[second].engine.game.map,
+        )
+        self.assertEqual(store.stats()["maps"], 1)
+        self.assertEqual(store.stats()["map_hits"], 1)
+
+        store.close(first)
+        store.close(second)
+        self.assertEqual(store.stats()["maps"], 0)
+        self.assertEqual(store.stats()["estimated_bytes"], 0)
+
+    def test_least_recently_used_are_evicted(self) -> None:
+        store = server.SessionStore(
+            max_bytes=server._MAP_BYTES + 3 * server._SESSION_BYTES
+        )
+        sessions = [store.create(MAP, PLAYERS, STRUCTURES) for _ in range(3)]
+
+        # Use the oldest one, and grow the newest over the cap
+        store.execute(sessions[0], "undo")
+        store.execute(sessions[2], "place c 1 1")
+
+        self.assertEqual(store.stats()["evictions"], 1)
+        with self.assertRaises(server.SessionError):
+            store.execute(sessions[1], "undo")
+
+        store.execute(sessions[0], "undo")
+
+
+class TestFootprint(unittest.TestCase):
+    ANALYSES = ("possible clues", "location prob", "infer cube placement")
+
+    def setUp(self) -> None:
+        self.store = server.SessionStore()
+        # Fill the process-wide caches on another map first
+        session = self.store.create(OTHER_MAP, PLAYERS, STRUCTURES)
+        self.store.execute(session, "place c 1 1")
+        for cmd in self.ANALYSES:
+            self.store.execute(session, cmd)
+
+        gc.collect()
+        tracemalloc.start()
+        self.addCleanup(tracemalloc.stop)
+
+    def allocated(self) -> int:
+        gc.collect()
+        return tracemalloc.get_traced_memory()[0]
+
+    def test_estimates_are_upper_bounds(self) -> None:
+        # The first session on a map pays for the map and its clue masks
+        before = self.allocated()
+        first = self.store.create(MAP, PLAYERS, STRUCTURES)
+        for cmd in self.ANALYSES:
+            self.store.execute(first, cmd)
+        self.assertLessEqual(
+            self.allocated() - before,
+            server._MAP_BYTES + server._SESSION_BYTES,
+        )
+
+        before = self.allocated()
+        second = self.store.create(MAP, PLAYERS, STRUCTURES)
+        for cmd in self.ANALYSES:
+            self.store.execute(second, cmd)
+        self.assertLessEqual(self.allocated() - before, server._SESSION_BYTES)
+
+        before = self.allocated()
+        n_placements = 0
+        for x in range(1, 13):
+            for y in range(1, 10):
+                piece = "c" if (x + y) % 2 else "d"
+                self.store.execute(second, f"place {piece} {x} {y}")
+                n_placements += 1
+        self.assertLessEqual(
+            self.allocated() - before,
+            server._PLACEMENT_BYTES * n_placements,
+        )
+
+
+class TestServer(unittest.TestCase):
+    server: server.SolverServer
+    thread: threading.Thread
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.server = server.SolverServer(("127.0.0.1", 0))
+        cls.thread = threading.Thread(target=cls.server.serve_forever)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.thread.join()
+
+    def request(
+        self, method: str, path: str, body: dict | None = None
+    ) -> tuple[int, dict]:
+        connection = http.client.HTTPConnection(
+            "127.0.0.1", self.server.server_port, timeout=30
+        )
+        try:
+            connection.request(
+                method,
+                path,
+                body=None if body is None else json.dumps(body),
+            )
+            response = connection.getresponse()
+            return response.status, json.loads(response.read())
+        finally:
+            connection.close()
+
+    def test_session_commands(self) -> None:
+        status, created = self.request(
+            "POST",
+            "/sessions",
+            {"map": MAP, "players": PLAYERS, "structures": STRUCTURES},
+        )
+        self.assertEqual(status, 201)
+        path = f"/sessions/{created['session']}"
+
+        status, placed = self.request(
+            "POST", f"{path}/commands", {"command": "place c 1 1"}
+        )
+        self.assertEqual(status, 200)
+        self.assertEqual(placed["tile"], [1, 1])
+
+        status, clues = self.request(
+            "POST", f"{path}/commands", {"command": "possible clues"}
+        )
+        self.assertTrue(clues["ok"])
+        self.assertEqual(len(clues["clues"]["orange"]), 1)
+
+        self.assertEqual(self.request("DELETE", path)[0], 200)
+        self.assertEqual(
+            self.request("POST", f"{path}/commands", {"command": "undo"})[0],
+            404,
+        )
+
+    def test_bad_requests(self) -> None:
+        status, _ = self.request("POST", "/sessions", {"map": MAP})
+        self.assertEqual(status, 400)
+
+        # No booklet entry after the separator
+        status, _ = self.request(
+            "POST",
+            "/sessions",
+            {
+                "map": MAP,
+                "players": ["@orange_", *PLAYERS[1:]],
+                "structures": STRUCTURES,
+            },
+        )
+        self.assertEqual(status, 400)
+
+        status, _ = self.request("GET", "/nowhere")
+        self.assertEqual(status, 404)
+        status, _ = self.request("DELETE", "/nowhere/at-all")
+        self.assertEqual(status, 404)
+
+        with mock.patch.object(
+            self.server.store, "stats", side_effect=RuntimeError("Broken")
+        ):
+            status, error = self.request("GET", "/stats")
+        self.assertEqual(status, 500)
+        self.assertIn("Broken", error["error"])
+
+        status, stats = self.request("GET", "/stats")
+        self.assertEqual(status, 200)
+        self.assertIn("sessions", stats)
+
+    def test_metrics(self) -> None:
+        status, snapshot = self.request("DELETE", "/metrics")
+        self.assertEqual(status, 200)
+        self.assertEqual(snapshot["timings"], {})
+
+        status, snapshot = self.request("GET", "/metrics")
+        self.assertEqual(status, 200)
+        self.assertIn("counters", snapshot)
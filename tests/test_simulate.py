@@ -0,0 +1,181 @@
+import random
+import unittest
+from unittest import mock
+
+from cryptidsolver import simulate
+from cryptidsolver.bitboard import tile_index
+from cryptidsolver.game import Game
+from cryptidsolver.gamemap import Map
+from cryptidsolver.solutions import is_irredundant
+
+
+class FixedSearch(simulate.Strategy):
+    def __init__(self, tile: int) -> None:
+        self.tile = tile
+
+    def take_turn(self, view):
+        return simulate.Search(self.tile)
+
+    def penalty_cube(self, view) -> int:
+        return min(simulate.iter_indices(view.cube_options()))
+
+
+class AskOnly(simulate.Strategy):
+    def __init__(self, player: int, tile: int) -> None:
+        self.player = player
+        self.tile = tile
+
+    def take_turn(self, view):
+        return simulate.Question(self.player, self.tile)
+
+    def penalty_cube(self, view) -> int:
+        raise AssertionError("No tile to place a cube on")
+
+
+class TestDeal(unittest.TestCase):
+    def test_dealt_clues_single_out_a_tile(self) -> None:
+        rng = random.Random(0)
+
+        for n_players in (3, 4, 5):
+            setup = simulate.deal(rng, n_players)
+            gamemap = Map(list(setup.map_description), list(setup.structures))
+
+            self.assertEqual(len(setup.clues), n_players)
+            self.assertTrue(
+                is_irredundant(
+                    [clue.accepted_mask(gamemap) for clue in setup.clues]
+                )
+            )
+
+    def test_deal_is_reproducible(self) -> None:
+        first = simulate.deal(random.Random(5), 4)
+        second = simulate.deal(random.Random(5), 4)
+
+        self.assertEqual(first.map_description, second.map_description)
+        self.assertEqual(first.clues, second.clues)
+        self.assertEqual(
+            [(s.color, s.shape, s.x, s.y) for s in first.structures],
+            [(s.color, s.shape, s.x, s.y) for s in second.structures],
+        )
+
+    def test_deal_gives_up(self) -> None:
+        with mock.patch.object(simulate, "_CLUE_ATTEMPTS", 0):
+            with self.assertRaises(RuntimeError):
+                simulate.deal(random.Random(0), 3)
+
+
+class TestPlay(unittest.TestCase):
+    def test_games_end_with_a_winner(self) -> None:
+        rng = random.Random(1)
+
+        for n_players in (3, 4, 5):
+            setup = simulate.deal(rng, n_players)
+            result = simulate.play(
+                setup,
+                [simulate.NarrowingStrategy() for _ in range(n_players)],
+                rng,
+            )
+
+            self.assertIsNotNone(result.winner)
+            self.assertGreater(result.turns, 0)
+
+    def test_placements_go_through_the_game(self) -> None:
+        rng = random.Random(4)
+        setup = simulate.deal(rng, 4)
+
+        with mock.patch.object(
+            Game, "place", autospec=True, side_effect=Game.place
+        ) as place:
+            result = simulate.play(
+                setup, [simulate.NarrowingStrategy() for _ in range(4)], rng
+            )
+
+        # Arguments of Game.place after self: seat, x, y
+        self.assertEqual(
+            [
+                simulate.Move(
+                    call.args[1],
+                    call.kwargs["cube"],
+                    tile_index(*call.args[2:4]),
+                )
+                for call in place.call_args_list
+            ],
+            list(result.moves),
+        )
+        # Every turn but the winning one is ended by a placement
+        self.assertEqual(
+            sum(
+                call.kwargs.get("advance_tick", False)
+                for call in place.call_args_list
+            ),
+            result.turns - 1,
+        )
+
+    def test_penalty_without_cube_options(self) -> None:
+        setup = simulate.deal(random.Random(6), 3)
+        gamemap = Map(list(setup.map_description), list(setup.structures))
+        refused = min(
+            tile_index(tile.x, tile.y)
+            for tile in gamemap
+            if tile not in setup.clues[1].accepted_tiles(gamemap)
+        )
+
+        with mock.patch.object(
+            simulate.SeatView, "cube_options", return_value=0
+        ):
+            result = simulate.play(
+                setup,
+                [
+                    AskOnly(1, refused),
+                    AskOnly(0, refused),
+                    AskOnly(0, refused),
+                ],
+                random.Random(0),
+                max_turns=1,
+                opening_cubes=1,
+            )
+
+        self.assertIsNone(result.winner)
+        self.assertEqual(result.turns, 1)
+        self.assertEqual(result.moves, (simulate.Move(1, True, refused),))
+
+    def test_searching_the_solution_wins(self) -> None:
+        setup = simulate.deal(random.Random(2), 3)
+        gamemap = Map(list(setup.map_description), list(setup.structures))
+
+        solution = -1
+        for tile in gamemap:
+            if all(
+                tile in clue.accepted_tiles(gamemap) for clue in setup.clues
+            ):
+                solution = tile_index(tile.x, tile.y)
+
+        result = simulate.play(
+            setup,
+            [FixedSearch(solution) for _ in setup.clues],
+            random.Random(0),
+        )
+
+        self.assertEqual(result.winner, 0)
+        self.assertEqual(result.turns, 1)
+
+    def test_rejects_search_outside_own_clue(self) -> None:
+        setup = simulate.deal(random.Random(3), 3)
+        gamemap = Map(list(setup.map_description), list(setup.structures))
+        refused = min(
+            tile_index(tile.x, tile.y)
+            for tile in gamemap
+            if tile not in setup.clues[0].accepted_tiles(gamemap)
+        )
+
+        with self.assertRaises(simulate.IllegalMove):
+            simulate.play(
+                setup,
+                [FixedSearch(refused) for _ in setup.clues],
+                random.Random(0),
+                opening_cubes=0,
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
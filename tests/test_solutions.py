@@ -0,0 +1,48 @@
+import unittest
+
+from cryptidsolver.bitboard import index_coordinates
+from cryptidsolver.constant import clues
+from cryptidsolver.constant.clues import ORDERED_CLUES
+from cryptidsolver.game import Game
+from cryptidsolver.gamemap import Map, Structure
+from cryptidsolver.player import Player
+from cryptidsolver.solutions import solution_table
+
+MAP_DESCRIPTOR = ["3N", "1S", "5S", "4S", "2N", "6S"]
+STRUCTURES = [
+    Structure("green", "stone", 12, 2),
+    Structure("green", "shack", 7, 3),
+    Structure("white", "stone", 8, 6),
+    Structure("white", "shack", 10, 8),
+    Structure("blue", "stone", 9, 1),
+    Structure("blue", "shack", 7, 4),
+]
+
+
+class TestSolutionTable(unittest.TestCase):
+    def test_known_clues_are_a_solution(self) -> None:
+        known = [
+            clues.by_booklet_entry("alpha", 2),
+            clues.by_booklet_entry("beta", 79),
+            clues.by_booklet_entry("epsilon", 28),
+        ]
+        game = Game(
+            MAP_DESCRIPTOR,
+            [Player(str(num), clue) for num, clue in enumerate(known)],
+            STRUCTURES,
+        )
+        (tile,) = game.possible_tiles()
+
+        combination = tuple(
+            sorted(ORDERED_CLUES.index(clue) for clue in known)
+        )
+        table = solution_table(Map(MAP_DESCRIPTOR, STRUCTURES), 3)
+
+        self.assertIn(combination, table)
+        self.assertEqual(
+            index_coordinates(table[combination]), (tile.x, tile.y)
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
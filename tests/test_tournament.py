@@ -0,0 +1,167 @@
+import io
+import json
+import os
+import time
+import unittest
+from collections import Counter
+
+from cryptidsolver import simulate, tournament
+
+
+class Crashing(simulate.NarrowingStrategy):
+    def take_turn(self, view):
+        raise RuntimeError("Broken strategy")
+
+
+class Hanging(simulate.NarrowingStrategy):
+    def take_turn(self, view):
+        time.sleep(60)
+
+
+class Dying(simulate.NarrowingStrategy):
+    def take_turn(self, view):
+        os._exit(1)
+
+
+class Slow(simulate.NarrowingStrategy):
+    DELAY = 0.25
+
+    def __init__(self) -> None:
+        super().__init__()
+        time.sleep(self.DELAY)
+
+
+def records(output: io.StringIO) -> dict[int, dict]:
+    lines = output.getvalue().splitlines()
+    return {record["game"]: record for record in map(json.loads, lines)}
+
+
+class TestLineup(unittest.TestCase):
+    def test_seats_rotate_every_game(self) -> None:
+        entrants = ["a", "b", "c"]
+
+        self.assertEqual(tournament.lineup(entrants, 3, 0), ["a", "b", "c"])
+        self.assertEqual(tournament.lineup(entrants, 3, 1), ["b", "c", "a"])
+        self.assertEqual(tournament.lineup(["a", "b"], 4, 0), list("abab"))
+
+    def test_seats_are_balanced(self) -> None:
+        for entrants in (["a", "b"], ["a", "b", "c", "d"], list("abcde")):
+            for n_players in (3, 4, 5):
+                n_games = tournament.cycle(entrants, n_players)
+                lineups = [
+                    tournament.lineup(entrants, n_players, game)
+                    for game in range(n_games)
+                ]
+
+                for seat in range(n_players):
+                    with self.subTest(
+                        entrants=len(entrants), seats=n_players, seat=seat
+                    ):
+                        counts = Counter(lineup[seat] for lineup in lineups)
+                        self.assertEqual(set(counts), set(entrants))
+                        self.assertEqual(len(set(counts.values())), 1)
+
+
+class TestRun(unittest.TestCase):
+    def test_results_do_not_depend_on_workers(self) -> None:
+        results = []
+
+        for workers in (1, 3):
+            output = io.StringIO()
+            summary = tournament.run(
+                tournament.Settings(
+                    ["random", "narrowing"],
+                    9,
+                    3,
+                    master_seed=11,
+                    workers=workers,
+                    chunk_size=2,
+                ),
+                output,
+            )
+            results.append(
+                {
+                    game: (record["winner"], record["turns"])
+                    for game, record in records(output).items()
+                }
+            )
+
+            self.assertEqual(summary["games"], 9)
+            self.assertEqual(summary["errors"], 0)
+            self.assertEqual(sum(summary["wins"].values()), 9)
+
+        self.assertEqual(results[0], results[1])
+
+    def test_failing_games_are_recorded(self) -> None:
+        output = io.StringIO()
+        summary = tournament.run(
+            tournament.Settings(
+                ["narrowing", "crashing"],
+                3,
+                3,
+                master_seed=0,
+                workers=1,
+                factories={
+                    "narrowing": simulate.NarrowingStrategy,
+                    "crashing": Crashing,
+                },
+            ),
+            output,
+        )
+
+        self.assertEqual(summary["games"], 3)
+        self.assertEqual(summary["errors"], 3)
+        self.assertIn("Broken strategy", records(output)[0]["error"])
+
+    def test_stuck_and_dead_workers_are_replaced(self) -> None:
+        for stuck in (Hanging, Dying):
+            output = io.StringIO()
+            summary = tournament.run(
+                tournament.Settings(
+                    ["narrowing", "stuck"],
+                    4,
+                    3,
+                    master_seed=0,
+                    workers=2,
+                    factories={
+                        "narrowing": simulate.NarrowingStrategy,
+                        "stuck": stuck,
+                    },
+                    chunk_size=4,
+                    game_timeout=0.5,
+                ),
+                output,
+            )
+
+            self.assertEqual(summary["games"], 4)
+            self.assertEqual(summary["errors"], 4)
+            self.assertEqual(
+                {record["error"] for record in records(output).values()},
+                {"timeout"},
+            )
+
+    def test_queued_chunks_are_not_timed(self) -> None:
+        # The second chunk waits for the only worker longer than a game may
+        # take, but runs in time once started
+        output = io.StringIO()
+        summary = tournament.run(
+            tournament.Settings(
+                ["slow"],
+                2,
+                3,
+                master_seed=0,
+                workers=1,
+                factories={"slow": Slow},
+                chunk_size=1,
+                game_timeout=6 * Slow.DELAY,
+            ),
+            output,
+        )
+
+        self.assertEqual(summary["errors"], 0, records(output))
+
+    def test_unknown_strategies_are_rejected(self) -> None:
+        with self.assertRaises(ValueError):
+            tournament.run(
+                tournament.Settings(["nonexistent"], 1, 3, 0), io.StringIO()
+            )
@@ -0,0 +1,90 @@
+import io
+import json
+import unittest
+
+from cryptidsolver import engine, infer, trace
+from cryptidsolver.engine import plan_question
+
+STRUCTURES = [
+    "green_ss_12,2",
+    "green_as_7,3",
+    "white_ss_8,6",
+    "white_as_10,8",
+    "blue_ss_9,1",
+    "blue_as_7,4",
+]
+
+
+class TestTrace(unittest.TestCase):
+    def setUp(self) -> None:
+        self.engine = engine.Engine(
+            engine.new_game(
+                ["3N", "1S", "5S", "4S", "2N", "6S"],
+                ["@orange_a2", "cyan_b79", "purple_e28"],
+                STRUCTURES,
+            )
+        )
+        for cmd in ("place c 1 1", "answer cyan d 5 5", "answer purple c 3 3"):
+            self.engine.execute(cmd)
+
+        self.output = io.StringIO()
+        trace.enable(self.output)
+
+    def tearDown(self) -> None:
+        trace.disable()
+
+    def records(self) -> list[dict]:
+        lines = self.output.getvalue().splitlines()
+        return [json.loads(line) for line in lines]
+
+    def test_possible_tiles(self) -> None:
+        game = self.engine.game
+        game.possible_tiles().counts()
+
+        (record,) = self.records()
+        self.assertEqual(record["kind"], "possible_tiles")
+        self.assertEqual(record["state"], trace.state_hash(game))
+        self.assertEqual(record["candidates"]["orange"], 1)
+        self.assertLessEqual(
+            record["combinations_after"], record["combinations_before"]
+        )
+        self.assertEqual(set(record["phases"]), {"enumerate"})
+
+    def test_nested_analyses_are_covered_by_the_outer_one(self) -> None:
+        plan_question(self.engine.game)
+
+        (record,) = self.records()
+        self.assertEqual(record["kind"], "question")
+        self.assertLessEqual(len(record["top_questions"]), 5)
+        fitnesses = [
+            question["fitness"] for question in record["top_questions"]
+        ]
+        self.assertEqual(fitnesses, sorted(fitnesses, reverse=True))
+
+    def test_infer(self) -> None:
+        game = self.engine.game
+        infer.possible_clues_after_disk_placement(
+            game.map, game.players[1], (2, 2)
+        )
+
+        (record,) = self.records()
+        self.assertEqual(record["kind"], "disk_placement")
+        self.assertLessEqual(
+            record["candidates_after"], record["candidates_before"]
+        )
+
+    def test_disabled(self) -> None:
+        trace.disable()
+        self.engine.game.possible_tiles().counts()
+
+        self.assertEqual(self.output.getvalue(), "")
+
+    def test_state_hash(self) -> None:
+        game = self.engine.game
+        before = trace.state_hash(game)
+
+        self.assertEqual(trace.state_hash(game.branch()), before)
+        game.place(1, 6, 6, cube=False)
+        self.assertNotEqual(trace.state_hash(game), before)
+        game.undo()
+        self.assertEqual(trace.state_hash(game), before)